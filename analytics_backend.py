@@ -0,0 +1,198 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Tuple
+
+import pandas as pd
+
+from db_pool import get_manager
+
+# Portfolio-wide aggregates over the raw logs. Both backends run the same SQL;
+# only the month-bucketing expression differs between the two dialects.
+PORTFOLIO_TOTALS_SQL = """
+    SELECT p.project_id, p.project_name,
+           COUNT(*) AS reports,
+           MIN(r.report_date) AS first_report,
+           MAX(r.report_date) AS last_report,
+           COALESCE(SUM(m.workers), 0) AS workers,
+           COALESCE(SUM(m.man_hours), 0) AS man_hours,
+           COALESCE(SUM(e.equipment_hours), 0) AS equipment_hours,
+           COALESCE(SUM(d.deliveries), 0) AS deliveries
+    FROM DailyReports r
+    JOIN Projects p ON p.project_id = r.project_id
+    LEFT JOIN (
+        SELECT report_id, SUM(number_of_workers) AS workers, SUM(number_of_workers * hours_worked) AS man_hours
+        FROM ManpowerLog GROUP BY report_id
+    ) m ON m.report_id = r.report_id
+    LEFT JOIN (
+        SELECT report_id, SUM(hours_used) AS equipment_hours FROM EquipmentLog GROUP BY report_id
+    ) e ON e.report_id = r.report_id
+    LEFT JOIN (
+        SELECT report_id, COUNT(*) AS deliveries FROM MaterialDeliveries GROUP BY report_id
+    ) d ON d.report_id = r.report_id
+    {where}
+    GROUP BY p.project_id, p.project_name
+    ORDER BY p.project_name
+"""
+
+MANPOWER_BY_TRADE_SQL = """
+    SELECT {month} AS month, t.name AS trade,
+           SUM(m.number_of_workers) AS workers, SUM(m.number_of_workers * m.hours_worked) AS man_hours
+    FROM DailyReports r
+    JOIN ManpowerLog m ON m.report_id = r.report_id
+    JOIN Trades t ON t.trade_id = m.trade_id
+    {where}
+    GROUP BY month, t.name
+    ORDER BY month, t.name
+"""
+
+EQUIPMENT_BY_PROJECT_SQL = """
+    SELECT {month} AS month, p.project_name, SUM(e.hours_used) AS equipment_hours
+    FROM DailyReports r
+    JOIN Projects p ON p.project_id = r.project_id
+    JOIN EquipmentLog e ON e.report_id = r.report_id
+    {where}
+    GROUP BY month, p.project_name
+    ORDER BY month, p.project_name
+"""
+
+
+def _where(start: Optional[str], end: Optional[str], project_id: Optional[int] = None) -> Tuple[str, List[Any]]:
+    clauses, params = [], []
+    if start:
+        clauses.append("r.report_date >= ?")
+        params.append(str(start))
+    if end:
+        clauses.append("r.report_date <= ?")
+        params.append(str(end))
+    if project_id is not None:
+        clauses.append("r.project_id = ?")
+        params.append(int(project_id))
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class AnalyticsBackend(ABC):
+    """Portfolio-wide queries over one construction_management database.
+
+    Subclasses provide `query` and the dialect's month-bucketing expression
+    (a class attribute is enough); a subclass missing either cannot be created.
+    """
+
+    name = "base"
+
+    @property
+    @abstractmethod
+    def month_expr(self) -> str:
+        """SQL expression bucketing r.report_date into 'YYYY-MM'."""
+
+    @abstractmethod
+    def query(self, sql: str, params: List[Any]) -> pd.DataFrame:
+        """Run sql with positional params and return the result as a DataFrame."""
+
+    def portfolio_totals(self, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """Per-project report count, date span, workers, man-hours, equipment hours and deliveries."""
+        where, params = _where(start, end)
+        return self.query(PORTFOLIO_TOTALS_SQL.format(where=where), params)
+
+    def manpower_by_trade(
+        self, start: Optional[str] = None, end: Optional[str] = None, project_id: Optional[int] = None
+    ) -> pd.DataFrame:
+        """Workers and man-hours per trade per month."""
+        where, params = _where(start, end, project_id)
+        return self.query(MANPOWER_BY_TRADE_SQL.format(month=self.month_expr, where=where), params)
+
+    def equipment_by_project(self, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """Equipment hours per project per month."""
+        where, params = _where(start, end)
+        return self.query(EQUIPMENT_BY_PROJECT_SQL.format(month=self.month_expr, where=where), params)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteAnalytics(AnalyticsBackend):
+    """Runs the analytics queries through the shared SQLite read pool."""
+
+    name = "sqlite"
+    month_expr = "strftime('%Y-%m', r.report_date)"
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+
+    def query(self, sql: str, params: List[Any]) -> pd.DataFrame:
+        with get_manager(self.db_path).reader() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+
+# Why DuckDB's sqlite extension could not be installed or loaded (e.g. offline),
+# kept for the process so later calls fall back to SQLite without retrying.
+_extension_error: Optional[str] = None
+
+
+class DuckDBAnalytics(AnalyticsBackend):
+    """Runs the analytics queries in DuckDB against the SQLite file in place.
+
+    Uses DuckDB's sqlite extension to ATTACH the database read-only, so
+    aggregation is vectorized and multi-threaded without copying data.
+    """
+
+    name = "duckdb"
+    month_expr = "strftime(r.report_date, '%Y-%m')"
+
+    def __init__(self, db_path: str, threads: Optional[int] = None) -> None:
+        global _extension_error
+        import duckdb  # optional dependency; only needed for this backend
+
+        if _extension_error is not None:
+            raise RuntimeError(f"DuckDB sqlite extension unavailable: {_extension_error}")
+        self.db_path = db_path
+        self._conn = duckdb.connect(database=":memory:")
+        self._lock = threading.Lock()
+        try:
+            try:
+                self._conn.execute("INSTALL sqlite;")
+                self._conn.execute("LOAD sqlite;")
+            except duckdb.Error as e:
+                _extension_error = str(e)
+                raise
+            self._conn.execute(f"SET threads = {int(threads or os.cpu_count() or 1)};")
+            path = os.path.abspath(db_path).replace("'", "''")
+            self._conn.execute(f"ATTACH '{path}' AS cm (TYPE sqlite, READ_ONLY);")
+            self._conn.execute("USE cm;")
+        except Exception:
+            self._conn.close()
+            raise
+
+    def query(self, sql: str, params: List[Any]) -> pd.DataFrame:
+        # A cursor per query lets Streamlit sessions share one DuckDB connection.
+        with self._lock:
+            cursor = self._conn.cursor()
+        try:
+            cursor.execute("USE cm;")
+            return cursor.execute(sql, params).df()
+        finally:
+            cursor.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+BACKENDS = {"sqlite": SQLiteAnalytics, "duckdb": DuckDBAnalytics}
+
+
+def duckdb_available() -> bool:
+    """Return True if the optional duckdb package can be imported and its sqlite extension has not failed."""
+    if _extension_error is not None:
+        return False
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_backend(name: str, db_path: str) -> AnalyticsBackend:
+    """Create the analytics backend called `name` ("sqlite" or "duckdb") for db_path."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown analytics backend: {name}")
+    return BACKENDS[name](db_path)
@@ -0,0 +1,177 @@
+"""Benchmark log-row conversion: per-record Python coercion vs the columnar path.
+
+    python benchmarks/bench_log_validation.py --sizes 1x1000,1x100000,5000x10 --output log_validation_results.json
+
+Each size is REPORTSxROWS (rows per log per report). "records" is the
+previous bulk_insert path, run per report: `replace({pd.NA: None})`,
+`to_dict(orient="records")` and str()/int()/float() per cell. "columnar" is
+log_validation.validate_reports, which validates the whole batch in one pass
+per column. Batches of small reports are also timed including the inserts
+into an in-memory database; single large reports are not, because the search
+index triggers re-aggregate a report's activity text on every insert.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import streamlit_entry as entry  # noqa: E402
+from log_validation import LOG_TABLES, validate_reports  # noqa: E402
+from lookups import NameResolver  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+
+def make_logs(rows: int) -> List[pd.DataFrame]:
+    """Four editor-like frames of `rows` rows each, with numbers typed as strings in a tenth of them."""
+    def numbers(values: List[Any]) -> List[Any]:
+        return [str(v) if i % 10 == 0 else v for i, v in enumerate(values)]
+
+    return [
+        pd.DataFrame({
+            "trade": [f"Trade {i % 40}" for i in range(rows)],
+            "number_of_workers": numbers([i % 12 for i in range(rows)]),
+            "hours_worked": [8.0] * rows,
+        }),
+        pd.DataFrame({
+            "equipment_name": [f"Equipment {i % 30}" for i in range(rows)],
+            "quantity": [1 + i % 3 for i in range(rows)],
+            "hours_used": numbers([6.5] * rows),
+        }),
+        pd.DataFrame({
+            "activity_description": [f"Activity {i}" for i in range(rows)],
+            "status": ["In Progress"] * rows,
+            "percent_complete": [i % 101 for i in range(rows)],
+            "notes": [""] * rows,
+        }),
+        pd.DataFrame({
+            "material_name": ["Concrete Mix"] * rows,
+            "quantity": numbers([12.0] * rows),
+            "unit": ["m3"] * rows,
+            "supplier": ["City"] * rows,
+            "ticket_number": [f"T-{i}" for i in range(rows)],
+        }),
+    ]
+
+
+def records_rows(logs: List[pd.DataFrame]) -> List[List[Tuple[Any, ...]]]:
+    """The per-record conversion bulk_insert used before the columnar path."""
+    manpower, equipment, activities, materials = (
+        df.replace({pd.NA: None}).to_dict(orient="records") if not df.empty else [] for df in logs
+    )
+    return [
+        [
+            (str(m.get("trade", "")).strip(), int(m.get("number_of_workers", 0) or 0), float(m.get("hours_worked", 0) or 0.0))
+            for m in manpower
+            if str(m.get("trade", "")).strip() != ""
+        ],
+        [
+            (str(e.get("equipment_name", "")).strip(), int(e.get("quantity", 0) or 0), float(e.get("hours_used", 0) or 0.0))
+            for e in equipment
+            if str(e.get("equipment_name", "")).strip() != ""
+        ],
+        [
+            (
+                str(a.get("activity_description", "")).strip(),
+                str(a.get("status", "In Progress")),
+                int(a.get("percent_complete", 0) or 0),
+                str(a.get("notes", "")),
+            )
+            for a in activities
+            if str(a.get("activity_description", "")).strip() != ""
+        ],
+        [
+            (
+                str(m.get("material_name", "")).strip(),
+                float(m.get("quantity", 0) or 0.0),
+                str(m.get("unit", "")),
+                str(m.get("supplier", "")),
+                str(m.get("ticket_number", "")),
+            )
+            for m in materials
+            if str(m.get("material_name", "")).strip() != ""
+        ],
+    ]
+
+
+def columnar_rows(reports: List[List[pd.DataFrame]]) -> List[List[List[Tuple[Any, ...]]]]:
+    rows, errors = validate_reports(reports)
+    if any(errors):
+        raise RuntimeError(next(e for e in errors if e))
+    return rows
+
+
+def insert(conn: sqlite3.Connection, reports_rows: List[List[List[Tuple[Any, ...]]]]) -> None:
+    names = NameResolver(conn)
+    for report_id, logs in enumerate(reports_rows, start=1):
+        for spec, rows in zip(LOG_TABLES, logs):
+            conn.executemany(entry._insert_sql(spec), ((report_id, *row) for row in names.stored_rows(spec, rows)))
+
+
+def time_call(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return {"median": statistics.median(samples), "min": min(samples)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark per-record vs columnar log validation.")
+    parser.add_argument("--sizes", default="1x1000,1x100000,5000x10", help="comma-separated REPORTSxROWS sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="log_validation_results.json")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+
+    def with_rollback(convert: Callable[[], List[List[List[Tuple[Any, ...]]]]]) -> Callable[[], None]:
+        def run() -> None:
+            conn.execute("BEGIN;")
+            try:
+                insert(conn, convert())
+            finally:
+                conn.rollback()
+        return run
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for size in args.sizes.split(","):
+        reports, rows = (int(n) for n in size.lower().split("x"))
+        batch = [make_logs(rows) for _ in range(reports)]
+        if [records_rows(logs) for logs in batch] != columnar_rows(batch):
+            raise RuntimeError(f"conversion results differ at {size}")
+        timings = {
+            "convert.records": time_call(lambda: [records_rows(logs) for logs in batch], args.repeat),
+            "convert.columnar": time_call(lambda: columnar_rows(batch), args.repeat),
+        }
+        if rows <= 100:
+            timings["insert.records"] = time_call(with_rollback(lambda: [records_rows(logs) for logs in batch]), args.repeat)
+            timings["insert.columnar"] = time_call(with_rollback(lambda: columnar_rows(batch)), args.repeat)
+        results[size] = timings
+        for step in ("convert", "insert"):
+            if f"{step}.records" not in timings:
+                continue
+            before, after = timings[f"{step}.records"]["median"], timings[f"{step}.columnar"]["median"]
+            print(
+                f"{size:>10} {step:8s} records {before * 1000:9.1f} ms  columnar {after * 1000:9.1f} ms  "
+                f"({before / after:4.1f}x)"
+            )
+    conn.close()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"repeat": args.repeat, "results": results}, f, indent=2)
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
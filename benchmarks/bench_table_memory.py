@@ -0,0 +1,105 @@
+"""Measure the in-memory footprint of the loaded report tables, plain vs compact dtypes.
+
+    python benchmarks/bench_table_memory.py --projects 50 --days 1095 --output table_memory_results.json
+
+"plain" is each table as pd.read_sql_query returns it (log tables through
+their named views, so with names rather than lookup keys); "typed" is the same
+frame after typed_tables.compact_frame (categorical names, downcast integers,
+parsed dates), as streamlit_dashboard_sqlite.load_tables returns it. Sizes are
+deep memory usage, reported per table and per million log rows. Uses --db if
+given, otherwise generates a synthetic database in a temporary directory.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_synthetic_data import generate_database  # noqa: E402
+from lookups import named  # noqa: E402
+from typed_tables import compact_frame, memory_bytes  # noqa: E402
+
+TABLES = ["Projects", "DailyReports", "ManpowerLog", "EquipmentLog", "MaterialDeliveries", "WorkActivities"]
+LOG_TABLES = TABLES[2:]
+
+
+def measure(db_path: str) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    conn = sqlite3.connect(db_path)
+    try:
+        for table in TABLES:
+            t0 = time.perf_counter()
+            plain = pd.read_sql_query(f"SELECT * FROM {named(table)};", conn)
+            t1 = time.perf_counter()
+            typed = compact_frame(plain)
+            t2 = time.perf_counter()
+            results[table] = {
+                "rows": len(plain),
+                "plain_bytes": memory_bytes(plain),
+                "typed_bytes": memory_bytes(typed),
+                "read_seconds": t1 - t0,
+                "compact_seconds": t2 - t1,
+                "plain_dtypes": {k: str(v) for k, v in plain.dtypes.items()},
+                "typed_dtypes": {k: str(v) for k, v in typed.dtypes.items()},
+            }
+    finally:
+        conn.close()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare memory of plain vs compact report tables.")
+    parser.add_argument("--db", help="existing database to measure (default: generate one)")
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--days", type=int, default=3 * 365)
+    parser.add_argument("--output", default="table_memory_results.json")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        if not db_path:
+            db_path = os.path.join(tmp, "synthetic.db")
+            print(f"Generating {args.projects} projects x {args.days} days ...")
+            generate_database(db_path, args.projects, args.days)
+        results = measure(db_path)
+
+    log_rows = sum(results[t]["rows"] for t in LOG_TABLES)
+    print(f"{'table':20s} {'rows':>10s} {'plain MB':>10s} {'typed MB':>10s} {'ratio':>6s} {'compact s':>9s}")
+    for table, r in results.items():
+        ratio = r["plain_bytes"] / r["typed_bytes"] if r["typed_bytes"] else 0.0
+        print(
+            f"{table:20s} {r['rows']:>10,} {r['plain_bytes'] / 2**20:>10.1f} {r['typed_bytes'] / 2**20:>10.1f} "
+            f"{ratio:>5.1f}x {r['compact_seconds']:>9.2f}"
+        )
+    plain_logs = sum(results[t]["plain_bytes"] for t in LOG_TABLES)
+    typed_logs = sum(results[t]["typed_bytes"] for t in LOG_TABLES)
+    per_million: Dict[str, float] = {}
+    if log_rows:
+        per_million = {
+            "plain_mb": plain_logs / log_rows * 1e6 / 2**20,
+            "typed_mb": typed_logs / log_rows * 1e6 / 2**20,
+        }
+        print(
+            f"Per million log rows: plain {per_million['plain_mb']:.1f} MB, typed {per_million['typed_mb']:.1f} MB "
+            f"({plain_logs / typed_logs:.1f}x smaller)"
+        )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(
+            {"pandas": pd.__version__, "log_rows": log_rows, "per_million_log_rows": per_million, "tables": results},
+            f,
+            indent=2,
+        )
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Compare the SQLite and DuckDB analytics backends on the same queries.
+
+    python benchmarks/compare_analytics_backends.py --db synthetic.db --repeat 5
+
+Both backends implement analytics_backend.AnalyticsBackend; each query is run
+`repeat` times per backend and the median wall time is reported. Results
+are written to --output as JSON.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics_backend import BACKENDS, get_backend  # noqa: E402
+
+QUERIES = {
+    "portfolio_totals.all": lambda b: b.portfolio_totals(),
+    "portfolio_totals.one_year": lambda b: b.portfolio_totals("2024-01-01", "2024-12-31"),
+    "manpower_by_trade.all": lambda b: b.manpower_by_trade(),
+    "equipment_by_project.all": lambda b: b.equipment_by_project(),
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare SQLite and DuckDB analytics backends.")
+    parser.add_argument("--db", default="synthetic.db")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="comma-separated backend names")
+    parser.add_argument("--output", default="analytics_results.json")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in args.backends.split(","):
+        try:
+            backend = get_backend(name, args.db)
+        except Exception as e:
+            print(f"{name}: unavailable ({e})")
+            continue
+        results[name] = {}
+        try:
+            for label, run in QUERIES.items():
+                samples = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    rows = len(run(backend))
+                    samples.append(time.perf_counter() - t0)
+                results[name][label] = {"median": statistics.median(samples), "min": min(samples), "rows": rows}
+                print(f"{name:7s} {label:28s} median {statistics.median(samples) * 1000:9.2f} ms ({rows} rows)")
+        finally:
+            backend.close()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"db": os.path.abspath(args.db), "repeat": args.repeat, "results": results}, f, indent=2)
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
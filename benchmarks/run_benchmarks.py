@@ -0,0 +1,189 @@
+"""Benchmark the dashboard and entry code paths at several database sizes.
+
+    python benchmarks/run_benchmarks.py --sizes 5x30,20x365,50x1095 --output bench_results.json
+
+Each size is PROJECTSxDAYS; a synthetic database is generated for it (see
+generate_synthetic_data.py). Results are written as JSON so runs from
+different commits can be compared.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# Streamlit functions run in "bare mode" here; drop the missing-runtime warnings.
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(lambda record: False)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import parquet_snapshot  # noqa: E402
+import streamlit_dashboard_sqlite as dashboard  # noqa: E402
+import streamlit_entry as entry  # noqa: E402
+from db_pool import close_all, get_manager  # noqa: E402
+from generate_synthetic_data import generate_database  # noqa: E402
+
+MANPOWER = pd.DataFrame([{"trade": f"Trade {i}", "number_of_workers": 4, "hours_worked": 8.0} for i in range(6)])
+EQUIPMENT = pd.DataFrame([{"equipment_name": f"Equipment {i}", "quantity": 1, "hours_used": 6.5} for i in range(4)])
+ACTIVITIES = pd.DataFrame([{"activity_description": f"Activity {i}", "status": "In Progress", "percent_complete": 50, "notes": ""} for i in range(4)])
+MATERIALS = pd.DataFrame([{"material_name": "Concrete Mix", "quantity": 12.0, "unit": "m3", "supplier": "City", "ticket_number": f"T-{i}"} for i in range(2)])
+
+
+def parse_sizes(text: str) -> List[Tuple[int, int]]:
+    """Parse "5x30,20x365" into [(5, 30), (20, 365)]."""
+    sizes = []
+    for part in text.split(","):
+        projects, days = part.lower().split("x")
+        sizes.append((int(projects), int(days)))
+    return sizes
+
+
+def time_call(fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """Run fn `repeat` times (calling setup before each) and return timing statistics in seconds."""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "max": max(samples),
+        "repeat": repeat,
+    }
+
+
+def bench_size(db_path: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Run every benchmark against one database and return results keyed by benchmark name."""
+    cache = dashboard.get_query_cache()
+    with get_manager(db_path).reader() as conn:
+        report_id = conn.execute("SELECT MAX(report_id) FROM DailyReports;").fetchone()[0]
+
+    results = {}
+
+    def load_tables() -> None:
+        conn = dashboard.get_connection(db_path)
+        try:
+            dashboard.load_tables(conn)
+        finally:
+            conn.close()
+
+    results["load_tables"] = time_call(load_tables, repeat)
+    parquet_snapshot.build_snapshot(db_path)
+    results["load_tables.snapshot"] = time_call(lambda: parquet_snapshot.load_tables(db_path), repeat)
+    results["select_report_ui.cold"] = time_call(lambda: dashboard.select_report_ui(db_path), repeat, setup=cache.clear)
+    results["select_report_ui.warm"] = time_call(lambda: dashboard.select_report_ui(db_path), repeat)
+    results["show_report_details.cold"] = time_call(lambda: dashboard.show_report_details(db_path, report_id), repeat, setup=cache.clear)
+    results["show_report_details.warm"] = time_call(lambda: dashboard.show_report_details(db_path, report_id), repeat)
+
+    day = iter(range(10**6))
+
+    def save() -> None:
+        ok, msg = entry.save_report(
+            "Benchmark Project", date.fromordinal(700000 + next(day)), "bench", "Sunny", "Dry", "",
+            MANPOWER, EQUIPMENT, ACTIVITIES, MATERIALS, db_path=db_path,
+        )
+        if not ok:
+            raise RuntimeError(msg)
+
+    results["save_report"] = time_call(save, repeat)
+
+    payload = {
+        "project_name": "Benchmark Project",
+        "prepared_by": "bench",
+        "weather": "Sunny",
+        **{key: df.to_dict(orient="records") for key, df in zip(entry.PAYLOAD_LOG_KEYS, (MANPOWER, EQUIPMENT, ACTIVITIES, MATERIALS))},
+    }
+
+    def save_batch() -> None:
+        payloads = [dict(payload, report_date=date.fromordinal(700000 + next(day)).isoformat()) for _ in range(200)]
+        failed = [r.message for r in entry.save_reports(payloads, db_path=db_path) if not r.ok]
+        if failed:
+            raise RuntimeError(failed[0])
+
+    results["save_reports.200_reports"] = time_call(save_batch, repeat)
+
+    records = {
+        "manpower": MANPOWER.to_dict(orient="records") * 50,
+        "equipment": EQUIPMENT.to_dict(orient="records") * 50,
+        "activities": ACTIVITIES.to_dict(orient="records") * 50,
+        "materials": MATERIALS.to_dict(orient="records") * 50,
+    }
+
+    def bulk() -> None:
+        conn = entry.get_connection(db_path)
+        try:
+            conn.execute("BEGIN;")
+            entry.bulk_insert(conn, report_id, records["manpower"], records["equipment"], records["activities"], records["materials"])
+        finally:
+            conn.rollback()
+            conn.close()
+
+    results["bulk_insert.800_rows"] = time_call(bulk, repeat)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark dashboard and entry code paths.")
+    parser.add_argument("--sizes", default="5x30,20x365", help="comma-separated PROJECTSxDAYS sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--workdir", help="keep generated databases here (default: temporary directory)")
+    args = parser.parse_args(argv)
+
+    tmp = None
+    workdir = args.workdir
+    if not workdir:
+        tmp = tempfile.TemporaryDirectory()
+        workdir = tmp.name
+    os.makedirs(workdir, exist_ok=True)
+
+    report: Dict[str, Any] = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "sizes": [],
+    }
+    for projects, days in parse_sizes(args.sizes):
+        db_path = os.path.join(workdir, f"bench_{projects}x{days}.db")
+        close_all()
+        counts = generate_database(db_path, projects, days)
+        results = bench_size(db_path, args.repeat)
+        report["sizes"].append({"projects": projects, "days": days, "rows": counts, "results": results})
+        print(f"{projects} projects x {days} days ({counts['DailyReports']:,} reports)")
+        for name, stats in results.items():
+            print(f"  {name:28s} median {stats['median'] * 1000:9.2f} ms")
+
+    close_all()
+    if tmp is not None:
+        tmp.cleanup()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Stress test: many threads calling streamlit_entry.save_report at once.
+
+    python benchmarks/stress_concurrent_saves.py --threads 32 --saves 20
+
+Uses a temporary database unless --db is given. Exits with status 1 if any
+save fails (e.g. "database is locked") or rows are missing afterwards.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_pool import close_all, get_manager  # noqa: E402
+from migrations import migrate  # noqa: E402
+from streamlit_entry import save_report  # noqa: E402
+
+
+def save_many(db_path: str, worker: int, saves: int) -> list:
+    """Save `saves` reports for one worker's project; return the failure messages."""
+    failures = []
+    manpower = pd.DataFrame([{"trade": "General Labor", "number_of_workers": 5, "hours_worked": 8.0}])
+    equipment = pd.DataFrame([{"equipment_name": "Excavator", "quantity": 1, "hours_used": 6.0}])
+    activities = pd.DataFrame([{"activity_description": "Excavate", "status": "In Progress", "percent_complete": 50, "notes": ""}])
+    materials = pd.DataFrame([{"material_name": "Concrete", "quantity": 3.0, "unit": "m3", "supplier": "City", "ticket_number": "T-1"}])
+    for i in range(saves):
+        ok, msg = save_report(
+            project_name=f"Stress Project {worker}",
+            report_date=date(2025, 1, 1) + timedelta(days=i),
+            prepared_by=f"worker-{worker}",
+            weather="Sunny",
+            site_conditions="Dry",
+            general_notes="",
+            manpower_df=manpower,
+            equipment_df=equipment,
+            activities_df=activities,
+            materials_df=materials,
+            db_path=db_path,
+        )
+        if not ok:
+            failures.append(msg)
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--saves", type=int, default=20, help="reports saved per thread")
+    parser.add_argument("--db", help="database path (default: a temporary file)")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    db_path = args.db
+    if not db_path:
+        tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(tmp_dir.name, "stress.db")
+
+    count_sql = "SELECT COUNT(*) FROM DailyReports WHERE prepared_by LIKE 'worker-%';"
+    get_manager(db_path).run_once(migrate)
+    with get_manager(db_path).reader() as conn:
+        before = conn.execute(count_sql).fetchone()[0]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(lambda w: save_many(db_path, w, args.saves), range(args.threads)))
+    elapsed = time.perf_counter() - start
+
+    failures = [msg for worker_failures in results for msg in worker_failures]
+    expected = args.threads * args.saves - len(failures)
+    with get_manager(db_path).reader() as conn:
+        stored = conn.execute(count_sql).fetchone()[0] - before
+    close_all()
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+    total = args.threads * args.saves
+    print(f"{total} saves from {args.threads} threads in {elapsed:.2f}s ({total / elapsed:.0f} saves/s)")
+    print(f"failures: {len(failures)}, reports stored: {stored}/{expected}")
+    for msg in sorted(set(failures))[:5]:
+        print(f"  {msg}")
+    return 1 if failures or stored != expected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
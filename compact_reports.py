@@ -0,0 +1,119 @@
+"""Merge duplicate daily reports and enforce one report per project and day.
+
+    python compact_reports.py [--db construction_management.db] [--dry-run]
+
+Before saves became upserts, every "Save Daily Report" click inserted a new
+report with a full copy of its logs. For each (project_id, report_date) with
+several reports this keeps the newest one (the last save) with its logs, fills
+header fields it left empty from the older copies, repoints ImportedSessions
+and ReplicatedDocuments at it (it stays in ReplicatedReports only if every copy
+was) and deletes the rest. The rollups are refreshed
+for the merged days, the search index follows through its triggers, and the
+unique report index is created once no duplicates remain. Reruns are no-ops.
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from db_pool import get_manager
+from db_schema import create_indexes
+from migrations import migrate
+from report_queries import CHILD_TABLES
+from rollups import refresh_rollups
+from streamlit_entry import DB_FILE
+
+HEADER_FIELDS = ("weather", "site_conditions", "general_notes", "prepared_by")
+# Tables outside the report schema that point at a report_id.
+REFERENCING_TABLES = ("ImportedSessions", "ReplicatedDocuments")
+
+
+def find_duplicates(conn: sqlite3.Connection) -> List[Tuple[int, str, List[int]]]:
+    """Return (project_id, report_date, report_ids newest first) for every day with more than one report."""
+    rows = conn.execute(
+        """
+        SELECT project_id, report_date, group_concat(report_id) FROM DailyReports
+        GROUP BY project_id, report_date HAVING COUNT(*) > 1;
+        """
+    ).fetchall()
+    return [(project_id, report_date, sorted(map(int, ids.split(",")), reverse=True)) for project_id, report_date, ids in rows]
+
+
+def merge_reports(conn: sqlite3.Connection, report_ids: List[int]) -> int:
+    """Fold report_ids (newest first) into the first one inside the caller's transaction; return rows deleted."""
+    keep, older = report_ids[0], report_ids[1:]
+    marks = ", ".join("?" * len(older))
+    header = conn.execute(f"SELECT {', '.join(HEADER_FIELDS)} FROM DailyReports WHERE report_id = ?;", (keep,)).fetchone()
+    if not all(header):
+        # Empty header fields take the newest non-empty value of an older copy.
+        merged = list(header)
+        for values in conn.execute(
+            f"SELECT {', '.join(HEADER_FIELDS)} FROM DailyReports WHERE report_id IN ({marks}) ORDER BY report_id DESC;",
+            older,
+        ):
+            merged = [current or value for current, value in zip(merged, values)]
+        if merged != list(header):
+            conn.execute(
+                f"UPDATE DailyReports SET {', '.join(f'{f} = ?' for f in HEADER_FIELDS)} WHERE report_id = ?;",
+                (*merged, keep),
+            )
+
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table';")}
+    for table in REFERENCING_TABLES:
+        if table in existing:
+            conn.execute(f"UPDATE {table} SET report_id = ? WHERE report_id IN ({marks});", (keep, *older))
+    # The merged report stays replication-owned only if every copy was.
+    owned = conn.execute(f"DELETE FROM ReplicatedReports WHERE report_id IN ({marks});", older).rowcount
+    if owned < len(older):
+        conn.execute("DELETE FROM ReplicatedReports WHERE report_id = ?;", (keep,))
+
+    deleted = 0
+    for table in CHILD_TABLES:
+        deleted += conn.execute(f"DELETE FROM {table} WHERE report_id IN ({marks});", older).rowcount
+    deleted += conn.execute(f"DELETE FROM DailyReports WHERE report_id IN ({marks});", older).rowcount
+    return deleted
+
+
+def compact_reports(db_path: str = DB_FILE, dry_run: bool = False) -> Dict[str, Any]:
+    """Merge duplicate reports in db_path and create the unique index; return summary counters."""
+    manager = get_manager(db_path)
+    manager.run_once(migrate)
+    start = time.perf_counter()
+    with manager.writer() as conn:
+        duplicates = find_duplicates(conn)
+        stats: Dict[str, Any] = {
+            "days": len(duplicates),
+            "reports_removed": sum(len(ids) - 1 for _, _, ids in duplicates),
+            "rows_deleted": 0,
+        }
+        if not dry_run:
+            for _, _, report_ids in duplicates:
+                stats["rows_deleted"] += merge_reports(conn, report_ids)
+            refresh_rollups(conn, [(project_id, report_date) for project_id, report_date, _ in duplicates])
+    if not dry_run:
+        with manager.writer() as conn:
+            stats["unique_index"] = create_indexes(conn)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Merge duplicate reports for the same project and date.")
+    parser.add_argument("--db", default=DB_FILE, help="SQLite database path")
+    parser.add_argument("--dry-run", action="store_true", help="only count the duplicates")
+    args = parser.parse_args(argv)
+
+    stats = compact_reports(args.db, args.dry_run)
+    verb = "Would merge" if args.dry_run else "Merged"
+    print(
+        f"{verb} {stats['reports_removed']} duplicate reports on {stats['days']} project days "
+        f"({stats['rows_deleted']} rows deleted) in {stats['seconds']:.2f}s."
+    )
+    if not args.dry_run:
+        print("Unique (project_id, report_date) index: " + ("in place." if stats["unique_index"] else "NOT created."))
+    return 0 if args.dry_run or stats["unique_index"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
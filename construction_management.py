@@ -2,6 +2,10 @@ import os
 import sqlite3
 from datetime import date
 
+from lookups import NameResolver
+from migrations import MIGRATIONS, migrate
+from rollups import rebuild_rollups
+
 DB_FILE = "construction_management.db"
 
 
@@ -20,96 +24,12 @@ def create_database():
     print(f"Successfully connected to and created database: {DB_FILE}")
 
     # --- SCHEMA DEFINITION ---
-    # The schema is designed to be normalized to reduce data redundancy.
-    # We use Foreign Keys to link tables together.
-
-    # Table: Projects
-    # Stores high-level information about each construction project.
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS Projects (
-        project_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        project_name TEXT NOT NULL UNIQUE,
-        location TEXT,
-        start_date DATE,
-        end_date DATE
-    );
-    ''')
-    print("Created 'Projects' table.")
-
-    # Table: DailyReports
-    # This is the central table, capturing one report per day per project.
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS DailyReports (
-        report_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        project_id INTEGER NOT NULL,
-        report_date DATE NOT NULL,
-        weather TEXT,
-        site_conditions TEXT,
-        general_notes TEXT,
-        prepared_by TEXT,
-        FOREIGN KEY (project_id) REFERENCES Projects (project_id)
-    );
-    ''')
-    print("Created 'DailyReports' table.")
-
-    # Table: ManpowerLog
-    # Logs the different types of labor and their hours for a specific daily report.
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS ManpowerLog (
-        log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        report_id INTEGER NOT NULL,
-        trade TEXT NOT NULL,
-        number_of_workers INTEGER NOT NULL,
-        hours_worked REAL NOT NULL,
-        FOREIGN KEY (report_id) REFERENCES DailyReports (report_id)
-    );
-    ''')
-    print("Created 'ManpowerLog' table.")
-
-    # Table: EquipmentLog
-    # Logs the equipment used on site for a specific daily report.
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS EquipmentLog (
-        log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        report_id INTEGER NOT NULL,
-        equipment_name TEXT NOT NULL,
-        quantity INTEGER NOT NULL,
-        hours_used REAL NOT NULL,
-        FOREIGN KEY (report_id) REFERENCES DailyReports (report_id)
-    );
-    ''')
-    print("Created 'EquipmentLog' table.")
-
-    # Table: MaterialDeliveries
-    # Logs materials delivered to the site.
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS MaterialDeliveries (
-        delivery_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        report_id INTEGER NOT NULL,
-        material_name TEXT NOT NULL,
-        quantity REAL NOT NULL,
-        unit TEXT NOT NULL,
-        supplier TEXT,
-        ticket_number TEXT,
-        FOREIGN KEY (report_id) REFERENCES DailyReports (report_id)
-    );
-    ''')
-    print("Created 'MaterialDeliveries' table.")
-
-    # Table: WorkActivities
-    # Details the specific work activities performed during the day.
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS WorkActivities (
-        activity_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        report_id INTEGER NOT NULL,
-        activity_description TEXT NOT NULL,
-        status TEXT CHECK(status IN ('Not Started', 'In Progress', 'Completed', 'Delayed')),
-        percent_complete INTEGER,
-        notes TEXT,
-        FOREIGN KEY (report_id) REFERENCES DailyReports (report_id)
-    );
-    ''')
-    print("Created 'WorkActivities' table.")
+    # The schema lives in migrations.py, which also upgrades existing files.
+    # It is normalized to reduce data redundancy: reports reference projects,
+    # the logs reference reports and the trade/equipment/material/unit/supplier
+    # lookup tables, and indexes, rollup tables and the search index are added.
+    for version in migrate(conn):
+        print(f"Applied migration {version}: {MIGRATIONS[version - 1].description}.")
 
     # --- SAMPLE DATA INSERTION ---
     try:
@@ -134,36 +54,39 @@ def create_database():
         report_id = cursor.lastrowid
         print(f"Inserted sample daily report for today with ID: {report_id}")
 
+        # Names are stored once in the lookup tables and referenced by key
+        names = NameResolver(conn)
+
         # 3. Add Manpower Logs for this report
         manpower_data = [
-            (report_id, 'General Labor', 15, 8.0),
-            (report_id, 'Electricians', 4, 8.0),
-            (report_id, 'Crane Operator', 1, 6.5)
+            (report_id, names.id('trade', 'General Labor'), 15, 8.0),
+            (report_id, names.id('trade', 'Electricians'), 4, 8.0),
+            (report_id, names.id('trade', 'Crane Operator'), 1, 6.5)
         ]
         cursor.executemany(
-            "INSERT INTO ManpowerLog (report_id, trade, number_of_workers, hours_worked) VALUES (?, ?, ?, ?)",
+            "INSERT INTO ManpowerLog (report_id, trade_id, number_of_workers, hours_worked) VALUES (?, ?, ?, ?)",
             manpower_data)
         print(f"Inserted {len(manpower_data)} manpower logs.")
 
         # 4. Add Equipment Logs
         equipment_data = [
-            (report_id, '50-Ton Crane', 1, 6.5),
-            (report_id, 'Excavator', 1, 8.0),
-            (report_id, 'Pickup Truck', 3, 8.0)
+            (report_id, names.id('equipment_name', '50-Ton Crane'), 1, 6.5),
+            (report_id, names.id('equipment_name', 'Excavator'), 1, 8.0),
+            (report_id, names.id('equipment_name', 'Pickup Truck'), 3, 8.0)
         ]
         cursor.executemany(
-            "INSERT INTO EquipmentLog (report_id, equipment_name, quantity, hours_used) VALUES (?, ?, ?, ?)",
+            "INSERT INTO EquipmentLog (report_id, equipment_id, quantity, hours_used) VALUES (?, ?, ?, ?)",
             equipment_data)
         print(f"Inserted {len(equipment_data)} equipment logs.")
 
         # 5. Add a Material Delivery
         cursor.execute(
-            "INSERT INTO MaterialDeliveries (report_id, material_name, quantity, unit, supplier, ticket_number) VALUES (?, ?, ?, ?, ?, ?)",
+            "INSERT INTO MaterialDeliveries (report_id, material_id, quantity, unit_id, supplier_id, ticket_number) VALUES (?, ?, ?, ?, ?, ?)",
             (report_id,
-             'Concrete Mix',
+             names.id('material_name', 'Concrete Mix'),
              12,
-             'cubic meters',
-             'City Concrete Inc.',
+             names.id('unit', 'cubic meters'),
+             names.id('supplier', 'City Concrete Inc.'),
              'TICKET-00123'))
         print("Inserted 1 material delivery log.")
 
@@ -189,6 +112,10 @@ def create_database():
             activity_data)
         print(f"Inserted {len(activity_data)} work activity logs.")
 
+        # 7. Aggregate the sample logs into the rollup tables
+        rebuild_rollups(conn)
+        print("Refreshed rollup tables.")
+
         # Commit the changes to the database
         conn.commit()
         print("\nSuccessfully inserted all sample data and committed changes.")
@@ -1,12 +1,16 @@
 import os
-from datetime import datetime
+from datetime import date, timedelta
 
-import duckdb
 import firebase_admin
 import pandas as pd
 import streamlit as st
 from firebase_admin import credentials, firestore
 
+from firestore_mirror import collection_path
+from firestore_queries import get_report, query_reports
+from firestore_replication import ReplicationWorker
+from perf_metrics import measure, render_panel, timed
+
 # --- Configuration ---
 # This is the path to your service account key file.
 # Ensure this file is in the same directory as your script.
@@ -47,26 +51,61 @@ def initialize_firebase():
         st.stop()
 
 # --- Data Fetching ---
-# This function fetches all daily reports for a specific user.
-# It uses st.cache_data to cache the results and avoid refetching on every interaction.
+# Filtering, ordering and paging run in Firestore (see firestore_queries.py).
+# The date picker only loads a page of report dates and project names; a
+# report's full document is fetched when it is selected.
+
+PAGE_SIZE = 50
+LIST_FIELDS = ("reportDate", "projectName")
 
 
-@st.cache_data(ttl=300)  # Cache data for 5 minutes
-def fetch_all_reports(_db, app_id, user_id):
+@st.cache_data(ttl=60)
+@timed("firestore.fetch_all_reports", rows=lambda result: len(result[0]))
+def fetch_all_reports(_db, app_id, user_id, start_date=None, end_date=None, limit=None, start_after=None, fields=None):
     """
-    Fetches all daily reports from Firestore for a given app_id and user_id.
-    Returns a list of report documents.
+    Fetches daily reports dated start_date..end_date for a given app_id and user_id,
+    newest first, `limit` at a time starting after the `start_after` cursor.
+    Returns (reports, next_cursor); next_cursor is None on the last page.
     """
     if not app_id or not user_id:
-        return []
+        return [], None
     try:
-        collection_path = f"artifacts/{app_id}/users/{user_id}/daily_reports"
-        docs = _db.collection(collection_path).stream()
-        reports = [doc.to_dict() for doc in docs]
-        return reports
+        page = query_reports(
+            _db,
+            collection_path(app_id, user_id),
+            start_date=start_date.isoformat() if start_date else None,
+            end_date=end_date.isoformat() if end_date else None,
+            limit=limit,
+            start_after=start_after,
+            fields=fields)
+        return page.reports, page.next_cursor
     except Exception as e:
         st.error(f"Error fetching data from Firestore: {e}")
-        return []
+        return [], None
+
+
+@st.cache_data(ttl=300)
+@timed("firestore.fetch_report", rows=None)
+def fetch_report(_db, app_id, user_id, doc_id):
+    """
+    Fetches one full report document by ID.
+    """
+    try:
+        return get_report(_db, collection_path(app_id, user_id), doc_id)
+    except Exception as e:
+        st.error(f"Error fetching report from Firestore: {e}")
+        return None
+
+
+@st.cache_resource
+def start_replication(_db, app_id, user_id):
+    """
+    Starts one background worker per collection that keeps the normalized
+    SQLite database (used by streamlit_dashboard_sqlite.py) in step with Firestore.
+    """
+    worker = ReplicationWorker(_db, collection_path(app_id, user_id))
+    worker.start()
+    return worker
 
 # --- Main Application ---
 
@@ -97,109 +136,135 @@ def main():
             st.warning("Please enter your User ID to load data.")
             st.stop()
 
-        st.info(
-            "🔄 Data automatically refreshes every 5 minutes. You can force a refresh by clearing the cache.")
-        if st.button("Clear Cache & Refresh Data"):
+        st.info("🔄 Report lists refresh every minute. Use Refresh to reload now.")
+        if st.button("Refresh"):
             st.cache_data.clear()
-            st.rerun()
+        if st.checkbox("Replicate into the SQLite dashboard database"):
+            worker = start_replication(db, app_id, user_id)
+            if worker.last_error:
+                st.warning(f"Replication failed: {worker.last_error}")
+            elif worker.last_stats:
+                st.caption(
+                    f"Replicated {worker.last_stats['documents']} reports "
+                    f"({worker.last_stats['inserted']} new, {worker.last_stats['updated']} updated).")
 
-    # --- Fetch and Process Data ---
-    all_reports_data = fetch_all_reports(db, app_id, user_id)
+    # --- Sidebar Filtering ---
+    with st.sidebar:
+        st.header("📊 Filters")
+        date_range = st.date_input(
+            "Report dates", value=(date.today() - timedelta(days=90), date.today()))
+        start_date, end_date = (tuple(date_range) + (None, None))[:2]
+    render_panel()
+
+    # Page cursors for the current filter; reset when the filter changes.
+    filter_key = (app_id, user_id, start_date, end_date)
+    if st.session_state.get("page_filter") != filter_key:
+        st.session_state.page_filter = filter_key
+        st.session_state.page_cursors = [None]
+    cursors = st.session_state.page_cursors
+
+    # --- Fetch a Page of Report Dates ---
+    reports_page, next_cursor = fetch_all_reports(
+        db, app_id, user_id, start_date, end_date,
+        limit=PAGE_SIZE, start_after=cursors[-1], fields=LIST_FIELDS)
 
-    if not all_reports_data:
+    with st.sidebar:
+        col_newer, col_older = st.columns(2)
+        if col_newer.button("◀ Newer", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+        if col_older.button("Older ▶", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+
+    if not reports_page:
         st.warning(
-            "No reports found for the provided User ID. Please check the ID or submit a report via the web app.")
+            "No reports found for the provided User ID and dates. Please check the ID, widen the date range "
+            "or submit a report via the web app.")
         st.stop()
 
-    # Convert fetched data to a Pandas DataFrame
-    # We use json_normalize to flatten the nested lists of dicts (manpower,
-    # equipment, etc.)
-    reports_df = pd.json_normalize(all_reports_data)
-
-    # Convert reportDate to datetime objects for sorting
-    reports_df['reportDate'] = pd.to_datetime(reports_df['reportDate'])
-    reports_df = reports_df.sort_values(by='reportDate', ascending=False)
-
-    # --- Sidebar Filtering ---
     with st.sidebar:
-        st.header("📊 Filters")
         # Allow user to select a specific report by date
-        report_dates = reports_df['reportDate'].dt.strftime('%Y-%m-%d').unique()
-        selected_date_str = st.selectbox("Select a Report Date", options=report_dates)
+        labels = {r["_id"]: f"{r.get('reportDate', '')} · {r.get('projectName', 'N/A')}" for r in reports_page}
+        selected_id = st.selectbox(
+            "Select a Report", options=list(labels), format_func=labels.get)
 
-    if not selected_date_str:
-        st.info("Select a report date from the sidebar to view details.")
+    if not selected_id:
+        st.info("Select a report from the sidebar to view details.")
         st.stop()
 
-    # Filter the DataFrame to the selected report
-    selected_date = datetime.strptime(selected_date_str, '%Y-%m-%d').date()
-    selected_report_series = reports_df[reports_df['reportDate'].dt.date ==
-                                        selected_date].iloc[0]
+    # Fetch only the selected report's full document
+    selected_report = fetch_report(db, app_id, user_id, selected_id)
+    if selected_report is None:
+        st.warning("This report no longer exists. Use Refresh to reload the list.")
+        st.stop()
+    selected_report_series = pd.Series(selected_report)
+    selected_date_str = str(selected_report.get('reportDate', ''))[:10]
 
     # --- Display Selected Report Details ---
-    st.header(f"Displaying Report for: {selected_date_str}")
-    st.markdown(f"**Project:** {selected_report_series.get('projectName', 'N/A')}")
-
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Prepared By", selected_report_series.get('preparedBy', 'N/A'))
-    col2.metric("Weather", selected_report_series.get('weather', 'N/A'))
-    col3.metric("Site Conditions", selected_report_series.get('siteConditions', 'N/A'))
-
-    # --- Use DuckDB for analysis ---
-    # Create a DuckDB connection from the main DataFrame
-    con = duckdb.connect(database=':memory:', read_only=False)
-    con.register('reports_df', reports_df)
-
-    # --- Display Detailed Tables ---
-    tab_activities, tab_manpower, tab_equipment, tab_materials, tab_notes = st.tabs([
-        "Work Activities", "Manpower", "Equipment", "Materials", "Notes"
-    ])
-
-    with tab_activities:
-        activities = selected_report_series.get('activities', [])
-        if activities and isinstance(activities, list):
-            st.dataframe(pd.DataFrame(activities), use_container_width=True)
-        else:
-            st.info("No work activities logged for this report.")
-
-    with tab_manpower:
-        manpower = selected_report_series.get('manpower', [])
-        if manpower and isinstance(manpower, list):
-            manpower_df = pd.DataFrame(manpower)
-            # Ensure columns are numeric for calculations
-            manpower_df['count'] = pd.to_numeric(manpower_df['count'])
-            manpower_df['hours'] = pd.to_numeric(manpower_df['hours'])
-
-            st.dataframe(manpower_df, use_container_width=True)
-
-            st.subheader("Manpower Hours by Trade")
-            # Create a simple bar chart
-            chart_data = manpower_df.set_index('trade')['hours']
-            st.bar_chart(chart_data)
-        else:
-            st.info("No manpower logged for this report.")
-
-    with tab_equipment:
-        equipment = selected_report_series.get('equipment', [])
-        if equipment and isinstance(equipment, list):
-            st.dataframe(pd.DataFrame(equipment), use_container_width=True)
-        else:
-            st.info("No equipment logged for this report.")
-
-    with tab_materials:
-        materials = selected_report_series.get('materials', [])
-        if materials and isinstance(materials, list):
-            st.dataframe(pd.DataFrame(materials), use_container_width=True)
-        else:
-            st.info("No materials delivered for this report.")
-
-    with tab_notes:
-        st.subheader("General Notes")
-        st.markdown(
-            f"> {
-                selected_report_series.get(
-                    'generalNotes',
-                    'No general notes provided.')}")
+    with measure("firestore.render_report") as m:
+        m.rows = sum(
+            len(selected_report.get(key) or [])
+            for key in ("activities", "manpower", "equipment", "materials")
+            if isinstance(selected_report.get(key), list))
+        st.header(f"Displaying Report for: {selected_date_str}")
+        st.markdown(f"**Project:** {selected_report_series.get('projectName', 'N/A')}")
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Prepared By", selected_report_series.get('preparedBy', 'N/A'))
+        col2.metric("Weather", selected_report_series.get('weather', 'N/A'))
+        col3.metric("Site Conditions", selected_report_series.get('siteConditions', 'N/A'))
+
+        # --- Display Detailed Tables ---
+        tab_activities, tab_manpower, tab_equipment, tab_materials, tab_notes = st.tabs([
+            "Work Activities", "Manpower", "Equipment", "Materials", "Notes"
+        ])
+
+        with tab_activities:
+            activities = selected_report_series.get('activities', [])
+            if activities and isinstance(activities, list):
+                st.dataframe(pd.DataFrame(activities), use_container_width=True)
+            else:
+                st.info("No work activities logged for this report.")
+
+        with tab_manpower:
+            manpower = selected_report_series.get('manpower', [])
+            if manpower and isinstance(manpower, list):
+                manpower_df = pd.DataFrame(manpower)
+                # Ensure columns are numeric for calculations
+                manpower_df['count'] = pd.to_numeric(manpower_df['count'])
+                manpower_df['hours'] = pd.to_numeric(manpower_df['hours'])
+
+                st.dataframe(manpower_df, use_container_width=True)
+
+                st.subheader("Manpower Hours by Trade")
+                # Create a simple bar chart
+                chart_data = manpower_df.set_index('trade')['hours']
+                st.bar_chart(chart_data)
+            else:
+                st.info("No manpower logged for this report.")
+
+        with tab_equipment:
+            equipment = selected_report_series.get('equipment', [])
+            if equipment and isinstance(equipment, list):
+                st.dataframe(pd.DataFrame(equipment), use_container_width=True)
+            else:
+                st.info("No equipment logged for this report.")
+
+        with tab_materials:
+            materials = selected_report_series.get('materials', [])
+            if materials and isinstance(materials, list):
+                st.dataframe(pd.DataFrame(materials), use_container_width=True)
+            else:
+                st.info("No materials delivered for this report.")
+
+        with tab_notes:
+            st.subheader("General Notes")
+            st.markdown(
+                f"> {
+                    selected_report_series.get(
+                        'generalNotes',
+                        'No general notes provided.')}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,124 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Set
+
+BUSY_TIMEOUT_MS = 5000
+MAX_READERS = 4
+
+
+def configure_connection(conn: sqlite3.Connection, busy_timeout_ms: int = BUSY_TIMEOUT_MS) -> sqlite3.Connection:
+    """Apply the pragmas every connection should use: WAL, busy timeout and foreign keys."""
+    conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)};")
+    try:
+        conn.execute("PRAGMA journal_mode = WAL;")
+    except sqlite3.OperationalError:
+        # Read-only media cannot switch journal mode; keep the default.
+        pass
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute("PRAGMA foreign_keys = ON;")
+    return conn
+
+
+class ConnectionManager:
+    """Process-wide access to one SQLite file.
+
+    Hands out up to `max_readers` pooled read connections and a single writer
+    connection. Writes are serialized in-process by a lock and run inside
+    BEGIN IMMEDIATE, so concurrent savers queue instead of failing with
+    "database is locked"; other processes are covered by busy_timeout.
+    """
+
+    def __init__(self, db_path: str, max_readers: int = MAX_READERS, busy_timeout_ms: int = BUSY_TIMEOUT_MS) -> None:
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(max_readers)
+        self._writer_lock = threading.RLock()
+        self._writer: sqlite3.Connection = self._connect()
+        self._initialized: Set[Callable[..., Any]] = set()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        return configure_connection(conn, self.busy_timeout_ms)
+
+    def run_once(self, initializer: Callable[..., Any], *args: Any) -> None:
+        """Run a schema initializer on the writer connection the first time it is requested.
+
+        `args` are passed after the connection; they do not make a call distinct.
+        """
+        if initializer in self._initialized:
+            return
+        with self._writer_lock:
+            if initializer in self._initialized:
+                return
+            initializer(self._writer, *args)
+            self._writer.commit()
+            self._initialized.add(initializer)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Yield the writer connection inside a transaction; commit on success, roll back on error."""
+        with self._writer_lock:
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE;")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Yield a pooled read connection; blocks while all `max_readers` are in use."""
+        self._reader_slots.acquire()
+        try:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            finally:
+                # End any read transaction so the WAL can be checkpointed.
+                conn.rollback()
+                self._readers.put(conn)
+        finally:
+            self._reader_slots.release()
+
+    def close(self) -> None:
+        """Close every connection held by the manager."""
+        with self._writer_lock:
+            self._writer.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_managers: Dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(db_path: str) -> ConnectionManager:
+    """Return the process-wide ConnectionManager for db_path, creating it on first use."""
+    key = os.path.abspath(db_path)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = ConnectionManager(key)
+            _managers[key] = manager
+        return manager
+
+
+def close_all() -> None:
+    """Close and forget every manager (used by scripts and after deleting a database file)."""
+    with _managers_lock:
+        for manager in _managers.values():
+            manager.close()
+        _managers.clear()
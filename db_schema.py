@@ -0,0 +1,205 @@
+import sqlite3
+from typing import Any, Callable, List, Optional, Sequence
+
+# Secondary indexes for the report schema. Child tables are always read by
+# report_id, and reports are listed per project ordered by date.
+INDEX_STATEMENTS: List[str] = [
+    "CREATE INDEX IF NOT EXISTS idx_manpowerlog_report ON ManpowerLog (report_id);",
+    "CREATE INDEX IF NOT EXISTS idx_equipmentlog_report ON EquipmentLog (report_id);",
+    "CREATE INDEX IF NOT EXISTS idx_materialdeliveries_report ON MaterialDeliveries (report_id);",
+    "CREATE INDEX IF NOT EXISTS idx_workactivities_report ON WorkActivities (report_id);",
+]
+
+# One report per project and day. It also serves the per-project date listing,
+# so it replaces the plain idx_dailyreports_project_date index once it exists.
+REPORT_KEY_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS ux_dailyreports_project_date ON DailyReports (project_id, report_date);"
+REPORT_KEY_FALLBACK_INDEX = "CREATE INDEX IF NOT EXISTS idx_dailyreports_project_date ON DailyReports (project_id, report_date);"
+
+
+def create_indexes(conn: sqlite3.Connection) -> bool:
+    """Create the secondary indexes if they do not exist.
+
+    Safe to run against existing database files; it upgrades them in place.
+    Returns False when duplicate reports for a project and day prevent the
+    unique report index (merge them with `python compact_reports.py`); the
+    plain index is kept in that case so queries stay indexed. The caller commits.
+    """
+    for statement in INDEX_STATEMENTS:
+        conn.execute(statement)
+    try:
+        conn.execute(REPORT_KEY_INDEX)
+    except sqlite3.IntegrityError:
+        conn.execute(REPORT_KEY_FALLBACK_INDEX)
+        return False
+    conn.execute("DROP INDEX IF EXISTS idx_dailyreports_project_date;")
+    return True
+
+
+def report_key_enforced(conn: sqlite3.Connection) -> bool:
+    """Return True if the database has the unique (project_id, report_date) index."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_dailyreports_project_date';"
+    ).fetchone() is not None
+
+
+# Rows updated or deleted per table since the counters were installed. Caches
+# that replay inserts by primary key (parquet_snapshot.py) compare them to
+# notice every other change. Table rebuilds drop the triggers with the table.
+CHANGE_COUNTS_SQL = """
+    CREATE TABLE IF NOT EXISTS TableChanges (
+        table_name TEXT PRIMARY KEY,
+        changes INTEGER NOT NULL
+    ) WITHOUT ROWID;
+"""
+
+
+def track_changes(conn: sqlite3.Connection, tables: Sequence[str]) -> None:
+    """Install UPDATE/DELETE counters on `tables` (caller commits)."""
+    conn.execute(CHANGE_COUNTS_SQL)
+    for table in tables:
+        conn.execute("INSERT OR IGNORE INTO TableChanges (table_name, changes) VALUES (?, 0);", (table,))
+        for event in ("UPDATE", "DELETE"):
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_count_{event.lower()} AFTER {event} ON {table} "
+                f"BEGIN UPDATE TableChanges SET changes = changes + 1 WHERE table_name = '{table}'; END;"
+            )
+
+
+def change_count(conn: sqlite3.Connection, tables: Sequence[str]) -> int:
+    """Return the rows updated or deleted in `tables` so far."""
+    return conn.execute(
+        "SELECT COALESCE(SUM(changes), 0) FROM TableChanges WHERE table_name IN (%s);" % ",".join("?" * len(tables)),
+        list(tables),
+    ).fetchone()[0]
+
+
+# Online table rebuilds. A migration that changes a large table's layout
+# copies it into "<table>_new" in chunks, each in its own short write
+# transaction, so other connections can keep writing in between. Triggers
+# record the keys of rows changed during the copy in MigrationChanges, and
+# finish_rebuild re-copies those rows and swaps the tables in the caller's
+# transaction. The copy resumes where it stopped if the process exits.
+REBUILD_CHUNK_ROWS = 50_000
+
+CHANGES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS MigrationChanges (
+        source TEXT NOT NULL,
+        row_key INTEGER NOT NULL,
+        PRIMARY KEY (source, row_key)
+    ) WITHOUT ROWID;
+"""
+
+# Called with (conn, where, params) before rows matching `where` (over alias t) are copied.
+ChunkHook = Callable[[sqlite3.Connection, str, Sequence[Any]], None]
+# Called with the fraction of rows copied so far.
+RebuildProgress = Callable[[float], None]
+
+
+class TableRebuild:
+    """Copy `source` into `target` (already created) as `SELECT <select> FROM source t [WHERE filter]`.
+
+    `columns` are the target columns filled by `select`; the first one must
+    be `key`, the integer primary key shared by both tables.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        target: str,
+        key: str,
+        columns: Sequence[str],
+        select: Sequence[str],
+        where: Optional[str] = None,
+        before_chunk: Optional[ChunkHook] = None,
+    ) -> None:
+        self.source = source
+        self.target = target
+        self.key = key
+        self.columns = list(columns)
+        self.select = list(select)
+        self.where = where
+        self.before_chunk = before_chunk
+
+    def _copy(self, conn: sqlite3.Connection, where: str, params: Sequence[Any]) -> int:
+        if self.before_chunk is not None:
+            self.before_chunk(conn, where, params)
+        if self.where:
+            where = f"({where}) AND ({self.where})"
+        return conn.execute(
+            f"INSERT OR REPLACE INTO {self.target} ({', '.join(self.columns)}) "
+            f"SELECT {', '.join(self.select)} FROM {self.source} t WHERE {where};",
+            params,
+        ).rowcount
+
+    def _track_changes(self, conn: sqlite3.Connection) -> None:
+        conn.execute(CHANGES_TABLE_SQL)
+        record = "INSERT OR IGNORE INTO MigrationChanges (source, row_key) VALUES ('{source}', {row}.{key});"
+        for event, rows in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",))):
+            body = " ".join(record.format(source=self.source, row=row, key=self.key) for row in rows)
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{self.source.lower()}_rebuild_{event.lower()} "
+                f"AFTER {event} ON {self.source} BEGIN {body} END;"
+            )
+
+    def copy(self, conn: sqlite3.Connection, progress: Optional[RebuildProgress] = None, chunk_rows: int = REBUILD_CHUNK_ROWS) -> int:
+        """Copy the rows in key order, committing every chunk_rows rows; return the rows copied.
+
+        Run outside a transaction. Rows already in the target are skipped, so
+        an interrupted copy continues from the last committed chunk.
+        """
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            self._track_changes(conn)
+            last = conn.execute(f"SELECT COALESCE(MAX({self.key}), 0) FROM {self.target};").fetchone()[0]
+            # Rows added after this point are recorded by the triggers and copied by `finish`.
+            stop = conn.execute(f"SELECT COALESCE(MAX({self.key}), 0) FROM {self.source};").fetchone()[0]
+            total = conn.execute(f"SELECT COUNT(*) FROM {self.source};").fetchone()[0]
+            done = conn.execute(f"SELECT COUNT(*) FROM {self.source} WHERE {self.key} <= ?;", (last,)).fetchone()[0]
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        copied = 0
+        while True:
+            conn.execute("BEGIN IMMEDIATE;")
+            try:
+                upper, rows = conn.execute(
+                    f"SELECT MAX({self.key}), COUNT(*) FROM "
+                    f"(SELECT {self.key} FROM {self.source} WHERE {self.key} > ? AND {self.key} <= ? ORDER BY {self.key} LIMIT ?);",
+                    (last, stop, chunk_rows),
+                ).fetchone()
+                if upper is None:
+                    conn.rollback()
+                    break
+                copied += self._copy(conn, f"t.{self.key} > ? AND t.{self.key} <= ?", (last, upper))
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            last, done = upper, done + rows
+            if progress is not None:
+                progress(min(done / total, 1.0) if total else 1.0)
+        return copied
+
+    def finish(self, conn: sqlite3.Connection) -> int:
+        """Apply the changes made during the copy and replace `source` with `target`; return rows re-copied.
+
+        Run inside the caller's write transaction, after `copy`. Indexes and
+        triggers of `source` are dropped with it; recreate the ones still needed.
+        """
+        self._track_changes(conn)
+        changed = f"(SELECT row_key FROM MigrationChanges WHERE source = '{self.source}')"
+        conn.execute(f"DELETE FROM {self.target} WHERE {self.key} IN {changed};")
+        # Rows never reached by `copy` (it was not run, or stopped early) are copied here too.
+        last = conn.execute(f"SELECT COALESCE(MAX({self.key}), 0) FROM {self.target};").fetchone()[0]
+        recopied = self._copy(conn, f"t.{self.key} IN {changed} OR t.{self.key} > ?", (last,))
+        conn.execute("DELETE FROM MigrationChanges WHERE source = ?;", (self.source,))
+        conn.execute(f"DROP TABLE {self.source};")
+        conn.execute(f"ALTER TABLE {self.target} RENAME TO {self.source};")
+        # Other rebuilds may still be recording into MigrationChanges.
+        tracking = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg\\_%\\_rebuild\\_%' ESCAPE '\\';"
+        ).fetchone()
+        if tracking is None:
+            conn.execute("DROP TABLE MigrationChanges;")
+        return recopied
@@ -0,0 +1,159 @@
+"""Debounced autosave drafts for the entry form.
+
+A draft is an append-only JSON Lines log (json_data/drafts/<id>.jsonl). Each
+line holds only the form sections that changed since the previous line:
+
+    {"t": 1760000000.0, "s": {"manpower": [...]}}
+
+`DraftWriter.update` is called on every rerun with the current sections. It
+compares each section's compact JSON with what was last written and buffers
+the changed ones; a timer thread appends them as one line once edits have
+paused for `debounce` seconds, so a burst of data_editor edits costs a
+single small append. Restoring folds the lines, later sections winning, and
+the log is rewritten as one line once it grows past COMPACT_AFTER lines.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+DRAFTS_DIR = os.path.join("json_data", "drafts")
+DEBOUNCE_SECONDS = 1.5
+COMPACT_AFTER = 200
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def draft_path(draft_id: str, drafts_dir: str = DRAFTS_DIR) -> str:
+    return os.path.join(drafts_dir, f"{draft_id}.jsonl")
+
+
+def new_draft_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def _read_log(path: str) -> Tuple[Dict[str, str], int]:
+    """Return (section -> latest JSON text, line count) for a draft log; skips a torn last line."""
+    sections: Dict[str, str] = {}
+    lines = 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                lines += 1
+                for name, value in record.get("s", {}).items():
+                    sections[name] = _encode(value)
+    except OSError:
+        pass
+    return sections, lines
+
+
+def load_draft(draft_id: str, drafts_dir: str = DRAFTS_DIR) -> Optional[Dict[str, Any]]:
+    """Return the folded sections of a draft, or None if it does not exist or is empty."""
+    sections, _ = _read_log(draft_path(draft_id, drafts_dir))
+    return {name: json.loads(text) for name, text in sections.items()} or None
+
+
+def list_drafts(drafts_dir: str = DRAFTS_DIR, limit: int = 20) -> List[Tuple[str, float]]:
+    """Return (draft_id, mtime) of the newest drafts."""
+    if not os.path.isdir(drafts_dir):
+        return []
+    with os.scandir(drafts_dir) as entries:
+        drafts = [(e.name[: -len(".jsonl")], e.stat().st_mtime) for e in entries if e.name.endswith(".jsonl")]
+    drafts.sort(key=lambda d: d[1], reverse=True)
+    return drafts[:limit]
+
+
+class DraftWriter:
+    """Debounced, append-only autosave log for one draft."""
+
+    def __init__(
+        self,
+        draft_id: Optional[str] = None,
+        drafts_dir: str = DRAFTS_DIR,
+        debounce: float = DEBOUNCE_SECONDS,
+    ) -> None:
+        self.draft_id = draft_id or new_draft_id()
+        self.path = draft_path(self.draft_id, drafts_dir)
+        self.debounce = debounce
+        self.writes = 0
+        self._written, self._lines = _read_log(self.path)
+        # A new draft takes the first form state as its baseline, so opening
+        # the page without editing anything leaves no draft file behind.
+        self._baseline = self._lines == 0
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def update(self, sections: Dict[str, Any]) -> bool:
+        """Buffer the sections whose content changed; return True if any did."""
+        changed = False
+        with self._lock:
+            if self._baseline:
+                self._baseline = False
+                self._written = {name: _encode(value) for name, value in sections.items()}
+                return False
+            for name, value in sections.items():
+                text = _encode(value)
+                if self._pending.get(name, self._written.get(name)) != text:
+                    self._pending[name] = text
+                    changed = True
+            if changed:
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._timer = threading.Timer(self.debounce, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return changed
+
+    def flush(self) -> bool:
+        """Append buffered sections now; return True if anything was written."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return False
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._written.update(self._pending)
+            self._lines += 1
+            if self._lines == 1 or self._lines > COMPACT_AFTER:
+                # The first line of a new log holds every section, including the baseline
+                self._rewrite()
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(self._line(self._pending))
+            self._pending = {}
+            self.writes += 1
+            return True
+
+    def _line(self, sections: Dict[str, str]) -> str:
+        body = ",".join(f"{json.dumps(name)}:{text}" for name, text in sections.items())
+        return f'{{"t":{time.time():.3f},"s":{{{body}}}}}\n'
+
+    def _rewrite(self) -> None:
+        """Replace the log with a single line holding every section."""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self._line(self._written))
+        os.replace(tmp, self.path)
+        self._lines = 1
+
+    def discard(self) -> None:
+        """Drop buffered changes and delete the draft (after the report was saved)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = {}
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
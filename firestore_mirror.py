@@ -0,0 +1,189 @@
+"""Local SQLite mirror of the Firestore daily_reports collection.
+
+`sync_collection` only asks Firestore for documents whose cursor field
+(`createdAt`, the server timestamp the web app sets on save) is at or after
+the newest one mirrored, then upserts them by document ID. Deletions never
+show up in that query, so each incremental sync also lists the collection's
+document IDs (no field data) and drops mirrored documents that are gone. firestore_replication.py
+reads the mirror to keep the SQLite report database in step without streaming
+the whole collection each cycle. dashboard.py pages through Firestore itself
+(see firestore_queries.py).
+
+The Firestore client is passed in and only needs `collection(path)` returning
+a query with `where(filter=FieldFilter(...))`, `order_by(field)`, `select(fields)` and `stream()`, so the
+sync runs against the real client, the Firestore emulator (set
+FIRESTORE_EMULATOR_HOST) or an in-memory fake.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Optional, Tuple
+
+from firestore_queries import DOCUMENT_ID, where
+
+MIRROR_DB_DEFAULT = "firestore_mirror.db"
+CURSOR_FIELD = "createdAt"
+
+_lock = threading.Lock()
+
+
+def collection_path(app_id: str, user_id: str) -> str:
+    """Return the daily_reports collection path used by the web app."""
+    return f"artifacts/{app_id}/users/{user_id}/daily_reports"
+
+
+def get_mirror_connection(mirror_path: str = MIRROR_DB_DEFAULT) -> sqlite3.Connection:
+    """Open the mirror database, creating its tables if needed."""
+    conn = sqlite3.connect(mirror_path, timeout=5, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS MirrorReports (
+            collection_path TEXT NOT NULL,
+            doc_id TEXT NOT NULL,
+            report_date TEXT,
+            saved_at TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (collection_path, doc_id)
+        );
+        """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_mirrorreports_date ON MirrorReports (collection_path, report_date);"
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS MirrorSyncState (
+            collection_path TEXT PRIMARY KEY,
+            cursor_value TEXT,
+            cursor_kind TEXT,
+            last_sync TEXT
+        );
+        """
+    )
+    conn.commit()
+    return conn
+
+
+def _encode_cursor(value: Any) -> Tuple[str, str]:
+    """Store a Firestore cursor value as (text, kind) so it can be rebuilt for the next query."""
+    if isinstance(value, datetime):
+        return value.isoformat(), "datetime"
+    if isinstance(value, (int, float)):
+        return repr(value), "number"
+    return str(value), "str"
+
+
+def _decode_cursor(text: Optional[str], kind: Optional[str]) -> Any:
+    if text is None:
+        return None
+    if kind == "datetime":
+        return datetime.fromisoformat(text)
+    if kind == "number":
+        return float(text) if "." in text else int(text)
+    return text
+
+
+def _cursor_key(value: Any) -> Any:
+    """Sort key that orders datetimes and ISO strings consistently."""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _where_since(query: Any, field: str, value: Any) -> Any:
+    """Apply `field >= value`.
+
+    >= rather than > so documents saved in the same instant as the cursor are
+    not skipped; re-fetched documents are upserted by ID.
+    """
+    return where(query, field, ">=", value)
+
+
+def sync_collection(
+    db: Any,
+    path: str,
+    mirror_path: str = MIRROR_DB_DEFAULT,
+    cursor_field: str = CURSOR_FIELD,
+    full: bool = False,
+) -> int:
+    """Fetch documents changed since the stored cursor into the mirror; return how many were written.
+
+    The first sync (or `full=True`) streams the whole collection and replaces
+    the mirrored copy. Later syncs drop mirrored documents whose IDs are no
+    longer listed, so deletions in Firestore reach the mirror either way.
+    """
+    with _lock:
+        conn = get_mirror_connection(mirror_path)
+        try:
+            state = conn.execute(
+                "SELECT cursor_value, cursor_kind FROM MirrorSyncState WHERE collection_path = ?;", (path,)
+            ).fetchone()
+
+            cursor = None if (full or state is None) else _decode_cursor(state[0], state[1])
+            query = db.collection(path)
+            live_ids = None
+            if cursor is not None:
+                # Listed before the changed documents are fetched, so a document
+                # created in between is kept by the upsert below.
+                live_ids = {doc.id for doc in db.collection(path).select([DOCUMENT_ID]).stream()}
+                query = _where_since(query, cursor_field, cursor).order_by(cursor_field)
+
+            rows = []
+            newest = cursor
+            for doc in query.stream():
+                data = doc.to_dict() or {}
+                saved = data.get(cursor_field)
+                if saved is not None and (newest is None or _cursor_key(saved) > _cursor_key(newest)):
+                    newest = saved
+                rows.append(
+                    (
+                        path,
+                        doc.id,
+                        str(data.get("reportDate", ""))[:10] or None,
+                        _encode_cursor(saved)[0] if saved is not None else None,
+                        json.dumps(data, default=_json_default),
+                    )
+                )
+
+            conn.execute("BEGIN;")
+            if cursor is None:
+                conn.execute("DELETE FROM MirrorReports WHERE collection_path = ?;", (path,))
+            else:
+                live_ids.update(row[1] for row in rows)
+                mirrored = conn.execute("SELECT doc_id FROM MirrorReports WHERE collection_path = ?;", (path,))
+                gone = [(path, doc_id) for (doc_id,) in mirrored.fetchall() if doc_id not in live_ids]
+                conn.executemany("DELETE FROM MirrorReports WHERE collection_path = ? AND doc_id = ?;", gone)
+            conn.executemany(
+                """
+                INSERT INTO MirrorReports (collection_path, doc_id, report_date, saved_at, data)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(collection_path, doc_id) DO UPDATE SET
+                    report_date = excluded.report_date, saved_at = excluded.saved_at, data = excluded.data;
+                """,
+                rows,
+            )
+            cursor_text, cursor_kind = _encode_cursor(newest) if newest is not None else (None, None)
+            conn.execute(
+                """
+                INSERT INTO MirrorSyncState (collection_path, cursor_value, cursor_kind, last_sync) VALUES (?, ?, ?, ?)
+                ON CONFLICT(collection_path) DO UPDATE SET
+                    cursor_value = excluded.cursor_value, cursor_kind = excluded.cursor_kind, last_sync = excluded.last_sync;
+                """,
+                (path, cursor_text, cursor_kind, datetime.now(timezone.utc).isoformat()),
+            )
+            conn.commit()
+            return len(rows)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
@@ -0,0 +1,78 @@
+"""Server-side filtered, paginated reads of the Firestore daily_reports collection.
+
+Report dates are stored by the web app as "YYYY-MM-DD" strings, so range
+filters and ordering on `reportDate` run in Firestore. Pages are ordered
+newest first with the document ID as a tie-breaker, and the next page starts
+after the last (reportDate, document ID) pair. `fields` requests a field mask,
+so a date picker can list reports without downloading their logs.
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+DATE_FIELD = "reportDate"
+DOCUMENT_ID = "__name__"
+DESCENDING = "DESCENDING"
+
+# (reportDate, document ID) of the last document on a page.
+PageCursor = Tuple[str, str]
+
+
+class ReportPage(NamedTuple):
+    reports: List[Dict[str, Any]]
+    next_cursor: Optional[PageCursor]
+
+
+def where(query: Any, field: str, op: str, value: Any) -> Any:
+    """Apply a filter using FieldFilter when the google client is installed."""
+    try:
+        from google.cloud.firestore_v1.base_query import FieldFilter
+    except ImportError:
+        return query.where(field, op, value)
+    return query.where(filter=FieldFilter(field, op, value))
+
+
+def query_reports(
+    db: Any,
+    path: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = None,
+    start_after: Optional[PageCursor] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> ReportPage:
+    """Return one page of reports dated start_date..end_date (inclusive), newest first.
+
+    Each report dict carries its document ID as `_id`. next_cursor is None
+    when the page was the last one.
+    """
+    query = db.collection(path)
+    if start_date:
+        query = where(query, DATE_FIELD, ">=", str(start_date))
+    if end_date:
+        query = where(query, DATE_FIELD, "<=", str(end_date))
+    query = query.order_by(DATE_FIELD, direction=DESCENDING).order_by(DOCUMENT_ID, direction=DESCENDING)
+    if fields:
+        query = query.select(list(fields) + [DATE_FIELD] if DATE_FIELD not in fields else list(fields))
+    if start_after:
+        query = query.start_after({DATE_FIELD: start_after[0], DOCUMENT_ID: start_after[1]})
+    if limit:
+        query = query.limit(limit)
+
+    reports = []
+    for doc in query.stream():
+        report = doc.to_dict() or {}
+        report["_id"] = doc.id
+        reports.append(report)
+    next_cursor = None
+    if limit and len(reports) == limit:
+        next_cursor = (str(reports[-1].get(DATE_FIELD, "")), reports[-1]["_id"])
+    return ReportPage(reports, next_cursor)
+
+
+def get_report(db: Any, path: str, doc_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch one full report document by ID, or None if it no longer exists."""
+    snapshot = db.collection(path).document(doc_id).get()
+    if not snapshot.exists:
+        return None
+    report = snapshot.to_dict() or {}
+    report["_id"] = snapshot.id
+    return report
@@ -0,0 +1,376 @@
+"""Replicate web-app reports from Firestore into the normalized SQLite schema.
+
+    python firestore_replication.py --app-id APP --user-id USER [--db construction_management.db] [--watch]
+
+Documents are first synced incrementally into the local mirror
+(firestore_mirror.py), then mapped from the web app's nested layout
+(`manpower`/`equipment` with `count`/`hours`, `activities`, `materials`) onto
+Projects/DailyReports and the child logs. ReplicatedDocuments records each
+document ID with a hash of its contents, so unchanged documents are skipped,
+edited ones update their report in place, and documents that left the mirror
+are detached. Their report is only deleted if replication created it and
+nothing else saved to it since (ReplicatedReports); reports shared with the
+entry app or session imports are left as they are. Writes go through the entry app's upsert helpers in batched
+transactions and refresh the rollups for every touched project/day.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from db_pool import get_manager
+from firestore_mirror import MIRROR_DB_DEFAULT, collection_path, get_mirror_connection, sync_collection
+from log_validation import STATUSES, validate_reports
+from lookups import NameResolver
+from migrations import migrate
+from report_queries import CHILD_TABLES
+from rollups import refresh_rollups
+from streamlit_entry import DB_FILE, sync_children, upsert_project, upsert_report
+
+DEFAULT_INTERVAL_SECONDS = 60
+
+
+class MappedReport(NamedTuple):
+    project_name: str
+    report_date: str
+    weather: str
+    site_conditions: str
+    general_notes: str
+    prepared_by: str
+    manpower: List[Dict[str, Any]]
+    equipment: List[Dict[str, Any]]
+    activities: List[Dict[str, Any]]
+    materials: List[Dict[str, Any]]
+
+
+def _number(value: Any, cast=float) -> Any:
+    """Coerce a form value ("8", "6.5", "", None) to a number, defaulting to 0."""
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return cast(0)
+
+
+def _rows(doc: Dict[str, Any], key: str) -> List[Dict[str, Any]]:
+    value = doc.get(key)
+    return [row for row in value if isinstance(row, dict)] if isinstance(value, list) else []
+
+
+def map_document(doc: Dict[str, Any]) -> Optional[MappedReport]:
+    """Map a web-app report document to the entry schema; None if it lacks a project or date."""
+    project_name = str(doc.get("projectName") or "").strip()
+    report_date = str(doc.get("reportDate") or "")[:10]
+    if not project_name or not report_date:
+        return None
+    manpower = [
+        {"trade": m.get("trade", ""), "number_of_workers": _number(m.get("count"), int), "hours_worked": _number(m.get("hours"))}
+        for m in _rows(doc, "manpower")
+    ]
+    equipment = [
+        {"equipment_name": e.get("name", ""), "quantity": _number(e.get("count"), int), "hours_used": _number(e.get("hours"))}
+        for e in _rows(doc, "equipment")
+    ]
+    activities = [
+        {
+            "activity_description": a.get("description", ""),
+            "status": a.get("status") if a.get("status") in STATUSES else "In Progress",
+            "percent_complete": _number(a.get("percentComplete"), int),
+            "notes": a.get("notes", ""),
+        }
+        for a in _rows(doc, "activities")
+    ]
+    materials = [
+        {
+            "material_name": m.get("name", ""),
+            "quantity": _number(m.get("quantity")),
+            "unit": m.get("unit", ""),
+            "supplier": m.get("supplier", ""),
+            "ticket_number": m.get("ticketNumber", ""),
+        }
+        for m in _rows(doc, "materials")
+    ]
+    return MappedReport(
+        project_name,
+        report_date,
+        str(doc.get("weather") or ""),
+        str(doc.get("siteConditions") or ""),
+        str(doc.get("generalNotes") or ""),
+        str(doc.get("preparedBy") or ""),
+        manpower,
+        equipment,
+        activities,
+        materials,
+    )
+
+
+def _delete_report(conn: sqlite3.Connection, report_id: int) -> Optional[Tuple[int, str]]:
+    """Delete a report and its child rows; return its (project_id, report_date) rollup key."""
+    row = conn.execute("SELECT project_id, report_date FROM DailyReports WHERE report_id = ?;", (report_id,)).fetchone()
+    for table in CHILD_TABLES:
+        conn.execute(f"DELETE FROM {table} WHERE report_id = ?;", (report_id,))
+    conn.execute("DELETE FROM ReplicatedReports WHERE report_id = ?;", (report_id,))
+    # Only reports no other writer touched are deleted; clear any import link anyway so the FK holds.
+    conn.execute("UPDATE ImportedSessions SET report_id = NULL WHERE report_id = ?;", (report_id,))
+    conn.execute("DELETE FROM DailyReports WHERE report_id = ?;", (report_id,))
+    return (row[0], row[1]) if row else None
+
+
+def _release_report(conn: sqlite3.Connection, path: str, doc_id: str, report_id: int) -> Optional[Tuple[int, str]]:
+    """Detach a document from a report it no longer maps to; return a rollup key if the report was deleted.
+
+    The report is deleted only if replication created it, no other writer
+    saved to it since (ReplicatedReports) and no other document maps to it.
+    Shared reports keep their header and log rows.
+    """
+    shared = conn.execute(
+        "SELECT 1 FROM ReplicatedDocuments WHERE report_id = ? AND NOT (collection_path = ? AND doc_id = ?) LIMIT 1;",
+        (report_id, path, doc_id),
+    ).fetchone()
+    owned = conn.execute("SELECT 1 FROM ReplicatedReports WHERE report_id = ?;", (report_id,)).fetchone()
+    return _delete_report(conn, report_id) if owned and not shared else None
+
+
+def _iter_mirror(path: str, mirror_path: str, batch_size: int) -> Iterator[List[Tuple[str, str]]]:
+    """Yield (doc_id, data) batches for a collection from the mirror, oldest save first.
+
+    Documents for the same project and date update one report, so applying
+    them in save order (doc ID breaks ties) lets the newest save win.
+    """
+    conn = get_mirror_connection(mirror_path)
+    try:
+        cursor = conn.execute(
+            "SELECT doc_id, data FROM MirrorReports WHERE collection_path = ? ORDER BY saved_at, doc_id;", (path,)
+        )
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                return
+            yield batch
+    finally:
+        conn.close()
+
+
+def write_batch(
+    conn: sqlite3.Connection,
+    path: str,
+    docs: List[Tuple[str, str, Optional[MappedReport]]],
+    replaced: Dict[str, int],
+    project_ids: Dict[str, int],
+    errors: Optional[List[str]] = None,
+) -> int:
+    """Write (doc_id, content_hash, report) entries inside the caller's transaction; return rows written.
+
+    `replaced` maps doc IDs that were replicated before to their old report_id.
+    Reports are keyed by project and date, so an edited document updates its
+    report in place. Documents that no longer map to a report are recorded
+    with a NULL report_id, and log rows that fail validation are skipped and
+    described in `errors`.
+    """
+    rows = 0
+    rollup_keys = []
+    replicated_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    logs, rejected = validate_reports(
+        [[r.manpower, r.equipment, r.activities, r.materials] if r else [None] * 4 for _, _, r in docs]
+    )
+    resolver = NameResolver(conn)
+    resolver.prime(logs)
+    for (doc_id, content_hash, report), report_logs, report_rejected in zip(docs, logs, rejected):
+        report_id = None
+        if report is not None:
+            project_id = project_ids.get(report.project_name)
+            if project_id is None:
+                project_id = upsert_project(conn, report.project_name)
+                project_ids[report.project_name] = project_id
+            report_id, created = upsert_report(
+                conn,
+                project_id,
+                report.report_date,
+                report.weather,
+                report.site_conditions,
+                report.general_notes,
+                report.prepared_by,
+                replicated=True,
+            )
+            written = sync_children(conn, report_id, report_logs, resolver)
+            if errors is not None:
+                errors.extend(f"{doc_id}: {e}" for e in report_rejected)
+            rollup_keys.append((project_id, report.report_date))
+            rows += int(created) + written
+        # An edit that moved the document to another project or date leaves its old report behind.
+        if doc_id in replaced and replaced[doc_id] != report_id:
+            old_key = _release_report(conn, path, doc_id, replaced[doc_id])
+            if old_key:
+                rollup_keys.append(old_key)
+        conn.execute(
+            """
+            INSERT INTO ReplicatedDocuments (collection_path, doc_id, content_hash, report_id, replicated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(collection_path, doc_id) DO UPDATE SET
+                content_hash = excluded.content_hash, report_id = excluded.report_id, replicated_at = excluded.replicated_at;
+            """,
+            (path, doc_id, content_hash, report_id, replicated_at),
+        )
+    refresh_rollups(conn, rollup_keys)
+    return rows
+
+
+def replicate_collection(
+    path: str,
+    db_path: str = DB_FILE,
+    mirror_path: str = MIRROR_DB_DEFAULT,
+    batch_size: int = 200,
+) -> Dict[str, Any]:
+    """Apply the mirrored documents of one collection to db_path; return summary counters."""
+    manager = get_manager(db_path)
+    manager.run_once(migrate)
+    with manager.reader() as conn:
+        known = {
+            doc_id: (content_hash, report_id)
+            for doc_id, content_hash, report_id in conn.execute(
+                "SELECT doc_id, content_hash, report_id FROM ReplicatedDocuments WHERE collection_path = ?;", (path,)
+            )
+        }
+
+    stats: Dict[str, Any] = {
+        "documents": 0, "inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "skipped": 0, "rows": 0, "errors": [],
+    }
+    project_ids: Dict[str, int] = {}
+    seen = set()
+    start = time.perf_counter()
+    if os.path.exists(mirror_path):
+        for batch in _iter_mirror(path, mirror_path, batch_size):
+            pending = []
+            replaced = {}
+            for doc_id, data in batch:
+                stats["documents"] += 1
+                seen.add(doc_id)
+                content_hash = hashlib.sha256(data.encode("utf-8")).hexdigest()
+                previous = known.get(doc_id)
+                if previous and previous[0] == content_hash:
+                    stats["unchanged"] += 1
+                    continue
+                report = map_document(json.loads(data))
+                if report is None:
+                    stats["skipped"] += 1
+                else:
+                    stats["updated" if previous else "inserted"] += 1
+                if previous and previous[1] is not None:
+                    replaced[doc_id] = previous[1]
+                pending.append((doc_id, content_hash, report))
+            if pending:
+                with manager.writer() as conn:
+                    stats["rows"] += write_batch(conn, path, pending, replaced, project_ids, stats["errors"])
+
+    gone = [doc_id for doc_id in known if doc_id not in seen]
+    for i in range(0, len(gone), batch_size):
+        with manager.writer() as conn:
+            rollup_keys = []
+            for doc_id in gone[i:i + batch_size]:
+                report_id = known[doc_id][1]
+                if report_id is not None:
+                    key = _release_report(conn, path, doc_id, report_id)
+                    if key:
+                        rollup_keys.append(key)
+                conn.execute(
+                    "DELETE FROM ReplicatedDocuments WHERE collection_path = ? AND doc_id = ?;", (path, doc_id)
+                )
+            refresh_rollups(conn, rollup_keys)
+        stats["deleted"] += len(gone[i:i + batch_size])
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+class ReplicationWorker(threading.Thread):
+    """Background thread that syncs a collection from Firestore and replicates it every `interval` seconds."""
+
+    def __init__(
+        self,
+        db: Any,
+        path: str,
+        db_path: str = DB_FILE,
+        mirror_path: str = MIRROR_DB_DEFAULT,
+        interval: float = DEFAULT_INTERVAL_SECONDS,
+    ) -> None:
+        super().__init__(name="firestore-replication", daemon=True)
+        self.db = db
+        self.path = path
+        self.db_path = db_path
+        self.mirror_path = mirror_path
+        self.interval = interval
+        self.last_stats: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+        self._stop_event = threading.Event()
+
+    def run_cycle(self) -> Dict[str, Any]:
+        sync_collection(self.db, self.path, self.mirror_path)
+        self.last_stats = replicate_collection(self.path, self.db_path, self.mirror_path)
+        return self.last_stats
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.run_cycle()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+def _firestore_client(credentials_file: str) -> Any:
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(credentials_file))
+    return firestore.client()
+
+
+def _print_stats(stats: Dict[str, Any]) -> None:
+    print(
+        f"{stats['documents']} documents: {stats['inserted']} inserted, {stats['updated']} updated, "
+        f"{stats['deleted']} deleted, {stats['unchanged']} unchanged, {stats['skipped']} skipped "
+        f"({stats['rows']} rows in {stats['seconds']:.2f}s)"
+    )
+    for error in stats["errors"][:20]:
+        print(f"  rejected {error}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replicate Firestore daily reports into SQLite.")
+    parser.add_argument("--app-id", required=True)
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--credentials", default="firebase-credentials.json", help="service account key file")
+    parser.add_argument("--db", default=DB_FILE, help="SQLite database path")
+    parser.add_argument("--mirror", default=MIRROR_DB_DEFAULT, help="Firestore mirror database path")
+    parser.add_argument("--full", action="store_true", help="resync the whole collection first")
+    parser.add_argument("--watch", action="store_true", help="keep replicating every --interval seconds")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_SECONDS)
+    args = parser.parse_args(argv)
+
+    db = _firestore_client(args.credentials)
+    path = collection_path(args.app_id, args.user_id)
+    sync_collection(db, path, args.mirror, full=args.full)
+    _print_stats(replicate_collection(path, args.db, args.mirror))
+    if not args.watch:
+        return 0
+
+    try:
+        while True:
+            time.sleep(args.interval)
+            sync_collection(db, path, args.mirror)
+            _print_stats(replicate_collection(path, args.db, args.mirror))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Build a synthetic construction_management database at production-like volume.
+
+    python generate_synthetic_data.py --db synthetic.db --projects 50 --days 1095
+
+Each project gets one report per day with a realistic spread of child rows
+(trades, equipment, deliveries, activities). Generation is deterministic for
+a given --seed.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from db_pool import configure_connection
+from log_validation import LOG_TABLES
+from lookups import NameResolver
+from migrations import migrate
+from rollups import rebuild_rollups
+
+TRADES = [
+    "General Labor", "Electrician", "Crane Operator", "Carpenter", "Ironworker",
+    "Welder", "Surveyor", "Concrete Finisher", "Lineman", "Foreman",
+]
+EQUIPMENT = [
+    "50-Ton Crane", "Excavator", "Pickup Truck", "Backhoe", "Bulldozer",
+    "Concrete Pump", "Generator", "Line Truck", "Forklift", "Compactor",
+]
+MATERIALS = [
+    ("Concrete Mix", "cubic meters"), ("Rebar", "tons"), ("Conductor Cable", "meters"),
+    ("Gravel", "tons"), ("Steel Lattice", "pieces"), ("Insulators", "pieces"),
+    ("Formwork Plywood", "sheets"), ("Sand", "tons"),
+]
+SUPPLIERS = ["City Concrete Inc.", "Mekong Steel", "Delta Aggregates", "PowerGrid Supply", "Angkor Hardware"]
+STATUSES = ["Not Started", "In Progress", "Completed", "Delayed"]
+WEATHER = ["Sunny, 32°C", "Cloudy, 28°C", "Light rain", "Heavy rain", "Windy, 30°C"]
+CONDITIONS = ["Dry, access roads clear.", "Muddy in low areas.", "Flooded access road.", "Dusty, watering needed."]
+
+
+def _report_rows(rng: random.Random, report_id: int) -> Dict[str, List[Tuple]]:
+    """Return child rows for one report."""
+    manpower = [
+        (report_id, trade, rng.randint(1, 20), rng.choice([4.0, 6.0, 6.5, 8.0, 10.0]))
+        for trade in rng.sample(TRADES, rng.randint(3, 7))
+    ]
+    equipment = [
+        (report_id, name, rng.randint(1, 4), rng.choice([2.0, 4.0, 6.5, 8.0]))
+        for name in rng.sample(EQUIPMENT, rng.randint(2, 5))
+    ]
+    materials = []
+    for _ in range(rng.randint(0, 3)):
+        name, unit = rng.choice(MATERIALS)
+        materials.append((report_id, name, round(rng.uniform(1, 50), 1), unit, rng.choice(SUPPLIERS), f"TICKET-{rng.randint(0, 99999):05d}"))
+    activities = []
+    for _ in range(rng.randint(2, 6)):
+        status = rng.choices(STATUSES, weights=[1, 6, 3, 1])[0]
+        pct = {"Not Started": 0, "Completed": 100}.get(status, rng.randint(5, 95))
+        activities.append((report_id, f"Work on Tower #{rng.randint(1, 120)}", status, pct, rng.choice(["", "On schedule.", "Waiting on rebar delivery."])))
+    return {"ManpowerLog": manpower, "EquipmentLog": equipment, "MaterialDeliveries": materials, "WorkActivities": activities}
+
+
+INSERT_SQL = {
+    "ManpowerLog": "INSERT INTO ManpowerLog (report_id, trade_id, number_of_workers, hours_worked) VALUES (?, ?, ?, ?);",
+    "EquipmentLog": "INSERT INTO EquipmentLog (report_id, equipment_id, quantity, hours_used) VALUES (?, ?, ?, ?);",
+    "MaterialDeliveries": "INSERT INTO MaterialDeliveries (report_id, material_id, quantity, unit_id, supplier_id, ticket_number) VALUES (?, ?, ?, ?, ?, ?);",
+    "WorkActivities": "INSERT INTO WorkActivities (report_id, activity_description, status, percent_complete, notes) VALUES (?, ?, ?, ?, ?);",
+}
+
+
+def _project_reports(project_count: int, days: int, start: date) -> Iterator[Tuple[int, str]]:
+    for day in range(days):
+        report_date = (start + timedelta(days=day)).isoformat()
+        for project_id in range(1, project_count + 1):
+            yield project_id, report_date
+
+
+def generate_database(
+    db_path: str,
+    projects: int = 50,
+    days: int = 3 * 365,
+    start: date = date(2023, 1, 1),
+    seed: int = 42,
+    batch_reports: int = 5000,
+) -> Dict[str, int]:
+    """Create db_path (replacing any existing file) and fill it with synthetic reports.
+
+    Returns row counts per table.
+    """
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    rng = random.Random(seed)
+    conn = configure_connection(sqlite3.connect(db_path))
+    try:
+        migrate(conn)
+        conn.executemany(
+            "INSERT INTO Projects (project_id, project_name, location, start_date) VALUES (?, ?, ?, ?);",
+            [(i, f"Transmission Line Section {i}", f"Site {i}", start.isoformat()) for i in range(1, projects + 1)],
+        )
+
+        counts = {"Projects": projects, "DailyReports": 0, **{t: 0 for t in INSERT_SQL}}
+        report_id = 0
+        reports: List[Tuple] = []
+        children: Dict[str, List[Tuple]] = {t: [] for t in INSERT_SQL}
+        names = NameResolver(conn)
+        specs = {spec.table: spec for spec in LOG_TABLES}
+
+        def flush() -> None:
+            conn.executemany(
+                "INSERT INTO DailyReports (report_id, project_id, report_date, weather, site_conditions, general_notes, prepared_by) VALUES (?, ?, ?, ?, ?, ?, ?);",
+                reports,
+            )
+            for table, rows in children.items():
+                # Rows carry names after report_id; store their lookup keys instead.
+                stored = names.stored_rows(specs[table], (row[1:] for row in rows))
+                conn.executemany(INSERT_SQL[table], ((row[0], *values) for row, values in zip(rows, stored)))
+                counts[table] += len(rows)
+                rows.clear()
+            counts["DailyReports"] += len(reports)
+            reports.clear()
+            conn.commit()
+
+        for project_id, report_date in _project_reports(projects, days, start):
+            report_id += 1
+            reports.append((report_id, project_id, report_date, rng.choice(WEATHER), rng.choice(CONDITIONS), "", f"Supervisor {project_id}"))
+            for table, rows in _report_rows(rng, report_id).items():
+                children[table].extend(rows)
+            if len(reports) >= batch_reports:
+                flush()
+        flush()
+        rebuild_rollups(conn)
+        conn.commit()
+        conn.execute("ANALYZE;")
+        return counts
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic construction_management database.")
+    parser.add_argument("--db", default="synthetic.db", help="output database path (overwritten)")
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--days", type=int, default=3 * 365, help="daily reports per project")
+    parser.add_argument("--start", default="2023-01-01", help="first report date (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    counts = generate_database(args.db, args.projects, args.days, date.fromisoformat(args.start), args.seed)
+    elapsed = time.perf_counter() - t0
+    print(f"Generated {args.db} in {elapsed:.1f}s")
+    for table, n in counts.items():
+        print(f"  {table}: {n:,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
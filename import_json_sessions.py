@@ -0,0 +1,214 @@
+"""Bulk import of session JSON files (see streamlit_entry.save_json_for_session).
+
+    python import_json_sessions.py [--dir json_data] [--db construction_management.db]
+
+Files are parsed in a process pool and written in batched transactions through
+the entry app's upsert_project/upsert_report/sync_children, so several saves
+of the same project and date collapse into one report holding the contents of
+the last file applied. Each file's SHA-256 is recorded in ImportedSessions
+(created by migrations.py) so reruns skip files that were already imported.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from db_pool import get_manager
+from log_validation import validate_reports
+from lookups import NameResolver
+from migrations import migrate
+from rollups import refresh_rollups
+from streamlit_entry import DB_FILE, JSON_DIR, sync_children, upsert_project, upsert_report
+
+CHILD_KEYS = ["manpower", "equipment", "activities", "materials"]
+
+
+class ParsedSession(NamedTuple):
+    path: str
+    content_hash: str
+    payload: Optional[Dict[str, Any]]
+    error: Optional[str]
+
+
+def iter_session_files(path: str) -> Iterator[str]:
+    """Yield JSON file paths in a directory without building the full listing."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(".json"):
+                yield entry.path
+
+
+def parse_session_file(path: str) -> ParsedSession:
+    """Read, hash and parse one session file (runs in a worker process)."""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError as e:
+        return ParsedSession(path, "", None, str(e))
+
+    content_hash = hashlib.sha256(raw).hexdigest()
+    try:
+        payload = json.loads(raw)
+    except ValueError as e:
+        return ParsedSession(path, content_hash, None, f"invalid JSON: {e}")
+    if not isinstance(payload, dict) or not payload.get("project_name") or not payload.get("report_date"):
+        return ParsedSession(path, content_hash, None, "missing project_name or report_date")
+    return ParsedSession(path, content_hash, payload, None)
+
+
+def _chunks(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_batch(
+    conn: sqlite3.Connection,
+    sessions: List[ParsedSession],
+    project_ids: Dict[str, int],
+    errors: Optional[List[str]] = None,
+) -> Tuple[int, int]:
+    """Upsert a batch of parsed sessions inside the caller's transaction; return (rows written, files failed).
+
+    A file is imported whole or not at all, like streamlit_entry.save_reports:
+    one with a log row that fails validation is not written, and one that
+    cannot be written is rolled back in its savepoint. Either way it is left
+    out of ImportedSessions and retried by the next run. Failures and rejected
+    rows are described in `errors`.
+    """
+    rows = failed = 0
+    rollup_keys = []
+    imported_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    # Apply saves of the same report oldest first so the latest one wins.
+    sessions = sorted(sessions, key=lambda s: str(s.payload.get("saved_at") or ""))
+    logs, rejected = validate_reports([[s.payload.get(key) or [] for key in CHILD_KEYS] for s in sessions])
+    # Outside the savepoints, so a rolled-back file cannot leave stale IDs behind.
+    resolver = NameResolver(conn)
+    resolver.prime([session_logs for session_logs, session_rejected in zip(logs, rejected) if not session_rejected])
+    batch_projects: Dict[str, int] = {}
+    for session, session_logs, session_rejected in zip(sessions, logs, rejected):
+        p = session.payload
+        project_name = str(p["project_name"]).strip()
+        try:
+            # The same key as streamlit_entry.save_reports, so imports and saves meet on one report.
+            report_date = date.fromisoformat(str(p["report_date"])[:10]).isoformat()
+        except ValueError:
+            failed += 1
+            if errors is not None:
+                errors.append(f"{session.path}: invalid report_date {p['report_date']!r}")
+            continue
+        if session_rejected:
+            failed += 1
+            if errors is not None:
+                errors.extend(f"{session.path}: {e}" for e in session_rejected)
+            continue
+        conn.execute("SAVEPOINT import_session;")
+        try:
+            project_id = project_ids.get(project_name) or batch_projects.get(project_name)
+            if project_id is None:
+                project_id = upsert_project(conn, project_name)
+            report_id, created = upsert_report(
+                conn,
+                project_id,
+                report_date,
+                p.get("weather") or "",
+                p.get("site_conditions") or "",
+                p.get("general_notes") or "",
+                p.get("prepared_by") or "",
+            )
+            written = sync_children(conn, report_id, session_logs, resolver)
+            conn.execute(
+                "INSERT INTO ImportedSessions (content_hash, filename, report_id, imported_at) VALUES (?, ?, ?, ?);",
+                (session.content_hash, os.path.basename(session.path), report_id, imported_at),
+            )
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK TO import_session;")
+            conn.execute("RELEASE import_session;")
+            failed += 1
+            if errors is not None:
+                errors.append(f"{session.path}: {e}")
+            continue
+        conn.execute("RELEASE import_session;")
+        batch_projects[project_name] = project_id
+        rollup_keys.append((project_id, report_date))
+        rows += int(created) + written
+    refresh_rollups(conn, rollup_keys)
+    # Only cache project IDs whose insert will be committed with this batch.
+    project_ids.update(batch_projects)
+    return rows, failed
+
+
+def import_sessions(
+    json_dir: str = JSON_DIR,
+    db_path: str = DB_FILE,
+    workers: Optional[int] = None,
+    batch_size: int = 500,
+) -> Dict[str, Any]:
+    """Import every new session file in json_dir into db_path; return summary counters."""
+    manager = get_manager(db_path)
+    manager.run_once(migrate)
+    with manager.reader() as conn:
+        seen = {row[0] for row in conn.execute("SELECT content_hash FROM ImportedSessions;")}
+
+    stats = {"files": 0, "imported": 0, "skipped": 0, "failed": 0, "rows": 0, "errors": []}
+    project_ids: Dict[str, int] = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for paths in _chunks(iter_session_files(json_dir), batch_size):
+            batch = []
+            for session in pool.map(parse_session_file, paths, chunksize=32):
+                stats["files"] += 1
+                if session.error:
+                    stats["failed"] += 1
+                    stats["errors"].append(f"{session.path}: {session.error}")
+                elif session.content_hash in seen:
+                    stats["skipped"] += 1
+                else:
+                    seen.add(session.content_hash)
+                    batch.append(session)
+            if batch:
+                with manager.writer() as conn:
+                    rows, failed = write_batch(conn, batch, project_ids, stats["errors"])
+                stats["rows"] += rows
+                stats["imported"] += len(batch) - failed
+                stats["failed"] += failed
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import session JSON files into SQLite.")
+    parser.add_argument("--dir", default=JSON_DIR, help="directory of session JSON files")
+    parser.add_argument("--db", default=DB_FILE, help="SQLite database path")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=500, help="files per write transaction")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.dir):
+        print(f"Directory not found: {args.dir}")
+        return 1
+
+    stats = import_sessions(args.dir, args.db, args.workers, args.batch_size)
+    rate = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"{stats['files']} files: {stats['imported']} imported, {stats['skipped']} already imported, "
+        f"{stats['failed']} failed"
+    )
+    print(f"{stats['rows']} rows in {stats['seconds']:.2f}s ({rate:,.0f} rows/s)")
+    for error in stats["errors"][:20]:
+        print(f"  {error}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Columnar validation of a report's log rows (manpower, equipment, activities, materials).
+
+Each log arrives as a DataFrame from the entry form's data editors or as a
+list of record dicts from session files and Firestore documents. Whole
+columns are stripped and coerced with pandas; only the rows that fail get a
+RowError, so one bad cell no longer aborts a save with a CHECK or type error.
+Rows whose name column is blank are the editors' empty trailing rows and are
+dropped without an error. A log that is not a list of row objects, and cells
+holding lists or objects, are rejected rather than coerced to text. The
+validated frames feed `executemany` through `iter_rows`, which yields plain
+tuples; `validate_reports` validates a whole batch of reports in one pass for
+the importers.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+STATUSES = ("Not Started", "In Progress", "Completed", "Delayed")
+
+
+class Column(NamedTuple):
+    name: str
+    kind: str  # "text", "int" or "float"
+    default: Any = ""
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    choices: Optional[Tuple[str, ...]] = None
+
+
+class LogTable(NamedTuple):
+    table: str
+    key: str
+    label: str
+    columns: Tuple[Column, ...]  # the first column names the row and is required
+
+    @property
+    def column_names(self) -> Tuple[str, ...]:
+        return tuple(c.name for c in self.columns)
+
+
+# In the order save_report, bulk_insert and sync_children take the logs.
+LOG_TABLES: Tuple[LogTable, ...] = (
+    LogTable("ManpowerLog", "log_id", "Manpower", (
+        Column("trade", "text"),
+        Column("number_of_workers", "int", 0, minimum=0),
+        Column("hours_worked", "float", 0.0, minimum=0),
+    )),
+    LogTable("EquipmentLog", "log_id", "Equipment", (
+        Column("equipment_name", "text"),
+        Column("quantity", "int", 0, minimum=0),
+        Column("hours_used", "float", 0.0, minimum=0),
+    )),
+    LogTable("WorkActivities", "activity_id", "Activities", (
+        Column("activity_description", "text"),
+        Column("status", "text", "In Progress", choices=STATUSES),
+        Column("percent_complete", "int", 0, minimum=0, maximum=100),
+        Column("notes", "text"),
+    )),
+    LogTable("MaterialDeliveries", "delivery_id", "Materials", (
+        Column("material_name", "text"),
+        Column("quantity", "float", 0.0, minimum=0),
+        Column("unit", "text"),
+        Column("supplier", "text"),
+        Column("ticket_number", "text"),
+    )),
+)
+
+LogInput = Union["pd.DataFrame", Sequence[dict], None]
+
+
+class RowError(NamedTuple):
+    table: str
+    row: int  # 0-based position in the input; -1 for the whole log
+    column: str
+    message: str
+
+    def __str__(self) -> str:
+        if self.row < 0:
+            return f"{self.table}: {self.message}"
+        return f"{self.table} row {self.row + 1}: {self.message}"
+
+
+# Cell values that are not a single value (a JSON array or object).
+_NESTED = (list, tuple, dict, set)
+
+
+def _check_shape(spec: LogTable, rows: LogInput) -> Tuple[LogInput, List[RowError]]:
+    """Return rows with anything that is not a row object blanked out, plus an error for each.
+
+    A log that is not a list at all is replaced by None.
+    """
+    import pandas as pd
+
+    if rows is None or isinstance(rows, pd.DataFrame):
+        return rows, []
+    if not isinstance(rows, (list, tuple)):
+        return None, [RowError(spec.label, -1, "", f"expected a list of rows, got {type(rows).__name__}")]
+    errors = [
+        RowError(spec.label, i, "", f"expected a row object, got {type(row).__name__}")
+        for i, row in enumerate(rows)
+        if not isinstance(row, dict)
+    ]
+    if errors:
+        # Blank rows keep the positions of the others and are dropped as empty.
+        rows = [row if isinstance(row, dict) else {} for row in rows]
+    return rows, errors
+
+
+def _frame(rows: LogInput) -> "pd.DataFrame":
+    import pandas as pd
+
+    if rows is None:
+        return pd.DataFrame()
+    if isinstance(rows, pd.DataFrame):
+        return rows
+    return pd.DataFrame.from_records(list(rows))
+
+
+def _show(value: Any) -> str:
+    """Format a rejected cell for an error message."""
+    if isinstance(value, float):  # numpy float64 is a float subclass
+        return f"{value:g}"
+    return repr(value)
+
+
+def _text(values: "pd.Series") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Return (stripped strings as an object array with "" for missing, blank mask)."""
+    text = values.astype("string").str.strip().fillna("").to_numpy(dtype=object, copy=True)
+    return text, text == ""
+
+
+def validate_log(
+    spec: LogTable,
+    rows: LogInput,
+    passthrough: Sequence[str] = (),
+) -> Tuple["pd.DataFrame", List[RowError]]:
+    """Return the valid rows of one log as a frame of spec.column_names, plus an error per rejected row.
+
+    Columns named in `passthrough` are copied to the front of the result
+    unchanged (validate_reports uses them to tell reports apart).
+    """
+    import numpy as np
+    import pandas as pd
+
+    rows, shape_errors = _check_shape(spec, rows)
+    df = _frame(rows)
+    n = len(df)
+    bad = np.zeros(n, dtype=bool)
+    errors: List[RowError] = []
+    out: Dict[str, Any] = {name: df[name].to_numpy() for name in passthrough}
+
+    def reject(mask: "np.ndarray", column: str, source: "np.ndarray", describe: Callable[[Any], str]) -> None:
+        mask = mask & ~bad
+        for pos in np.flatnonzero(mask):
+            errors.append(RowError(spec.label, int(pos), column, describe(source[pos])))
+        bad[mask] = True
+
+    for column in spec.columns:
+        if column.name not in df.columns:
+            out[column.name] = np.full(n, column.default, dtype=object if column.kind == "text" else "float64")
+            continue
+        raw = df[column.name]
+        if column.kind == "text":
+            text, blank = _text(raw)
+            if raw.dtype == object:
+                cells = raw.to_numpy()
+                nested = np.fromiter((isinstance(v, _NESTED) for v in cells), dtype=bool, count=n)
+                reject(nested, column.name, cells, lambda v: f"{column.name} {_show(v)} is not text")
+            text[blank] = column.default
+            if column.choices:
+                reject(~blank & ~np.isin(text, column.choices), column.name, text,
+                       lambda v: f"{column.name} {_show(v)} is not one of {', '.join(column.choices)}")
+            out[column.name] = text
+            continue
+
+        if pd.api.types.is_numeric_dtype(raw) and not pd.api.types.is_bool_dtype(raw):
+            numbers = raw.to_numpy(dtype="float64", na_value=np.nan, copy=True)
+            blank = np.isnan(numbers)
+            source = numbers
+        else:
+            source, blank = _text(raw)
+            numbers = pd.to_numeric(pd.Series(source), errors="coerce").to_numpy(dtype="float64", na_value=np.nan, copy=True)
+            reject(np.isnan(numbers) & ~blank, column.name, source, lambda v: f"{column.name} {_show(v)} is not a number")
+        numbers[blank] = column.default
+        with np.errstate(invalid="ignore"):
+            if column.kind == "int":
+                reject(np.mod(numbers, 1) != 0, column.name, source, lambda v: f"{column.name} {_show(v)} is not a whole number")
+            if column.minimum is not None:
+                reject(numbers < column.minimum, column.name, source, lambda v: f"{column.name} {_show(v)} is below {column.minimum:g}")
+            if column.maximum is not None:
+                reject(numbers > column.maximum, column.name, source, lambda v: f"{column.name} {_show(v)} is above {column.maximum:g}")
+        out[column.name] = numbers
+
+    # Rows without a name are the editors' empty rows: dropped, and their errors are noise.
+    named = out[spec.columns[0].name] != ""
+    keep = named & ~bad
+    valid = pd.DataFrame({name: values[keep] for name, values in out.items()})
+    for column in spec.columns:
+        if column.kind == "int":
+            valid[column.name] = valid[column.name].astype("int64")
+    errors = sorted([*shape_errors, *(e for e in errors if named[e.row])], key=lambda e: e.row)
+    return valid[list(passthrough) + list(spec.column_names)], errors
+
+
+def validate_logs(
+    manpower: LogInput,
+    equipment: LogInput,
+    activities: LogInput,
+    materials: LogInput,
+) -> Tuple[List["pd.DataFrame"], List[RowError]]:
+    """Validate the four logs of a report; return the valid frames in LOG_TABLES order and all errors."""
+    frames = []
+    errors: List[RowError] = []
+    for spec, rows in zip(LOG_TABLES, (manpower, equipment, activities, materials)):
+        frame, log_errors = validate_log(spec, rows)
+        frames.append(frame)
+        errors.extend(log_errors)
+    return frames, errors
+
+
+def validate_reports(
+    reports: Sequence[Sequence[LogInput]],
+) -> Tuple[List[List[List[Tuple[Any, ...]]]], List[List[RowError]]]:
+    """Validate the logs of many reports at once (four LogInputs per report, in LOG_TABLES order).
+
+    Each log is stacked across reports into one frame, so a batch costs one
+    pass per column instead of one per report. Returns, per report, its four
+    lists of row tuples and its errors (row numbers relative to that report's log).
+    """
+    import numpy as np
+    import pandas as pd
+
+    rows: List[List[List[Tuple[Any, ...]]]] = [[[] for _ in LOG_TABLES] for _ in reports]
+    errors: List[List[RowError]] = [[] for _ in reports]
+    for t, spec in enumerate(LOG_TABLES):
+        inputs = []
+        for report, logs in enumerate(reports):
+            log, shape_errors = _check_shape(spec, logs[t])
+            inputs.append(log)
+            errors[report].extend(shape_errors)
+        if any(isinstance(rows, pd.DataFrame) for rows in inputs):
+            frames = [_frame(rows) for rows in inputs]
+            lengths = np.array([len(f) for f in frames], dtype=int)
+            if not lengths.sum():
+                continue
+            stacked = pd.concat([f for f in frames if len(f)], ignore_index=True)
+        else:
+            # Record lists (session files, Firestore documents) become one frame directly.
+            records = [list(rows or []) for rows in inputs]
+            lengths = np.array([len(r) for r in records], dtype=int)
+            if not lengths.sum():
+                continue
+            stacked = pd.DataFrame.from_records([record for rows in records for record in rows])
+        owner = np.repeat(np.arange(len(reports)), lengths)
+        offset = np.arange(len(stacked)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        stacked["_report"] = owner
+        valid, log_errors = validate_log(spec, stacked, passthrough=("_report",))
+        for e in log_errors:
+            errors[owner[e.row]].append(e._replace(row=int(offset[e.row])))
+        for report, *values in iter_rows(valid):
+            rows[report][t].append(tuple(values))
+    return rows, errors
+
+
+def iter_rows(frame: "pd.DataFrame", report_id: Optional[int] = None) -> Iterator[Tuple[Any, ...]]:
+    """Yield a validated frame's rows as plain Python tuples, optionally prefixed with report_id."""
+    columns = [frame[name].tolist() for name in frame.columns]
+    if report_id is not None:
+        columns.insert(0, [report_id] * len(frame))
+    return zip(*columns)
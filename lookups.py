@@ -0,0 +1,441 @@
+"""Dictionary tables for the names repeated on every log row.
+
+    python lookups.py [--db construction_management.db] [--vacuum]
+    python lookups.py --similar trade
+    python lookups.py --merge trade "Electricians" "Electrician"
+
+Trades, equipment, materials, units and suppliers are stored once in small
+lookup tables with integer keys, and ManpowerLog, EquipmentLog and
+MaterialDeliveries hold those keys instead of the text. Names are matched on
+`name_key` (case-insensitive, whitespace collapsed), so "electrician " and
+"Electrician" share one entry; a real misspelling is folded into the right
+entry with `merge_names`, which repoints its log rows. Readers use the
+*Named views, which give the log tables back their original text columns.
+
+Databases that still store the names as text are converted by migration 2
+(see migrations.py): `copy_legacy_logs` copies the log tables in chunks and
+`init_lookups` swaps them in. The freed pages are only returned to the OS by
+`--vacuum`.
+"""
+import argparse
+import difflib
+import json
+import os
+import sqlite3
+import sys
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from db_pool import configure_connection
+from db_schema import REBUILD_CHUNK_ROWS, RebuildProgress, TableRebuild
+from log_validation import LOG_TABLES, LogTable
+from rollups import refresh_rollups
+
+DB_FILE_DEFAULT = "construction_management.db"
+
+
+class Lookup(NamedTuple):
+    table: str
+    key: str  # integer key, also the column name in the log table
+    label: str
+
+
+# Log column -> dictionary table.
+LOOKUPS: Dict[str, Lookup] = {
+    "trade": Lookup("Trades", "trade_id", "Trade"),
+    "equipment_name": Lookup("EquipmentTypes", "equipment_id", "Equipment"),
+    "material_name": Lookup("Materials", "material_id", "Material"),
+    "unit": Lookup("Units", "unit_id", "Unit"),
+    "supplier": Lookup("Suppliers", "supplier_id", "Supplier"),
+}
+
+LOOKUP_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        {key} INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        name_key TEXT NOT NULL UNIQUE,
+        merged_into INTEGER REFERENCES {table} ({key})
+    );
+"""
+
+# The log tables that reference the dictionaries ({table} is the name to create).
+LOG_TABLE_SQL: Dict[str, str] = {
+    "ManpowerLog": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id INTEGER NOT NULL,
+            trade_id INTEGER NOT NULL,
+            number_of_workers INTEGER NOT NULL,
+            hours_worked REAL NOT NULL,
+            FOREIGN KEY (report_id) REFERENCES DailyReports (report_id),
+            FOREIGN KEY (trade_id) REFERENCES Trades (trade_id)
+        );
+    """,
+    "EquipmentLog": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id INTEGER NOT NULL,
+            equipment_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            hours_used REAL NOT NULL,
+            FOREIGN KEY (report_id) REFERENCES DailyReports (report_id),
+            FOREIGN KEY (equipment_id) REFERENCES EquipmentTypes (equipment_id)
+        );
+    """,
+    "MaterialDeliveries": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            delivery_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id INTEGER NOT NULL,
+            material_id INTEGER NOT NULL,
+            quantity REAL NOT NULL,
+            unit_id INTEGER,
+            supplier_id INTEGER,
+            ticket_number TEXT,
+            FOREIGN KEY (report_id) REFERENCES DailyReports (report_id),
+            FOREIGN KEY (material_id) REFERENCES Materials (material_id),
+            FOREIGN KEY (unit_id) REFERENCES Units (unit_id),
+            FOREIGN KEY (supplier_id) REFERENCES Suppliers (supplier_id)
+        );
+    """,
+}
+
+# Log table -> view with the original text columns (blank units and suppliers read as '').
+NAMED_VIEWS: Dict[str, str] = {
+    "ManpowerLog": "ManpowerLogNamed",
+    "EquipmentLog": "EquipmentLogNamed",
+    "MaterialDeliveries": "MaterialDeliveriesNamed",
+}
+
+VIEW_SQL: Dict[str, str] = {
+    "ManpowerLogNamed": """
+        CREATE VIEW IF NOT EXISTS ManpowerLogNamed AS
+        SELECT m.log_id, m.report_id, t.name AS trade, m.number_of_workers, m.hours_worked
+        FROM ManpowerLog m JOIN Trades t ON t.trade_id = m.trade_id;
+    """,
+    "EquipmentLogNamed": """
+        CREATE VIEW IF NOT EXISTS EquipmentLogNamed AS
+        SELECT e.log_id, e.report_id, t.name AS equipment_name, e.quantity, e.hours_used
+        FROM EquipmentLog e JOIN EquipmentTypes t ON t.equipment_id = e.equipment_id;
+    """,
+    "MaterialDeliveriesNamed": """
+        CREATE VIEW IF NOT EXISTS MaterialDeliveriesNamed AS
+        SELECT d.delivery_id, d.report_id, m.name AS material_name, d.quantity,
+               COALESCE(u.name, '') AS unit, COALESCE(s.name, '') AS supplier, d.ticket_number
+        FROM MaterialDeliveries d
+        JOIN Materials m ON m.material_id = d.material_id
+        LEFT JOIN Units u ON u.unit_id = d.unit_id
+        LEFT JOIN Suppliers s ON s.supplier_id = d.supplier_id;
+    """,
+}
+
+# Stands in for a blank required name in rows migrated from the text columns.
+UNNAMED = "Unspecified"
+
+
+def named(table: str) -> str:
+    """Return the table or view to read `table` from with names instead of keys."""
+    return NAMED_VIEWS.get(table, table)
+
+
+def name_key(name: Any) -> str:
+    """Matching key of a name: whitespace collapsed and case folded ("" for blank or None)."""
+    if name is None:
+        return ""
+    return " ".join(str(name).split()).casefold()
+
+
+def clean_name(name: Any) -> str:
+    """Display form of a new name: surrounding and repeated whitespace removed."""
+    return " ".join(str(name).split())
+
+
+def stored_columns(spec: LogTable) -> Tuple[str, ...]:
+    """The log table's columns as stored: lookup names replaced by their key columns."""
+    return tuple(LOOKUPS[name].key if name in LOOKUPS else name for name in spec.column_names)
+
+
+class NameResolver:
+    """Maps names to lookup IDs within one write transaction, creating missing entries in bulk.
+
+    Each `resolve` call looks all new names of a column up with one query and
+    inserts the missing ones with one executemany. Resolved IDs are kept, so
+    prime a batch before entering per-report savepoints: an entry created
+    inside a savepoint that is rolled back would stay cached.
+    """
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+        self._ids: Dict[str, Dict[str, int]] = {column: {} for column in LOOKUPS}
+
+    def _select(self, lookup: Lookup, keys: List[str]) -> Iterable[Tuple[str, int]]:
+        return self.conn.execute(
+            f"SELECT name_key, COALESCE(merged_into, {lookup.key}) FROM {lookup.table} "
+            f"WHERE name_key IN (SELECT value FROM json_each(?));",
+            (json.dumps(keys),),
+        )
+
+    def resolve(self, column: str, names: Iterable[Any]) -> None:
+        """Look up (and create if needed) every name in `names` for a log column."""
+        lookup = LOOKUPS[column]
+        known = self._ids[column]
+        missing: Dict[str, str] = {}
+        for name in names:
+            key = name_key(name)
+            if key and key not in known and key not in missing:
+                missing[key] = clean_name(name)
+        if not missing:
+            return
+        known.update(self._select(lookup, list(missing)))
+        new = [(name, key) for key, name in missing.items() if key not in known]
+        if new:
+            self.conn.executemany(f"INSERT OR IGNORE INTO {lookup.table} (name, name_key) VALUES (?, ?);", new)
+            known.update(self._select(lookup, [key for _, key in new]))
+
+    def id(self, column: str, name: Any) -> Optional[int]:
+        """Return the ID for one name (None for a blank name)."""
+        key = name_key(name)
+        if not key:
+            return None
+        if key not in self._ids[column]:
+            self.resolve(column, [name])
+        return self._ids[column][key]
+
+    def prime(self, logs: Iterable[Sequence[Sequence[Tuple[Any, ...]]]]) -> None:
+        """Resolve every name in many reports' validated logs (LOG_TABLES order) at once."""
+        logs = list(logs)
+        for t, spec in enumerate(LOG_TABLES):
+            for i, column in enumerate(spec.column_names):
+                if column in LOOKUPS:
+                    self.resolve(column, (row[i] for report_logs in logs for row in report_logs[t]))
+
+    def stored_rows(self, spec: LogTable, rows: Iterable[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+        """Convert validated row tuples of a log to the stored form (names replaced by IDs)."""
+        rows = list(rows)
+        positions = [(i, column) for i, column in enumerate(spec.column_names) if column in LOOKUPS]
+        if not positions or not rows:
+            return rows
+        for i, column in positions:
+            self.resolve(column, (row[i] for row in rows))
+        ids = [(i, self._ids[column]) for i, column in positions]
+        out = []
+        for row in rows:
+            row = list(row)
+            for i, known in ids:
+                row[i] = known.get(name_key(row[i]))
+            out.append(tuple(row))
+        return out
+
+
+def _has_column(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table});"))
+
+
+def legacy_log_tables(conn: sqlite3.Connection) -> List[LogTable]:
+    """Log tables that still store the names as text."""
+    return [
+        spec for spec in LOG_TABLES
+        if spec.table in LOG_TABLE_SQL and _has_column(conn, spec.table, spec.columns[0].name)
+    ]
+
+
+def _create_lookup_tables(conn: sqlite3.Connection) -> None:
+    for lookup in LOOKUPS.values():
+        conn.execute(LOOKUP_TABLE_SQL.format(table=lookup.table, key=lookup.key))
+
+
+def _rebuild(spec: LogTable, resolver: NameResolver) -> TableRebuild:
+    """TableRebuild from a text-name log table to "<table>_new" with lookup keys."""
+    required = spec.columns[0].name
+
+    def resolve_names(conn: sqlite3.Connection, where: str, params: Sequence[Any]) -> None:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS _lookup_names (log_column TEXT, raw TEXT, id INTEGER, PRIMARY KEY (log_column, raw));")
+        for column in spec.column_names:
+            if column not in LOOKUPS:
+                continue
+            # Oldest spelling first, so it becomes the display name.
+            raw = [
+                row[0]
+                for row in conn.execute(
+                    f"SELECT t.{column} FROM {spec.table} t WHERE {where} GROUP BY t.{column} ORDER BY MIN(t.{spec.key});", params
+                )
+            ]
+            resolver.resolve(column, raw)
+            mapping = [(column, value, resolver.id(column, value)) for value in raw if value is not None]
+            if column == required:
+                mapping = [(c, v, i if i is not None else resolver.id(column, UNNAMED)) for c, v, i in mapping]
+            conn.executemany("INSERT OR IGNORE INTO temp._lookup_names (log_column, raw, id) VALUES (?, ?, ?);", mapping)
+
+    select = [f"t.{spec.key}", "t.report_id"]
+    for column in spec.column_names:
+        if column in LOOKUPS:
+            select.append(f"(SELECT id FROM temp._lookup_names WHERE log_column = '{column}' AND raw = t.{column})")
+        else:
+            select.append(f"t.{column}")
+    return TableRebuild(
+        spec.table,
+        f"{spec.table}_new",
+        spec.key,
+        (spec.key, "report_id") + stored_columns(spec),
+        select,
+        # Rows of reports that no longer exist are unreachable and would fail the foreign key.
+        where="EXISTS (SELECT 1 FROM DailyReports r WHERE r.report_id = t.report_id)",
+        before_chunk=resolve_names,
+    )
+
+
+def copy_legacy_logs(conn: sqlite3.Connection, progress: Optional[RebuildProgress] = None, chunk_rows: int = REBUILD_CHUNK_ROWS) -> None:
+    """Copy text-name log tables into their keyed layout in chunks, ahead of `init_lookups`.
+
+    Run outside a transaction; other connections can write between chunks.
+    """
+    legacy = legacy_log_tables(conn)
+    if not legacy:
+        return
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        _create_lookup_tables(conn)
+        for spec in legacy:
+            conn.execute(LOG_TABLE_SQL[spec.table].format(table=f"{spec.table}_new"))
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    resolver = NameResolver(conn)
+    for n, spec in enumerate(legacy):
+        report = None if progress is None else (lambda done, n=n: progress((n + done) / len(legacy)))
+        _rebuild(spec, resolver).copy(conn, report, chunk_rows)
+
+
+def init_lookups(conn: sqlite3.Connection) -> int:
+    """Create the dictionary tables and named views; move text names of older files into them.
+
+    Finishes the copies started by `copy_legacy_logs` (or does them in full)
+    and returns the number of log tables converted (0 once a database is
+    upgraded). The converted tables lose their indexes and search triggers,
+    so run create_indexes and init_search afterwards. The caller commits.
+    """
+    _create_lookup_tables(conn)
+    legacy = legacy_log_tables(conn)
+    if legacy:
+        for view in VIEW_SQL:
+            conn.execute(f"DROP VIEW IF EXISTS {view};")
+        resolver = NameResolver(conn)
+        for spec in legacy:
+            conn.execute(LOG_TABLE_SQL[spec.table].format(table=f"{spec.table}_new"))
+            _rebuild(spec, resolver).finish(conn)
+        conn.execute("DROP TABLE IF EXISTS temp._lookup_names;")
+    for table in LOG_TABLE_SQL:
+        conn.execute(LOG_TABLE_SQL[table].format(table=table))
+    for ddl in VIEW_SQL.values():
+        conn.execute(ddl)
+    return len(legacy)
+
+
+class LookupIndex:
+    """In-memory, sorted name lists per log column for the entry app's pick lists."""
+
+    def __init__(self, names: Dict[str, List[str]]) -> None:
+        self._names = {column: sorted(values, key=name_key) for column, values in names.items()}
+
+    def names(self, column: str) -> List[str]:
+        return self._names.get(column, [])
+
+
+def load_index(conn: sqlite3.Connection) -> LookupIndex:
+    """Read every current (not merged) name of each dictionary."""
+    return LookupIndex({
+        column: [row[0] for row in conn.execute(f"SELECT name FROM {lookup.table} WHERE merged_into IS NULL;")]
+        for column, lookup in LOOKUPS.items()
+    })
+
+
+def _find(conn: sqlite3.Connection, lookup: Lookup, name: str) -> int:
+    row = conn.execute(
+        f"SELECT COALESCE(merged_into, {lookup.key}) FROM {lookup.table} WHERE name_key = ?;", (name_key(name),)
+    ).fetchone()
+    if row is None:
+        raise ValueError(f"Unknown {lookup.label.lower()}: {name!r}")
+    return int(row[0])
+
+
+def merge_names(conn: sqlite3.Connection, column: str, source: str, target: str) -> int:
+    """Fold the `source` name into `target`; return the number of log rows repointed.
+
+    Later entries of `source` resolve to `target`, and the rollups of the
+    affected report days are refreshed. Run inside a write transaction.
+    """
+    lookup = LOOKUPS[column]
+    source_id, target_id = _find(conn, lookup, source), _find(conn, lookup, target)
+    if source_id == target_id:
+        return 0
+    spec = next(spec for spec in LOG_TABLES if column in spec.column_names)
+    keys = conn.execute(
+        f"""
+        SELECT DISTINCT r.project_id, r.report_date FROM {spec.table} l
+        JOIN DailyReports r ON r.report_id = l.report_id WHERE l.{lookup.key} = ?;
+        """,
+        (source_id,),
+    ).fetchall()
+    moved = conn.execute(f"UPDATE {spec.table} SET {lookup.key} = ? WHERE {lookup.key} = ?;", (target_id, source_id)).rowcount
+    conn.execute(
+        f"UPDATE {lookup.table} SET merged_into = ? WHERE {lookup.key} = ? OR merged_into = ?;",
+        (target_id, source_id, source_id),
+    )
+    refresh_rollups(conn, keys)
+    return moved
+
+
+def similar_names(conn: sqlite3.Connection, column: str, cutoff: float = 0.85) -> List[Tuple[str, str]]:
+    """Pairs of current names that look like variants of each other (e.g. plural or a typo)."""
+    names = load_index(conn).names(column)
+    keys = [name_key(n) for n in names]
+    pairs = []
+    for i, name in enumerate(names):
+        for match in difflib.get_close_matches(keys[i], keys[i + 1:], n=5, cutoff=cutoff):
+            pairs.append((name, names[keys.index(match, i + 1)]))
+    return pairs
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Upgrade to and maintain the trade/equipment/material/unit/supplier dictionaries.")
+    parser.add_argument("--db", default=DB_FILE_DEFAULT)
+    parser.add_argument("--vacuum", action="store_true", help="reclaim the space freed by the upgrade")
+    parser.add_argument("--similar", metavar="COLUMN", choices=list(LOOKUPS), help="list names that look like variants")
+    parser.add_argument("--merge", nargs=3, metavar=("COLUMN", "SOURCE", "TARGET"), help="fold SOURCE into TARGET")
+    args = parser.parse_args(argv)
+
+    if args.merge and args.merge[0] not in LOOKUPS:
+        parser.error(f"COLUMN must be one of {', '.join(LOOKUPS)}")
+    size = os.path.getsize(args.db) if os.path.exists(args.db) else 0
+    # Imported here: migrations imports this module for its steps.
+    from migrations import migrate, print_progress
+
+    conn = configure_connection(sqlite3.connect(args.db))
+    try:
+        migrate(conn, print_progress)
+        if args.merge:
+            column, source, target = args.merge
+            conn.execute("BEGIN IMMEDIATE;")
+            try:
+                moved = merge_names(conn, column, source, target)
+            except ValueError as e:
+                conn.rollback()
+                print(e)
+                return 1
+            conn.commit()
+            print(f"Merged {source!r} into {target!r} ({moved} log rows).")
+        if args.similar:
+            for a, b in similar_names(conn, args.similar):
+                print(f"{a!r} ~ {b!r}")
+        for column, lookup in LOOKUPS.items():
+            count = conn.execute(f"SELECT COUNT(*) FROM {lookup.table} WHERE merged_into IS NULL;").fetchone()[0]
+            print(f"  {lookup.table}: {count} names")
+        if args.vacuum:
+            conn.execute("VACUUM;")
+            print(f"Vacuumed: {size / 2**20:.1f} MB -> {os.path.getsize(args.db) / 2**20:.1f} MB")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,47 @@
+"""Combined Streamlit app with sidebar navigation.
+
+    streamlit run main.py
+    python main.py --profile-startup [--output startup_profile.json]
+
+Pages are listed in PAGES and their modules are only imported when selected,
+so a run pays for one page's imports. --profile-startup measures each page in
+a fresh interpreter against a copy of the database: the time to import
+streamlit, to import its module on top of that, and of its first render.
+"""
+import argparse
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
 import streamlit as st
 
-# Import the main functions from both apps
-from streamlit_entry import main as entry_main
-from streamlit_dashboard_sqlite import main as dashboard_main
+
+class Page(NamedTuple):
+    module: str
+    title: str
+    description: str
+
+
+PAGES: Dict[str, Page] = {
+    "📝 Data Entry": Page("streamlit_entry", "📝 Site Daily Report - Data Entry", "Create and save daily construction reports"),
+    "📊 Dashboard": Page("streamlit_dashboard_sqlite", "📊 Construction Reports Dashboard", "View and analyze saved reports"),
+}
+
+
+def load_page(page: Page) -> Callable[[], None]:
+    """Import the page's module on first use and return its main()."""
+    return importlib.import_module(page.module).main
+
 
 def main():
     """Combined Streamlit app with sidebar navigation."""
-    
+
     # Configure the page
     st.set_page_config(
         page_title="Construction Management System",
@@ -14,30 +49,112 @@ def main():
         layout="wide",
         initial_sidebar_state="expanded"
     )
-    
+
     # Sidebar navigation
     st.sidebar.title("🏗️ Construction Management")
     st.sidebar.markdown("---")
-    
+
     # Navigation options
     page = st.sidebar.selectbox(
         "Choose a page:",
-        ["📝 Data Entry", "📊 Dashboard"],
+        list(PAGES),
         index=0
     )
-    
+
     st.sidebar.markdown("---")
     st.sidebar.markdown("### About")
-    st.sidebar.markdown("**Data Entry**: Create and save daily construction reports")
-    st.sidebar.markdown("**Dashboard**: View and analyze saved reports")
-    
+    for name, info in PAGES.items():
+        st.sidebar.markdown(f"**{name.split(' ', 1)[1]}**: {info.description}")
+
     # Route to the selected page
-    if page == "📝 Data Entry":
-        st.title("📝 Site Daily Report - Data Entry")
-        entry_main()
-    elif page == "📊 Dashboard":
-        st.title("📊 Construction Reports Dashboard")
-        dashboard_main()
+    selected = PAGES[page]
+    st.title(selected.title)
+    load_page(selected)()
+
+
+# Run by profile_startup in a fresh interpreter: times `import streamlit` before main.py is imported.
+_PROFILE_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+import streamlit
+streamlit_import_s = time.perf_counter() - t0
+from main import profile_page
+print(json.dumps(profile_page(sys.argv[1], streamlit_import_s)))
+"""
+
+
+def profile_page(module: str, streamlit_import_s: float = 0.0) -> Dict[str, Any]:
+    """Measure one page in this interpreter: module import and first render (seconds)."""
+    from streamlit.testing.v1 import AppTest
+
+    t0 = time.perf_counter()
+    importlib.import_module(module)
+    t1 = time.perf_counter()
+    at = AppTest.from_string(f"import {module}\n{module}.main()\n", default_timeout=120)
+    at.run()
+    t2 = time.perf_counter()
+    return {
+        "module": module,
+        "streamlit_import_s": streamlit_import_s,
+        "import_s": t1 - t0,
+        "first_render_s": t2 - t1,
+        "exceptions": [e.value for e in at.exception],
+    }
+
+
+def profile_startup(output: Optional[str] = None, db_path: str = "construction_management.db") -> List[Dict[str, Any]]:
+    """Profile every page in a fresh subprocess so import times are cold; print a table.
+
+    Pages run in a scratch directory holding a copy of db_path, so first-run
+    schema upgrades do not touch the real database.
+    """
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [repo_dir, os.environ.get("PYTHONPATH")])))
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        if os.path.exists(db_path):
+            shutil.copy(db_path, os.path.join(workdir, os.path.basename(db_path)))
+        for page in PAGES.values():
+            proc = subprocess.run(
+                [sys.executable, "-c", _PROFILE_SNIPPET, page.module],
+                capture_output=True,
+                text=True,
+                check=True,
+                cwd=workdir,
+                env=env,
+            )
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(f"{'module':<30} {'streamlit':>10} {'import':>10} {'1st render':>11}")
+    for r in results:
+        print(
+            f"{r['module']:<30} {r['streamlit_import_s'] * 1000:>8.0f}ms {r['import_s'] * 1000:>8.0f}ms "
+            f"{r['first_render_s'] * 1000:>9.0f}ms"
+        )
+        for error in r["exceptions"]:
+            print(f"  exception: {error}")
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "pages": results}, f, indent=2)
+    return results
+
+
+def cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Construction Management System (run with `streamlit run main.py`).")
+    parser.add_argument("--profile-startup", action="store_true", help="report import and first-render time per page")
+    parser.add_argument("--db", default="construction_management.db", help="database copied for --profile-startup")
+    parser.add_argument("--output", help="write --profile-startup results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.profile_startup:
+        profile_startup(args.output, args.db)
+    else:
+        parser.print_help()
+    return 0
+
 
 if __name__ == "__main__":
-    main()
+    if st.runtime.exists():
+        main()
+    else:
+        sys.exit(cli())
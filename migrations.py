@@ -0,0 +1,225 @@
+"""Versioned schema migrations, tracked in PRAGMA user_version.
+
+    python migrations.py [--db construction_management.db] [--status] [--to VERSION]
+
+Each migration runs in one write transaction together with the
+user_version bump, so a failed step leaves the database at the previous
+version and the next start retries it. Steps that rebuild large tables copy
+them beforehand in chunks of short transactions (see db_schema.TableRebuild),
+reporting progress as they go and letting other connections write in
+between; the step's own transaction then only applies the rows changed
+meanwhile and swaps the tables.
+
+Databases created before this module are at version 0. Every step checks
+what already exists, so they are brought to the latest version whatever
+their previous upgrades were. Released steps must not change: add a new one.
+"""
+import argparse
+import sqlite3
+import sys
+from functools import partial
+from typing import Any, Callable, List, NamedTuple, Optional
+
+from db_pool import configure_connection
+from db_schema import RebuildProgress, create_indexes, track_changes
+from lookups import LOOKUPS, copy_legacy_logs, init_lookups
+from report_search import init_search
+from rollups import init_rollups
+
+DB_FILE_DEFAULT = "construction_management.db"
+
+# Called with a step's description and the fraction of it done.
+Progress = Callable[[str, float], None]
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], Any]  # runs inside the step's transaction
+    # Optional chunked work before that transaction (outside any transaction, resumable).
+    prepare: Optional[Callable[[sqlite3.Connection, Optional[RebuildProgress]], None]] = None
+
+
+BASE_TABLES_SQL: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS Projects (
+        project_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        project_name TEXT NOT NULL UNIQUE,
+        location TEXT,
+        start_date DATE,
+        end_date DATE
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS DailyReports (
+        report_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        project_id INTEGER NOT NULL,
+        report_date DATE NOT NULL,
+        weather TEXT,
+        site_conditions TEXT,
+        general_notes TEXT,
+        prepared_by TEXT,
+        FOREIGN KEY (project_id) REFERENCES Projects (project_id)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS WorkActivities (
+        activity_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        report_id INTEGER NOT NULL,
+        activity_description TEXT NOT NULL,
+        status TEXT CHECK(status IN ('Not Started', 'In Progress', 'Completed', 'Delayed')),
+        percent_complete INTEGER,
+        notes TEXT,
+        FOREIGN KEY (report_id) REFERENCES DailyReports (report_id)
+    );
+    """,
+]
+
+
+def create_base_tables(conn: sqlite3.Connection) -> None:
+    for ddl in BASE_TABLES_SQL:
+        conn.execute(ddl)
+
+
+# Session files applied by import_json_sessions.py, by content hash.
+IMPORTED_SESSIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS ImportedSessions (
+        content_hash TEXT PRIMARY KEY,
+        filename TEXT NOT NULL,
+        report_id INTEGER,
+        imported_at TEXT NOT NULL,
+        FOREIGN KEY (report_id) REFERENCES DailyReports (report_id)
+    );
+"""
+
+
+def create_import_table(conn: sqlite3.Connection) -> None:
+    conn.execute(IMPORTED_SESSIONS_SQL)
+
+
+# Firestore documents applied by firestore_replication.py, and the reports
+# replication created that no other writer has saved to since (see
+# streamlit_entry.upsert_report). Only those reports are deleted when their
+# documents go away. Links made before this table existed count as shared.
+REPLICATION_TABLES_SQL: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS ReplicatedDocuments (
+        collection_path TEXT NOT NULL,
+        doc_id TEXT NOT NULL,
+        content_hash TEXT NOT NULL,
+        report_id INTEGER,
+        replicated_at TEXT NOT NULL,
+        PRIMARY KEY (collection_path, doc_id)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ReplicatedReports (
+        report_id INTEGER PRIMARY KEY,
+        FOREIGN KEY (report_id) REFERENCES DailyReports (report_id)
+    );
+    """,
+]
+
+
+def create_replication_tables(conn: sqlite3.Connection) -> None:
+    for ddl in REPLICATION_TABLES_SQL:
+        conn.execute(ddl)
+
+
+# Tables whose updates and deletes make a Parquet snapshot outdated (see parquet_snapshot.py).
+COUNTED_TABLES: List[str] = [
+    "Projects",
+    "DailyReports",
+    "ManpowerLog",
+    "EquipmentLog",
+    "MaterialDeliveries",
+    "WorkActivities",
+    *(lookup.table for lookup in LOOKUPS.values()),
+]
+
+
+def create_change_counters(conn: sqlite3.Connection) -> None:
+    track_changes(conn, COUNTED_TABLES)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Projects, daily reports and work activities", create_base_tables),
+    Migration(2, "Lookup tables for trades, equipment, materials, units and suppliers", init_lookups, copy_legacy_logs),
+    Migration(3, "Secondary indexes and the unique report key", create_indexes),
+    Migration(4, "Daily rollup tables", init_rollups),
+    Migration(5, "Full-text search index", init_search),
+    Migration(6, "Imported session files", create_import_table),
+    Migration(7, "Replicated Firestore documents and the reports they own", create_replication_tables),
+    Migration(8, "Update and delete counters for the Parquet snapshot", create_change_counters),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version;").fetchone()[0])
+
+
+def pending(conn: sqlite3.Connection, target: int = LATEST_VERSION) -> List[Migration]:
+    """The migrations not yet applied to the database, in order, up to `target`."""
+    current = schema_version(conn)
+    return [step for step in MIGRATIONS if current < step.version <= target]
+
+
+def migrate(conn: sqlite3.Connection, progress: Optional[Progress] = None, target: int = LATEST_VERSION) -> List[int]:
+    """Apply the pending migrations in order; return the versions applied.
+
+    Run outside a transaction. A step another process finished in the
+    meantime is skipped.
+    """
+    applied = []
+    for step in pending(conn, target):
+        report = None if progress is None else partial(progress, step.description)
+        if report is not None:
+            report(0.0)
+        if step.prepare is not None:
+            step.prepare(conn, report)
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            if schema_version(conn) >= step.version:
+                conn.rollback()
+                continue
+            step.apply(conn)
+            conn.execute(f"PRAGMA user_version = {step.version};")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        applied.append(step.version)
+        if report is not None:
+            report(1.0)
+    return applied
+
+
+def print_progress(description: str, fraction: float) -> None:
+    print(f"  {description}: {fraction:.0%}", flush=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Upgrade a report database to the current schema.")
+    parser.add_argument("--db", default=DB_FILE_DEFAULT)
+    parser.add_argument("--status", action="store_true", help="only show the version and pending migrations")
+    parser.add_argument("--to", type=int, default=LATEST_VERSION, metavar="VERSION", help="stop after this version")
+    args = parser.parse_args(argv)
+
+    conn = configure_connection(sqlite3.connect(args.db))
+    try:
+        print(f"Schema version {schema_version(conn)} (latest {LATEST_VERSION}).")
+        if args.status:
+            for step in pending(conn, args.to):
+                print(f"  pending {step.version}: {step.description}")
+            return 0
+        applied = migrate(conn, print_progress, args.to)
+        print(f"Applied {len(applied)} migrations; now at version {schema_version(conn)}.")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
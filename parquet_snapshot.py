@@ -0,0 +1,329 @@
+"""Columnar Parquet snapshots of the report tables for fast dashboard cold starts.
+
+    python parquet_snapshot.py [--db construction_management.db] [--partition]
+
+A snapshot holds one Parquet file (or a hive-partitioned directory by
+project_id/year) per table plus a manifest with each table's primary-key
+high-water mark and update/delete counter (db_schema.track_changes). Loading
+reads the snapshot with memory-mapped, column-pruned reads and only fetches
+rows above the high-water mark from SQLite. Once rows of a table were edited
+or deleted after the snapshot was taken, that table is read from SQLite
+instead and `ensure_fresh` rebuilds the snapshot in the background.
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from db_pool import ConnectionManager, get_manager
+from db_schema import change_count
+from lookups import LOOKUPS, named
+from migrations import migrate
+from typed_tables import CATEGORY_COLUMNS, compact_frame, concat_compact
+
+DB_FILE_DEFAULT = "construction_management.db"
+MANIFEST = "_manifest.json"
+CHUNK_ROWS = 100_000
+MAX_AGE_SECONDS = 15 * 60
+MAX_DELTA_ROWS = 50_000
+
+# Table -> primary key used as the high-water mark.
+SNAPSHOT_TABLES: Dict[str, str] = {
+    "Projects": "project_id",
+    "DailyReports": "report_id",
+    "ManpowerLog": "log_id",
+    "EquipmentLog": "log_id",
+    "MaterialDeliveries": "delivery_id",
+    "WorkActivities": "activity_id",
+}
+
+_ARROW_TYPES = {"INTEGER": pa.int64(), "REAL": pa.float64()}
+
+_PARTITIONING = ds.partitioning(pa.schema([("project_id", pa.int64()), ("year", pa.int64())]), flavor="hive")
+
+_building: set = set()
+_building_lock = threading.Lock()
+
+
+def default_snapshot_dir(db_path: str) -> str:
+    """Return the snapshot directory used for db_path (next to the database file)."""
+    return os.path.splitext(os.path.abspath(db_path))[0] + "_snapshot"
+
+
+def _manager(db_path: str) -> ConnectionManager:
+    """The pooled manager for db_path, with the change counters installed."""
+    manager = get_manager(db_path)
+    manager.run_once(migrate)
+    return manager
+
+
+def _counted_tables(table: str) -> List[str]:
+    """Tables whose updates and deletes change what the snapshot holds for `table`."""
+    if named(table) == table:
+        return [table]
+    # Log tables are exported through their named view, which reads the lookup tables.
+    return [table, *(lookup.table for lookup in LOOKUPS.values())]
+
+
+def _arrow_schema(conn: sqlite3.Connection, table: str) -> pa.Schema:
+    """Map a table's declared SQLite column types to an Arrow schema."""
+    fields = []
+    for _, name, decl, *_ in conn.execute(f"PRAGMA table_info({table});"):
+        fields.append(pa.field(name, _ARROW_TYPES.get(decl.upper(), pa.string())))
+    return pa.schema(fields)
+
+
+def _partition_sql(table: str) -> str:
+    """SELECT for a table with project_id/year partition columns added."""
+    if table == "DailyReports":
+        return "SELECT *, CAST(substr(report_date, 1, 4) AS INTEGER) AS year FROM DailyReports WHERE report_id <= ?;"
+    pk = SNAPSHOT_TABLES[table]
+    return (
+        f"SELECT c.*, r.project_id AS project_id, CAST(substr(r.report_date, 1, 4) AS INTEGER) AS year "
+        f"FROM {named(table)} c JOIN DailyReports r ON r.report_id = c.report_id WHERE c.{pk} <= ?;"
+    )
+
+
+def _read_manifest(snapshot_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def build_snapshot(db_path: str, snapshot_dir: Optional[str] = None, partition: bool = False) -> Dict[str, Any]:
+    """Export every table to Parquet and atomically replace the snapshot; return the manifest.
+
+    All tables are read inside one read transaction so the snapshot is consistent.
+    """
+    snapshot_dir = snapshot_dir or default_snapshot_dir(db_path)
+    tmp_dir = f"{snapshot_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    manifest: Dict[str, Any] = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_ts": time.time(),
+        "partitioned": partition,
+        "tables": {},
+    }
+    try:
+        with _manager(db_path).reader() as conn:
+            conn.execute("BEGIN;")
+            hwm = {t: conn.execute(f"SELECT COALESCE(MAX({pk}), 0) FROM {t};").fetchone()[0] for t, pk in SNAPSHOT_TABLES.items()}
+            for table, pk in SNAPSHOT_TABLES.items():
+                schema = _arrow_schema(conn, named(table))
+                columns = schema.names
+                partitioned = partition and table != "Projects"
+                if partitioned:
+                    schema = schema.append(pa.field("year", pa.int64()))
+                    if "project_id" not in schema.names:
+                        schema = schema.append(pa.field("project_id", pa.int64()))
+                    sql = _partition_sql(table)
+                else:
+                    sql = f"SELECT * FROM {named(table)} WHERE {pk} <= ?;"
+                chunks = pd.read_sql_query(sql, conn, params=(hwm[table],), chunksize=CHUNK_ROWS)
+                batches = (pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False) for chunk in chunks)
+                if partitioned:
+                    table_dir = os.path.join(tmp_dir, table)
+                    ds.write_dataset(
+                        batches,
+                        table_dir,
+                        schema=schema,
+                        format="parquet",
+                        partitioning=["project_id", "year"],
+                        partitioning_flavor="hive",
+                        existing_data_behavior="overwrite_or_ignore",
+                    )
+                    if not os.path.isdir(table_dir):
+                        # An empty table writes no partitions; keep a schema-only file so it still loads.
+                        os.makedirs(table_dir)
+                        pq.write_table(schema.empty_table(), os.path.join(table_dir, "empty.parquet"))
+                else:
+                    with pq.ParquetWriter(os.path.join(tmp_dir, f"{table}.parquet"), schema) as writer:
+                        for batch in batches:
+                            writer.write_batch(batch)
+                manifest["tables"][table] = {
+                    "primary_key": pk,
+                    "high_water": hwm[table],
+                    "partitioned": partitioned,
+                    "columns": columns,
+                    "changes": change_count(conn, _counted_tables(table)),
+                }
+        with open(os.path.join(tmp_dir, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        old_dir = f"{snapshot_dir}.old-{os.getpid()}-{threading.get_ident()}"
+        if os.path.exists(snapshot_dir):
+            os.replace(snapshot_dir, old_dir)
+        os.replace(tmp_dir, snapshot_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return manifest
+
+
+def _read_snapshot_table(
+    snapshot_dir: str,
+    table: str,
+    info: Dict[str, Any],
+    columns: Optional[Sequence[str]],
+    typed: bool = False,
+) -> pd.DataFrame:
+    cols = list(columns) if columns else info["columns"]
+    if info["partitioned"]:
+        dataset = ds.dataset(os.path.join(snapshot_dir, table), format="parquet", partitioning=_PARTITIONING)
+        data = dataset.to_table(columns=cols)
+    else:
+        data = pq.read_table(os.path.join(snapshot_dir, f"{table}.parquet"), columns=cols, memory_map=True)
+    if typed:
+        # Dictionary-encode in Arrow so pandas gets categoricals without building a string per row.
+        for name in CATEGORY_COLUMNS:
+            if name in data.column_names:
+                data = data.set_column(data.column_names.index(name), name, pc.dictionary_encode(data[name]))
+        return compact_frame(data.to_pandas())
+    return data.to_pandas()
+
+
+def load_table(
+    db_path: str,
+    table: str,
+    columns: Optional[Sequence[str]] = None,
+    snapshot_dir: Optional[str] = None,
+    typed: bool = False,
+) -> pd.DataFrame:
+    """Load one table from the snapshot plus rows added in SQLite since it was taken.
+
+    Falls back to a plain SQLite read when no snapshot exists or rows of the
+    table were updated or deleted since. With typed=True the result has the
+    compact dtypes of typed_tables.compact_frame.
+    """
+    snapshot_dir = snapshot_dir or default_snapshot_dir(db_path)
+    manifest = _read_manifest(snapshot_dir)
+    select = ", ".join(columns) if columns else "*"
+    with _manager(db_path).reader() as conn:
+        info = manifest["tables"].get(table) if manifest else None
+        if info is None or info.get("changes") != change_count(conn, _counted_tables(table)):
+            df = pd.read_sql_query(f"SELECT {select} FROM {named(table)};", conn)
+            return compact_frame(df) if typed else df
+        delta = pd.read_sql_query(
+            f"SELECT {select} FROM {named(table)} WHERE {info['primary_key']} > ? ORDER BY {info['primary_key']};",
+            conn,
+            params=(info["high_water"],),
+        )
+    base = _read_snapshot_table(snapshot_dir, table, info, columns, typed)
+    if delta.empty:
+        return base
+    if typed:
+        return concat_compact([base, delta])
+    return pd.concat([base, delta.astype(base.dtypes.to_dict(), errors="ignore")], ignore_index=True)
+
+
+def load_tables(db_path: str, snapshot_dir: Optional[str] = None, typed: bool = True) -> Tuple[pd.DataFrame, ...]:
+    """Snapshot-backed equivalent of streamlit_dashboard_sqlite.load_tables.
+
+    Returns: (projects, reports, manpower, equipment, materials, activities)
+    """
+    order = ["Projects", "DailyReports", "ManpowerLog", "EquipmentLog", "MaterialDeliveries", "WorkActivities"]
+    return tuple(load_table(db_path, table, snapshot_dir=snapshot_dir, typed=typed) for table in order)
+
+
+def snapshot_status(db_path: str, snapshot_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Return the snapshot's age, how many rows SQLite has beyond its high-water marks
+    and which tables had rows updated or deleted since it was taken (`outdated`).
+    """
+    snapshot_dir = snapshot_dir or default_snapshot_dir(db_path)
+    manifest = _read_manifest(snapshot_dir)
+    if manifest is None:
+        return {"exists": False, "age_seconds": None, "delta_rows": None, "outdated": None, "building": _is_building(snapshot_dir)}
+    delta = 0
+    outdated = []
+    with _manager(db_path).reader() as conn:
+        for table, info in manifest["tables"].items():
+            delta += conn.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE {info['primary_key']} > ?;", (info["high_water"],)
+            ).fetchone()[0]
+            if info.get("changes") != change_count(conn, _counted_tables(table)):
+                outdated.append(table)
+    return {
+        "exists": True,
+        "created_at": manifest["created_at"],
+        "age_seconds": time.time() - manifest["created_ts"],
+        "delta_rows": delta,
+        "outdated": outdated,
+        "partitioned": manifest["partitioned"],
+        "building": _is_building(snapshot_dir),
+    }
+
+
+def _is_building(snapshot_dir: str) -> bool:
+    with _building_lock:
+        return snapshot_dir in _building
+
+
+def ensure_fresh(
+    db_path: str,
+    snapshot_dir: Optional[str] = None,
+    partition: bool = False,
+    max_age_seconds: float = MAX_AGE_SECONDS,
+    max_delta_rows: int = MAX_DELTA_ROWS,
+) -> bool:
+    """Start a background rebuild if the snapshot is missing or stale; return True if one started.
+
+    Stale means rows were updated or deleted since it was taken (those tables
+    are read from SQLite until the rebuild), more than max_delta_rows new rows,
+    or older than max_age_seconds with new rows.
+    """
+    snapshot_dir = snapshot_dir or default_snapshot_dir(db_path)
+    status = snapshot_status(db_path, snapshot_dir)
+    if status["exists"] and not status["outdated"]:
+        too_old = status["age_seconds"] > max_age_seconds and status["delta_rows"] > 0
+        if not too_old and status["delta_rows"] <= max_delta_rows:
+            return False
+
+    with _building_lock:
+        if snapshot_dir in _building:
+            return False
+        _building.add(snapshot_dir)
+
+    def run() -> None:
+        try:
+            build_snapshot(db_path, snapshot_dir, partition)
+        finally:
+            with _building_lock:
+                _building.discard(snapshot_dir)
+
+    threading.Thread(target=run, name="parquet-snapshot", daemon=True).start()
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build a Parquet snapshot of the report tables.")
+    parser.add_argument("--db", default=DB_FILE_DEFAULT)
+    parser.add_argument("--out", help="snapshot directory (default: <db name>_snapshot next to the DB)")
+    parser.add_argument("--partition", action="store_true", help="partition child tables by project_id/year")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    manifest = build_snapshot(args.db, args.out, args.partition)
+    print(f"Snapshot written in {time.perf_counter() - t0:.2f}s")
+    for table, info in manifest["tables"].items():
+        print(f"  {table}: up to {info['primary_key']} {info['high_water']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""Per-stage timing and row counts for the Streamlit pages.
+
+    REPORT_METRICS=1 streamlit run main.py
+
+Stages are wrapped with `@timed("stage")`, or `with measure("stage") as m:`
+plus `m.rows = n` for inline blocks. While metrics are off (the default) the
+wrapper is a single flag check and `measure` returns a shared no-op, so
+instrumented code pays next to nothing. While on, every call records its wall
+time and row count in a per-stage ring buffer, which the "Performance"
+sidebar panel summarizes as p50/p95, and appends one JSON line to the metrics
+log. The log rolls over to `<log>.1` once it reaches MAX_LOG_BYTES.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+METRICS_LOG = "metrics.jsonl"
+MAX_LOG_BYTES = 5 * 1024 * 1024
+SAMPLES_PER_STAGE = 500
+
+_enabled = os.environ.get("REPORT_METRICS", "") not in ("", "0")
+_log_path = os.environ.get("REPORT_METRICS_LOG", METRICS_LOG)
+_samples: Dict[str, Deque[Tuple[float, Optional[int]]]] = {}
+_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True, log_path: Optional[str] = None) -> None:
+    """Switch recording on or off for the whole process; optionally move the metrics log."""
+    global _enabled, _log_path
+    _enabled = on
+    if log_path:
+        _log_path = log_path
+
+
+def log_path() -> str:
+    return _log_path
+
+
+def record(stage: str, seconds: float, rows: Optional[int] = None, ok: bool = True) -> None:
+    """Store one measurement and append it to the metrics log."""
+    line = json.dumps(
+        {"ts": round(time.time(), 3), "stage": stage, "ms": round(seconds * 1000, 3), "rows": rows, "ok": ok}
+    )
+    with _lock:
+        _samples.setdefault(stage, deque(maxlen=SAMPLES_PER_STAGE)).append((seconds, rows))
+        try:
+            with open(_log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                full = f.tell() >= MAX_LOG_BYTES
+            if full:
+                os.replace(_log_path, f"{_log_path}.1")
+        except OSError:
+            # Metrics must never break the page; the in-memory samples still work.
+            pass
+
+
+class Measurement:
+    """Times a `with` block; set `rows` inside it to record a row count."""
+
+    __slots__ = ("stage", "rows", "_start")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+        self.rows: Optional[int] = None
+
+    def __enter__(self) -> "Measurement":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        record(self.stage, time.perf_counter() - self._start, self.rows, exc_type is None)
+        return False
+
+
+class _Disabled:
+    __slots__ = ("rows",)
+
+    def __enter__(self) -> "_Disabled":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_DISABLED = _Disabled()
+
+
+def measure(stage: str):
+    """Return a context manager that times its block as `stage` (a shared no-op while disabled)."""
+    return Measurement(stage) if _enabled else _DISABLED
+
+
+def _is_table(value: Any) -> bool:
+    return getattr(value, "ndim", None) == 2  # DataFrames and 2-D arrays
+
+
+def _default_rows(result: Any) -> Optional[int]:
+    """Row count of a table, a list of records or a dict of tables; None for anything else."""
+    if isinstance(result, (list, tuple)) or _is_table(result):
+        return len(result)
+    if isinstance(result, dict) and result and all(_is_table(v) for v in result.values()):
+        return sum(len(v) for v in result.values())
+    return None
+
+
+def timed(stage: str, rows: Optional[Callable[[Any], Optional[int]]] = _default_rows):
+    """Decorator that records each call of the function as `stage`.
+
+    `rows` derives a row count from the return value (len() by default).
+    """
+    def decorate(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                record(stage, time.perf_counter() - start, None, False)
+                raise
+            record(stage, time.perf_counter() - start, rows(result) if rows else None)
+            return result
+        return wrapper
+    return decorate
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def summary() -> List[Dict[str, Any]]:
+    """Return count, p50/p95 (ms) and median rows for every stage seen in this process."""
+    with _lock:
+        snapshot = {stage: list(samples) for stage, samples in _samples.items()}
+    out = []
+    for stage, samples in sorted(snapshot.items()):
+        seconds = sorted(s for s, _ in samples)
+        counts = sorted(r for _, r in samples if r is not None)
+        out.append({
+            "stage": stage,
+            "calls": len(samples),
+            "p50_ms": round(_percentile(seconds, 0.50) * 1000, 1),
+            "p95_ms": round(_percentile(seconds, 0.95) * 1000, 1),
+            "rows_p50": _percentile(counts, 0.50) if counts else None,
+        })
+    return out
+
+
+def reset() -> None:
+    """Forget the in-memory samples (the metrics log is kept)."""
+    with _lock:
+        _samples.clear()
+
+
+def render_panel() -> None:
+    """Collapsible "Performance" sidebar panel: on/off toggle and p50/p95 per stage."""
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander("⏱️ Performance"):
+        # No key: the widget is rebuilt from the process-wide flag on every run, so a
+        # session never pushes its own stale state back; only a click flips the flag.
+        on = enabled()
+        st.toggle(
+            "Record stage timings",
+            value=on,
+            on_change=enable,
+            args=(not on,),
+            help=f"Applies to every session of this server. Timings are also appended to {log_path()}.",
+        )
+        on = enabled()
+        stages = summary()
+        if stages:
+            st.dataframe(pd.DataFrame(stages), hide_index=True, use_container_width=True)
+            if st.button("Reset timings"):
+                reset()
+        else:
+            st.caption("No timings recorded yet." if on else "Turn on to time loading, queries, saves and rendering.")
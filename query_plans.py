@@ -0,0 +1,114 @@
+"""Check that the apps' queries are served by indexes.
+
+Runs EXPLAIN QUERY PLAN for every query the dashboard and entry app issue and
+reports any that fall back to a full table SCAN. Usage:
+
+    python query_plans.py [path/to/construction_management.db]
+
+The database is never written: one with pending migrations is checked on an
+upgraded temporary copy. Exits with status 1 if any query regresses.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+from typing import Any, Dict, List, NamedTuple, Tuple, Union
+
+from migrations import migrate, pending
+from report_queries import (
+    CHILD_ROWS_SQL,
+    PORTFOLIO_OVERVIEW_SQL,
+    PROJECTS_WITH_REPORTS_SQL,
+    REPORT_DATES_SQL,
+    REPORT_HEADER_SQL,
+    REPORT_SPAN_SQL,
+)
+
+DB_FILE_DEFAULT = "construction_management.db"
+
+
+class QueryCheck(NamedTuple):
+    name: str
+    sql: str
+    params: Union[Tuple[Any, ...], Dict[str, Any]]
+    # Listing queries may walk a whole index in order; lookups must SEARCH.
+    allow_index_scan: bool = False
+
+
+QUERY_CHECKS: List[QueryCheck] = [
+    QueryCheck("dashboard: projects with reports", PROJECTS_WITH_REPORTS_SQL, (), allow_index_scan=True),
+    QueryCheck("dashboard: report dates for project", REPORT_DATES_SQL, (1,)),
+    QueryCheck("dashboard: report header", REPORT_HEADER_SQL, (1,)),
+    QueryCheck("dashboard: report date span for project", REPORT_SPAN_SQL, (1,)),
+    # Walks Projects once; every per-project column must seek.
+    QueryCheck(
+        "portfolio: overview per project",
+        PORTFOLIO_OVERVIEW_SQL,
+        {"week_start": "2024-01-01", "week_end": "2024-01-07"},
+        allow_index_scan=True,
+    ),
+    *[QueryCheck(f"dashboard: {table} rows for report", sql, (1,)) for table, sql in CHILD_ROWS_SQL.items()],
+    QueryCheck("entry: project lookup by name", "SELECT project_id FROM Projects WHERE project_name = ?;", ("x",)),
+]
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: Union[Tuple[Any, ...], Dict[str, Any]]) -> List[str]:
+    """Return the detail column of EXPLAIN QUERY PLAN for a query."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+def plan_problems(check: QueryCheck, plan: List[str]) -> List[str]:
+    """Return the plan lines that violate the check's expectations."""
+    problems = []
+    for detail in plan:
+        if not detail.startswith("SCAN"):
+            continue
+        if check.allow_index_scan and "USING" in detail and "INDEX" in detail:
+            continue
+        problems.append(detail)
+    return problems
+
+
+def check_query_plans(conn: sqlite3.Connection) -> List[Tuple[str, List[str]]]:
+    """Run every query check and return (name, offending plan lines) for failures."""
+    failures = []
+    for check in QUERY_CHECKS:
+        problems = plan_problems(check, explain(conn, check.sql, check.params))
+        if problems:
+            failures.append((check.name, problems))
+    return failures
+
+
+def check_database(db_path: str) -> List[Tuple[str, List[str]]]:
+    """Run the checks against db_path at the latest schema version without modifying it."""
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    try:
+        if not pending(conn):
+            return check_query_plans(conn)
+        with tempfile.TemporaryDirectory() as workdir:
+            copy = sqlite3.connect(os.path.join(workdir, "query_plans.db"))
+            try:
+                conn.backup(copy)
+                migrate(copy)
+                return check_query_plans(copy)
+            finally:
+                copy.close()
+    finally:
+        conn.close()
+
+
+def main(argv: List[str]) -> int:
+    db_path = argv[1] if len(argv) > 1 else DB_FILE_DEFAULT
+    if not os.path.exists(db_path):
+        print(f"Database not found: {db_path}")
+        return 1
+    failures = check_database(db_path)
+
+    for name, problems in failures:
+        print(f"FAIL {name}: {'; '.join(problems)}")
+    print(f"{len(QUERY_CHECKS) - len(failures)}/{len(QUERY_CHECKS)} queries use indexes.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
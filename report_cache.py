@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# One long-lived probe connection per database file. PRAGMA data_version only
+# changes between calls on the same connection, so the probe must persist.
+_probes: Dict[str, sqlite3.Connection] = {}
+_probes_lock = threading.Lock()
+
+
+def _file_stat(path: str) -> Tuple[int, int]:
+    """Return (mtime_ns, size) of a file, or (0, 0) if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0, 0
+    return st.st_mtime_ns, st.st_size
+
+
+def _data_version(db_path: str) -> Optional[int]:
+    """Return PRAGMA data_version from the probe connection for db_path, or None."""
+    key = os.path.abspath(db_path)
+    with _probes_lock:
+        conn = _probes.get(key)
+        try:
+            if conn is None:
+                conn = sqlite3.connect(f"file:{key}?mode=ro", uri=True, check_same_thread=False)
+                _probes[key] = conn
+            return int(conn.execute("PRAGMA data_version;").fetchone()[0])
+        except sqlite3.Error:
+            _probes.pop(key, None)
+            return None
+
+
+def db_version_key(db_path: str) -> Tuple[Any, ...]:
+    """Return a value that changes whenever the database at db_path is modified.
+
+    Combines PRAGMA data_version with the size/mtime of the database and its WAL
+    file, so commits from other connections or processes are detected.
+    """
+    return (_data_version(db_path), _file_stat(db_path), _file_stat(db_path + "-wal"))
+
+
+class VersionedCache:
+    """Small LRU cache whose entries are only valid for one database version."""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: Hashable, version: Any, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key if it was loaded at this version, else call loader."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """Drop all entries and reset the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the number of cached entries."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
@@ -0,0 +1,117 @@
+import sqlite3
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from lookups import named
+
+# Child tables keyed by report_id, with the primary key column that the UI hides.
+CHILD_TABLES: Dict[str, str] = {
+    "ManpowerLog": "log_id",
+    "EquipmentLog": "log_id",
+    "MaterialDeliveries": "delivery_id",
+    "WorkActivities": "activity_id",
+}
+
+PROJECTS_WITH_REPORTS_SQL = """
+    SELECT p.project_id, p.project_name
+    FROM Projects p
+    WHERE EXISTS (SELECT 1 FROM DailyReports r WHERE r.project_id = p.project_id)
+    ORDER BY p.project_name;
+"""
+
+REPORT_DATES_SQL = """
+    SELECT report_id, report_date
+    FROM DailyReports
+    WHERE project_id = ?
+    ORDER BY report_date DESC, report_id DESC;
+"""
+
+REPORT_HEADER_SQL = """
+    SELECT r.report_id, r.project_id, p.project_name, r.report_date, r.weather,
+           r.site_conditions, r.general_notes, r.prepared_by
+    FROM DailyReports r
+    LEFT JOIN Projects p ON p.project_id = r.project_id
+    WHERE r.report_id = ?;
+"""
+
+REPORT_SPAN_SQL = "SELECT MIN(report_date), MAX(report_date) FROM DailyReports WHERE project_id = ?;"
+ALL_REPORTS_SPAN_SQL = "SELECT MIN(report_date), MAX(report_date) FROM DailyReports;"
+
+# One row per project. Each column is a correlated subquery that seeks the
+# (project_id, report_date) indexes and rollup keys, so the cost grows with
+# the number of projects and one week of rollup rows, not the whole history.
+# Delayed activities are counted on each project's latest report.
+PORTFOLIO_OVERVIEW_SQL = """
+    SELECT p.project_id, p.project_name,
+           (SELECT MAX(r.report_date) FROM DailyReports r WHERE r.project_id = p.project_id) AS last_report,
+           (SELECT COALESCE(SUM(m.man_hours), 0) FROM ManpowerDailyRollup m
+            WHERE m.project_id = p.project_id AND m.report_date BETWEEN :week_start AND :week_end) AS labor_hours,
+           (SELECT COUNT(DISTINCT e.equipment_name) FROM EquipmentDailyRollup e
+            WHERE e.project_id = p.project_id AND e.report_date BETWEEN :week_start AND :week_end AND e.hours > 0) AS active_equipment,
+           (SELECT COUNT(*) FROM WorkActivities a
+            WHERE a.report_id = (SELECT r.report_id FROM DailyReports r WHERE r.project_id = p.project_id
+                                 ORDER BY r.report_date DESC LIMIT 1)
+              AND a.status = 'Delayed') AS delayed_activities
+    FROM Projects p
+    ORDER BY p.project_name;
+"""
+
+# Read through the lookups' named views, so rows carry names rather than keys.
+CHILD_ROWS_SQL = {table: f"SELECT * FROM {named(table)} WHERE report_id = ? ORDER BY {pk};" for table, pk in CHILD_TABLES.items()}
+
+
+def fetch_projects_with_reports(conn: sqlite3.Connection) -> pd.DataFrame:
+    """Return (project_id, project_name) for every project that has at least one report."""
+    return pd.read_sql_query(PROJECTS_WITH_REPORTS_SQL, conn)
+
+
+def fetch_report_dates(conn: sqlite3.Connection, project_id: int) -> pd.DataFrame:
+    """Return (report_id, report_date) for one project, newest first."""
+    return pd.read_sql_query(REPORT_DATES_SQL, conn, params=(int(project_id),))
+
+
+def fetch_report_span(conn: sqlite3.Connection, project_id: Optional[int] = None) -> Tuple[Optional[str], Optional[str]]:
+    """Return the first and last report date of one project (or of all of them)."""
+    if project_id is None:
+        first, last = conn.execute(ALL_REPORTS_SPAN_SQL).fetchone()
+    else:
+        first, last = conn.execute(REPORT_SPAN_SQL, (int(project_id),)).fetchone()
+    return first, last
+
+
+def fetch_portfolio_overview(conn: sqlite3.Connection, week_start: str, week_end: str) -> pd.DataFrame:
+    """Return (project_id, project_name, last_report, labor_hours, active_equipment, delayed_activities) per project.
+
+    Labor hours and active equipment (distinct types with hours logged) cover
+    report dates from week_start to week_end inclusive.
+    """
+    return pd.read_sql_query(PORTFOLIO_OVERVIEW_SQL, conn, params={"week_start": str(week_start), "week_end": str(week_end)})
+
+
+def fetch_report_header(conn: sqlite3.Connection, report_id: int) -> Optional[pd.Series]:
+    """Return the DailyReports row (joined with its project name) or None if missing."""
+    df = pd.read_sql_query(REPORT_HEADER_SQL, conn, params=(int(report_id),))
+    if df.empty:
+        return None
+    return df.iloc[0]
+
+
+def fetch_child_rows(conn: sqlite3.Connection, table: str, report_id: int) -> pd.DataFrame:
+    """Return the rows of one child table that belong to a single report."""
+    if table not in CHILD_ROWS_SQL:
+        raise ValueError(f"Unknown child table: {table}")
+    return pd.read_sql_query(CHILD_ROWS_SQL[table], conn, params=(int(report_id),))
+
+
+def fetch_report_children(conn: sqlite3.Connection, report_id: int) -> Dict[str, pd.DataFrame]:
+    """Return every child table's rows for a single report, keyed by table name."""
+    return {table: fetch_child_rows(conn, table, report_id) for table in CHILD_TABLES}
+
+
+def fetch_table_counts(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Return row counts for the main tables without loading their contents."""
+    counts = {}
+    for table in ["Projects", "DailyReports", *CHILD_TABLES]:
+        counts[table] = int(conn.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0])
+    return counts
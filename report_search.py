@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    # Only search_reports needs pandas; migrations import this module for init_search.
+    import pandas as pd
+
+# Full-text index with one document per report (rowid = report_id). Header
+# text is copied on insert/update, and the activity and material columns are
+# re-aggregated for the affected report whenever its child rows change, so
+# every writer (entry app, importer, replication, generator) keeps it in sync.
+SEARCH_TABLE_SQL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS ReportSearch USING fts5(
+        weather, site_conditions, general_notes, activities, materials,
+        tokenize = 'unicode61 remove_diacritics 2'
+    );
+"""
+
+_ACTIVITIES_TEXT = """
+    (SELECT group_concat(activity_description || ' ' || COALESCE(notes, ''), char(10))
+     FROM WorkActivities WHERE report_id = {report_id})
+"""
+
+_MATERIALS_TEXT = """
+    (SELECT group_concat(material_name || ' ' || COALESCE(supplier, '') || ' ' || COALESCE(ticket_number, ''), char(10))
+     FROM MaterialDeliveriesNamed WHERE report_id = {report_id})
+"""
+
+
+def _child_triggers(table: str, column: str, text_sql: str) -> List[str]:
+    statements = []
+    for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        statements.append(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_search_{event.lower()}
+            AFTER {event} ON {table} BEGIN
+                UPDATE ReportSearch SET {column} = {text_sql.format(report_id=f"{row}.report_id")}
+                WHERE rowid = {row}.report_id;
+            END;
+            """
+        )
+    # A row moved to another report also changes the report it left.
+    statements.append(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_search_move
+        AFTER UPDATE OF report_id ON {table} WHEN OLD.report_id <> NEW.report_id BEGIN
+            UPDATE ReportSearch SET {column} = {text_sql.format(report_id="OLD.report_id")}
+            WHERE rowid = OLD.report_id;
+        END;
+        """
+    )
+    return statements
+
+
+SEARCH_TRIGGERS: List[str] = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_dailyreports_search_insert AFTER INSERT ON DailyReports BEGIN
+        INSERT INTO ReportSearch (rowid, weather, site_conditions, general_notes)
+        VALUES (NEW.report_id, NEW.weather, NEW.site_conditions, NEW.general_notes);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_dailyreports_search_update
+    AFTER UPDATE OF weather, site_conditions, general_notes ON DailyReports BEGIN
+        UPDATE ReportSearch
+        SET weather = NEW.weather, site_conditions = NEW.site_conditions, general_notes = NEW.general_notes
+        WHERE rowid = NEW.report_id;
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_dailyreports_search_delete AFTER DELETE ON DailyReports BEGIN
+        DELETE FROM ReportSearch WHERE rowid = OLD.report_id;
+    END;
+    """,
+    *_child_triggers("WorkActivities", "activities", _ACTIVITIES_TEXT),
+    *_child_triggers("MaterialDeliveries", "materials", _MATERIALS_TEXT),
+]
+
+SEARCH_SQL = """
+    SELECT r.report_id, p.project_name, r.report_date,
+           snippet(ReportSearch, -1, '**', '**', ' … ', 12) AS snippet,
+           bm25(ReportSearch) AS rank
+    FROM ReportSearch
+    JOIN DailyReports r ON r.report_id = ReportSearch.rowid
+    LEFT JOIN Projects p ON p.project_id = r.project_id
+    WHERE ReportSearch MATCH ? {project_filter}
+    ORDER BY rank
+    LIMIT ?;
+"""
+
+
+def init_search(conn: sqlite3.Connection) -> None:
+    """Create the search index and its triggers; fill it from existing reports when it is new (caller commits)."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'ReportSearch';").fetchone()
+    conn.execute(SEARCH_TABLE_SQL)
+    for statement in SEARCH_TRIGGERS:
+        conn.execute(statement)
+    if not exists:
+        rebuild_search(conn)
+
+
+def rebuild_search(conn: sqlite3.Connection) -> None:
+    """Recompute every search document from the report tables (caller commits)."""
+    conn.execute("DELETE FROM ReportSearch;")
+    conn.execute(
+        f"""
+        INSERT INTO ReportSearch (rowid, weather, site_conditions, general_notes, activities, materials)
+        SELECT r.report_id, r.weather, r.site_conditions, r.general_notes,
+               {_ACTIVITIES_TEXT.format(report_id="r.report_id")},
+               {_MATERIALS_TEXT.format(report_id="r.report_id")}
+        FROM DailyReports r;
+        """
+    )
+    conn.execute("INSERT INTO ReportSearch (ReportSearch) VALUES ('optimize');")
+
+
+def to_match_query(text: str) -> str:
+    """Turn free text into an FTS5 query where every word or "quoted phrase" must match.
+
+    Punctuation such as '#' in "Tower #23" is dropped instead of being parsed
+    as FTS5 syntax; a trailing '*' keeps prefix matching ("deliv*").
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\w+\*?)', text):
+        if phrase:
+            tokens = re.findall(r"\w+", phrase)
+            if tokens:
+                terms.append('"' + " ".join(tokens) + '"')
+        elif word.endswith("*"):
+            terms.append(f'"{word[:-1]}"*')
+        else:
+            terms.append(f'"{word}"')
+    return " ".join(terms)
+
+
+def search_reports(
+    conn: sqlite3.Connection,
+    text: str,
+    project_id: Optional[int] = None,
+    limit: int = 50,
+) -> pd.DataFrame:
+    """Return (report_id, project_name, report_date, snippet, rank) for the best matches, best first."""
+    import pandas as pd
+
+    query = to_match_query(text)
+    if not query:
+        return pd.DataFrame(columns=["report_id", "project_name", "report_date", "snippet", "rank"])
+    params: list = [query]
+    project_filter = ""
+    if project_id is not None:
+        project_filter = "AND r.project_id = ?"
+        params.append(int(project_id))
+    params.append(int(limit))
+    return pd.read_sql_query(SEARCH_SQL.format(project_filter=project_filter), conn, params=params)
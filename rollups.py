@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Iterable, Optional, Tuple
+
+if TYPE_CHECKING:
+    # Only the trend queries need pandas; writers import this module for refresh_rollups.
+    import pandas as pd
+
+# Pre-aggregated per project/day totals for trend charts. They are refreshed for
+# the affected (project_id, report_date) inside the same transaction that writes
+# the raw logs, so charts read a few hundred rows instead of the full logs.
+ROLLUP_TABLES = {
+    "ManpowerDailyRollup": """
+        CREATE TABLE IF NOT EXISTS ManpowerDailyRollup (
+            project_id INTEGER NOT NULL,
+            report_date DATE NOT NULL,
+            trade TEXT NOT NULL,
+            workers INTEGER NOT NULL,
+            hours REAL NOT NULL,
+            man_hours REAL NOT NULL,
+            PRIMARY KEY (project_id, report_date, trade)
+        ) WITHOUT ROWID;
+    """,
+    "EquipmentDailyRollup": """
+        CREATE TABLE IF NOT EXISTS EquipmentDailyRollup (
+            project_id INTEGER NOT NULL,
+            report_date DATE NOT NULL,
+            equipment_name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            hours REAL NOT NULL,
+            PRIMARY KEY (project_id, report_date, equipment_name)
+        ) WITHOUT ROWID;
+    """,
+    "MaterialDailyRollup": """
+        CREATE TABLE IF NOT EXISTS MaterialDailyRollup (
+            project_id INTEGER NOT NULL,
+            report_date DATE NOT NULL,
+            material_name TEXT NOT NULL,
+            unit TEXT NOT NULL,
+            supplier TEXT NOT NULL,
+            quantity REAL NOT NULL,
+            deliveries INTEGER NOT NULL,
+            PRIMARY KEY (project_id, report_date, material_name, unit, supplier)
+        ) WITHOUT ROWID;
+    """,
+}
+
+# SELECTs that aggregate raw logs; {where} restricts them to some reports.
+# They group by the lookup keys (see lookups.py) and store the names.
+_ROLLUP_SOURCES = {
+    "ManpowerDailyRollup": """
+        INSERT INTO ManpowerDailyRollup (project_id, report_date, trade, workers, hours, man_hours)
+        SELECT r.project_id, r.report_date, t.name,
+               SUM(m.number_of_workers), SUM(m.hours_worked), SUM(m.number_of_workers * m.hours_worked)
+        FROM DailyReports r
+        JOIN ManpowerLog m ON m.report_id = r.report_id
+        JOIN Trades t ON t.trade_id = m.trade_id
+        {where}
+        GROUP BY r.project_id, r.report_date, m.trade_id;
+    """,
+    "EquipmentDailyRollup": """
+        INSERT INTO EquipmentDailyRollup (project_id, report_date, equipment_name, quantity, hours)
+        SELECT r.project_id, r.report_date, t.name, SUM(e.quantity), SUM(e.hours_used)
+        FROM DailyReports r
+        JOIN EquipmentLog e ON e.report_id = r.report_id
+        JOIN EquipmentTypes t ON t.equipment_id = e.equipment_id
+        {where}
+        GROUP BY r.project_id, r.report_date, e.equipment_id;
+    """,
+    "MaterialDailyRollup": """
+        INSERT INTO MaterialDailyRollup (project_id, report_date, material_name, unit, supplier, quantity, deliveries)
+        SELECT r.project_id, r.report_date, m.name, COALESCE(u.name, ''), COALESCE(s.name, ''),
+               SUM(d.quantity), COUNT(*)
+        FROM DailyReports r
+        JOIN MaterialDeliveries d ON d.report_id = r.report_id
+        JOIN Materials m ON m.material_id = d.material_id
+        LEFT JOIN Units u ON u.unit_id = d.unit_id
+        LEFT JOIN Suppliers s ON s.supplier_id = d.supplier_id
+        {where}
+        GROUP BY r.project_id, r.report_date, d.material_id, d.unit_id, d.supplier_id;
+    """,
+}
+
+# Bucket expressions over report_date (ISO dates). Weeks start on Monday.
+PERIODS = {
+    "day": "report_date",
+    "week": "date(report_date, '-6 days', 'weekday 1')",
+    "month": "strftime('%Y-%m-01', report_date)",
+}
+
+
+# Auto-grouping picks the finest period that keeps a chart at or under this many points.
+MAX_TREND_POINTS = 200
+_PERIOD_DAYS = {"day": 1, "week": 7, "month": 30.44}
+
+
+def choose_period(start: date, end: date, max_points: int = MAX_TREND_POINTS) -> str:
+    """Return "day", "week" or "month" for a chart from start to end (inclusive).
+
+    About 6 months stays daily, up to about 3.8 years is weekly (3 years is
+    ~157 points) and longer ranges are monthly.
+    """
+    days = (end - start).days + 1
+    for period, length in _PERIOD_DAYS.items():
+        if days / length <= max_points:
+            return period
+    return "month"
+
+
+def week_bounds(day: date) -> Tuple[date, date]:
+    """Return the Monday and Sunday of day's week, the same weeks as the "week" period."""
+    monday = day - timedelta(days=day.weekday())
+    return monday, monday + timedelta(days=6)
+
+
+def init_rollups(conn: sqlite3.Connection) -> None:
+    """Create the rollup tables; backfill them from the raw logs when they are new (caller commits)."""
+    existing = {
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN (%s);" % ",".join("?" * len(ROLLUP_TABLES)),
+            list(ROLLUP_TABLES),
+        )
+    }
+    for ddl in ROLLUP_TABLES.values():
+        conn.execute(ddl)
+    if existing != set(ROLLUP_TABLES):
+        rebuild_rollups(conn)
+
+
+def rebuild_rollups(conn: sqlite3.Connection) -> None:
+    """Recompute every rollup table from the raw logs (caller commits)."""
+    for table, source in _ROLLUP_SOURCES.items():
+        conn.execute(f"DELETE FROM {table};")
+        conn.execute(source.format(where=""))
+
+
+def refresh_rollups(conn: sqlite3.Connection, keys: Iterable[Tuple[int, str]]) -> None:
+    """Recompute the rollup rows for each (project_id, report_date) key.
+
+    Call inside the transaction that changed the raw logs for those keys.
+    """
+    for project_id, report_date in set(keys):
+        for table, source in _ROLLUP_SOURCES.items():
+            conn.execute(f"DELETE FROM {table} WHERE project_id = ? AND report_date = ?;", (project_id, report_date))
+            conn.execute(source.format(where="WHERE r.project_id = ? AND r.report_date = ?"), (project_id, report_date))
+
+
+def _bucket(period: str) -> str:
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period: {period}")
+    return PERIODS[period]
+
+
+def _filters(project_id: Optional[int], start: Optional[str], end: Optional[str], alias: str = "") -> Tuple[str, list]:
+    clauses, params = [], []
+    if project_id is not None:
+        clauses.append(f"{alias}project_id = ?")
+        params.append(int(project_id))
+    if start:
+        clauses.append(f"{alias}report_date >= ?")
+        params.append(str(start))
+    if end:
+        clauses.append(f"{alias}report_date <= ?")
+        params.append(str(end))
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def manpower_trend(
+    conn: sqlite3.Connection,
+    project_id: Optional[int] = None,
+    period: str = "week",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> pd.DataFrame:
+    """Return (period, trade, workers, hours, man_hours) per bucket."""
+    where, params = _filters(project_id, start, end)
+    sql = f"""
+        SELECT {_bucket(period)} AS period, trade,
+               SUM(workers) AS workers, SUM(hours) AS hours, SUM(man_hours) AS man_hours
+        FROM ManpowerDailyRollup {where}
+        GROUP BY period, trade ORDER BY period, trade;
+    """
+    import pandas as pd
+
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def equipment_trend(
+    conn: sqlite3.Connection,
+    project_id: Optional[int] = None,
+    period: str = "month",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> pd.DataFrame:
+    """Return (period, project_id, project_name, quantity, hours) per bucket."""
+    where, params = _filters(project_id, start, end, alias="e.")
+    sql = f"""
+        SELECT {_bucket(period)} AS period, e.project_id, p.project_name,
+               SUM(e.quantity) AS quantity, SUM(e.hours) AS hours
+        FROM EquipmentDailyRollup e JOIN Projects p ON p.project_id = e.project_id
+        {where}
+        GROUP BY period, e.project_id ORDER BY period, p.project_name;
+    """
+    import pandas as pd
+
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def material_totals(
+    conn: sqlite3.Connection,
+    project_id: Optional[int] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> pd.DataFrame:
+    """Return (supplier, material_name, unit, quantity, deliveries) totals."""
+    where, params = _filters(project_id, start, end)
+    sql = f"""
+        SELECT supplier, material_name, unit, SUM(quantity) AS quantity, SUM(deliveries) AS deliveries
+        FROM MaterialDailyRollup {where}
+        GROUP BY supplier, material_name, unit ORDER BY supplier, material_name;
+    """
+    import pandas as pd
+
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def project_timeline(
+    conn: sqlite3.Connection,
+    project_id: Optional[int] = None,
+    period: str = "week",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> pd.DataFrame:
+    """Return (period, man_hours, headcount, equipment_hours, deliveries) per bucket.
+
+    headcount is the average number of workers on the reported days of the
+    bucket. Buckets without any logs are omitted.
+    """
+    where, params = _filters(project_id, start, end)
+    sql = f"""
+        SELECT {_bucket(period)} AS period,
+               SUM(man_hours) AS man_hours,
+               ROUND(SUM(workers) * 1.0 / NULLIF(COUNT(DISTINCT CASE WHEN source = 'm' THEN report_date END), 0), 1) AS headcount,
+               SUM(equipment_hours) AS equipment_hours,
+               SUM(deliveries) AS deliveries
+        FROM (
+            SELECT 'm' AS source, report_date, workers, man_hours, 0 AS equipment_hours, 0 AS deliveries
+            FROM ManpowerDailyRollup {where}
+            UNION ALL
+            SELECT 'e', report_date, 0, 0, hours, 0 FROM EquipmentDailyRollup {where}
+            UNION ALL
+            SELECT 'd', report_date, 0, 0, 0, deliveries FROM MaterialDailyRollup {where}
+        )
+        GROUP BY period ORDER BY period;
+    """
+    import pandas as pd
+
+    return pd.read_sql_query(sql, conn, params=params * 3)
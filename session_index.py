@@ -0,0 +1,186 @@
+"""SQLite index of the entry app's session JSON files.
+
+The index lives next to the files (json_data/.session_index.db) and records
+filename, project, report date, author and mtime, so the "Previous sessions"
+picker pages and searches the index instead of listing and stat-ing the
+directory on every rerun. The directory is only rescanned when its own mtime
+changes (a file was added, removed or renamed outside the app), and then only
+new or modified files are parsed.
+
+Session file sequence numbers come from a per-day counter bumped inside a
+BEGIN IMMEDIATE transaction, so concurrent sessions (and processes) never get
+the same name.
+"""
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+from db_pool import get_manager
+
+INDEX_FILE = ".session_index.db"
+
+
+def init_session_index(conn: sqlite3.Connection) -> None:
+    """Create the session index tables."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS JsonSessions (
+            filename TEXT PRIMARY KEY,
+            project_name TEXT,
+            report_date TEXT,
+            prepared_by TEXT,
+            mtime REAL NOT NULL,
+            size INTEGER NOT NULL
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jsonsessions_mtime ON JsonSessions (mtime DESC);")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS SessionSequence (
+            day TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL
+        );
+        """
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS SessionIndexState (key TEXT PRIMARY KEY, value TEXT);")
+    conn.commit()
+
+
+def _manager(path: str):
+    os.makedirs(path, exist_ok=True)
+    manager = get_manager(os.path.join(path, INDEX_FILE))
+    manager.run_once(init_session_index)
+    return manager
+
+
+def _summary(filepath: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Return (project_name, report_date, prepared_by) from a session file, or Nones if unreadable."""
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None, None, None
+    if not isinstance(payload, dict):
+        return None, None, None
+    return payload.get("project_name"), payload.get("report_date"), payload.get("prepared_by")
+
+
+def refresh_index(path: str, force: bool = False) -> int:
+    """Bring the index in line with the directory if it changed; return how many entries changed.
+
+    Skips the scan when the directory mtime matches the last scan unless `force`.
+    """
+    manager = _manager(path)
+    dir_mtime = str(os.stat(path).st_mtime_ns)
+    with manager.reader() as conn:
+        row = conn.execute("SELECT value FROM SessionIndexState WHERE key = 'dir_mtime';").fetchone()
+        if row and row[0] == dir_mtime and not force:
+            return 0
+        known = {name: (mtime, size) for name, mtime, size in conn.execute("SELECT filename, mtime, size FROM JsonSessions;")}
+
+    changed = []
+    present = set()
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.endswith(".json"):
+                continue
+            present.add(entry.name)
+            stat = entry.stat()
+            if known.get(entry.name) != (stat.st_mtime, stat.st_size):
+                changed.append((entry.name, *_summary(entry.path), stat.st_mtime, stat.st_size))
+    removed = [name for name in known if name not in present]
+
+    with manager.writer() as conn:
+        conn.executemany(
+            """
+            INSERT INTO JsonSessions (filename, project_name, report_date, prepared_by, mtime, size)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(filename) DO UPDATE SET
+                project_name = excluded.project_name, report_date = excluded.report_date,
+                prepared_by = excluded.prepared_by, mtime = excluded.mtime, size = excluded.size;
+            """,
+            changed,
+        )
+        conn.executemany("DELETE FROM JsonSessions WHERE filename = ?;", [(name,) for name in removed])
+        conn.execute(
+            "INSERT INTO SessionIndexState (key, value) VALUES ('dir_mtime', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value;",
+            (dir_mtime,),
+        )
+    return len(changed) + len(removed)
+
+
+def record_session(filepath: str, payload: Dict[str, Any]) -> None:
+    """Add or update the index entry for a session file the app just wrote."""
+    path, filename = os.path.split(filepath)
+    stat = os.stat(filepath)
+    with _manager(path).writer() as conn:
+        conn.execute(
+            """
+            INSERT INTO JsonSessions (filename, project_name, report_date, prepared_by, mtime, size)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(filename) DO UPDATE SET
+                project_name = excluded.project_name, report_date = excluded.report_date,
+                prepared_by = excluded.prepared_by, mtime = excluded.mtime, size = excluded.size;
+            """,
+            (filename, payload.get("project_name"), payload.get("report_date"), payload.get("prepared_by"), stat.st_mtime, stat.st_size),
+        )
+        # Our own write changed the directory; record it so the next rerun does not rescan.
+        conn.execute(
+            "INSERT INTO SessionIndexState (key, value) VALUES ('dir_mtime', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value;",
+            (str(os.stat(path).st_mtime_ns),),
+        )
+
+
+def _search_clause(search: Optional[str]) -> Tuple[str, List[Any]]:
+    if not search:
+        return "", []
+    pattern = f"%{search.strip()}%"
+    return (
+        "WHERE filename LIKE ? OR project_name LIKE ? OR report_date LIKE ? OR prepared_by LIKE ?",
+        [pattern] * 4,
+    )
+
+
+def list_sessions(path: str, search: Optional[str] = None, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+    """Return one page of indexed sessions, newest first, optionally filtered by a search string."""
+    refresh_index(path)
+    where, params = _search_clause(search)
+    with _manager(path).reader() as conn:
+        rows = conn.execute(
+            f"SELECT filename, project_name, report_date, prepared_by, mtime FROM JsonSessions {where} "
+            "ORDER BY mtime DESC, filename DESC LIMIT ? OFFSET ?;",
+            params + [int(limit), int(offset)],
+        ).fetchall()
+    keys = ["filename", "project_name", "report_date", "prepared_by", "mtime"]
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def count_sessions(path: str, search: Optional[str] = None) -> int:
+    """Return how many indexed sessions match the search string."""
+    refresh_index(path)
+    where, params = _search_clause(search)
+    with _manager(path).reader() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM JsonSessions {where};", params).fetchone()[0]
+
+
+def allocate_sequence(path: str, day: str) -> int:
+    """Atomically reserve the next session sequence number for a YYYYMMDD day.
+
+    A new day's counter starts after the files already indexed for that day.
+    """
+    refresh_index(path)
+    with _manager(path).writer() as conn:
+        return conn.execute(
+            """
+            INSERT INTO SessionSequence (day, last_seq)
+            VALUES (?, (SELECT COUNT(*) FROM JsonSessions WHERE filename LIKE ? || '%') + 1)
+            ON CONFLICT(day) DO UPDATE SET last_seq = last_seq + 1
+            RETURNING last_seq;
+            """,
+            (day, day),
+        ).fetchone()[0]
+
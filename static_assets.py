@@ -0,0 +1,12 @@
+import os
+
+import streamlit as st
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+
+@st.cache_resource
+def load_css(name: str) -> str:
+    """Return assets/<name> wrapped in a <style> tag, read once per process."""
+    with open(os.path.join(ASSETS_DIR, name), "r", encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
@@ -1,79 +1,158 @@
 import os
 import sqlite3
-from datetime import datetime
-from typing import Optional, Tuple
+from datetime import date, datetime
+from typing import Any, Callable, Optional, Tuple
 
 import pandas as pd
 import streamlit as st
 
+from analytics_backend import AnalyticsBackend, duckdb_available, get_backend
+from db_pool import configure_connection, get_manager
+from lookups import named
+from migrations import migrate
+import parquet_snapshot
+import perf_metrics
+from perf_metrics import timed
+from report_cache import VersionedCache, db_version_key
+from report_search import search_reports
+from rollups import choose_period, equipment_trend, manpower_trend, material_totals, project_timeline, week_bounds
+from typed_tables import DATE_COLUMNS, compact_tables, memory_bytes
+from report_queries import (
+    fetch_portfolio_overview,
+    fetch_projects_with_reports,
+    fetch_report_children,
+    fetch_report_dates,
+    fetch_report_header,
+    fetch_report_span,
+    fetch_table_counts,
+)
+
 DB_FILE_DEFAULT = "construction_management.db"
 
 
+@st.cache_resource
+def get_query_cache() -> VersionedCache:
+    """Process-wide query cache shared by all sessions and reruns.
+
+    Entries expire when the database file changes (see report_cache.db_version_key).
+    """
+    return VersionedCache()
+
+
 def get_connection(db_path: str) -> sqlite3.Connection:
-    """Create a SQLite connection with foreign keys enabled."""
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+    """Create a standalone SQLite connection with foreign keys, WAL and a busy timeout."""
+    return configure_connection(sqlite3.connect(db_path))
+
+
+def upgrade_database(db_path: str) -> None:
+    """Apply pending schema migrations once per process so older files are upgraded in place."""
+    upgrading = st.empty()
+    try:
+        get_manager(db_path).run_once(
+            migrate, lambda step, fraction: upgrading.progress(fraction, text=f"Upgrading the database: {step}")
+        )
+    except sqlite3.OperationalError:
+        # Read-only or locked file: keep serving queries without the upgrade.
+        pass
+    finally:
+        upgrading.empty()
+
+
+def cached_call(db_path: str, name: str, loader: Callable[[], Any], *args: Any) -> Any:
+    """Return loader()'s result, reusing it until the database at db_path changes.
+
+    `name` and `args` identify the result in the process-wide cache.
+    """
+    key = (os.path.abspath(db_path), name, args)
+    if perf_metrics.enabled():
+        loader = timed(f"query.{name}")(loader)  # cache misses only: the time spent in SQLite/pandas
+    return get_query_cache().get_or_load(key, db_version_key(db_path), loader)
+
+
+def cached_query(db_path: str, query: Callable[..., Any], *args: Any) -> Any:
+    """Run query(conn, *args) against db_path, reusing the result until the database changes.
+
+    A pooled read connection is only borrowed on a cache miss.
+    """
+    def load() -> Any:
+        with get_manager(db_path).reader() as conn:
+            return query(conn, *args)
+
+    return cached_call(db_path, query.__name__, load, *args)
 
 
-def load_tables(conn: sqlite3.Connection) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-    """Load all required tables into DataFrames.
+@st.cache_resource
+def get_analytics_backend(name: str, db_path: str) -> AnalyticsBackend:
+    """Return a long-lived analytics backend ("sqlite" or "duckdb") for db_path."""
+    return get_backend(name, db_path)
 
+
+def cached_analytics(db_path: str, engine: str, method: str, *args: Any) -> pd.DataFrame:
+    """Run an AnalyticsBackend method, reusing the result until the database changes."""
+    def load() -> pd.DataFrame:
+        return getattr(get_analytics_backend(engine, db_path), method)(*args)
+
+    return cached_call(db_path, f"{engine}.{method}", load, *args)
+
+
+@timed("dashboard.load_tables", rows=lambda tables: sum(len(df) for df in tables))
+def load_tables(conn: sqlite3.Connection) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Load all tables into DataFrames (full scans; the dashboard pages query per report instead).
+
+    Names, integers and dates get the compact dtypes of typed_tables.compact_frame.
     Returns: (projects, reports, manpower, equipment, materials, activities)
     """
     projects = pd.read_sql_query("SELECT * FROM Projects", conn)
     reports = pd.read_sql_query("SELECT * FROM DailyReports", conn)
-    manpower = pd.read_sql_query("SELECT * FROM ManpowerLog", conn)
-    equipment = pd.read_sql_query("SELECT * FROM EquipmentLog", conn)
-    materials = pd.read_sql_query("SELECT * FROM MaterialDeliveries", conn)
+    manpower = pd.read_sql_query("SELECT * FROM ManpowerLogNamed", conn)
+    equipment = pd.read_sql_query("SELECT * FROM EquipmentLogNamed", conn)
+    materials = pd.read_sql_query("SELECT * FROM MaterialDeliveriesNamed", conn)
     activities = pd.read_sql_query("SELECT * FROM WorkActivities", conn)
-    return projects, reports, manpower, equipment, materials, activities
+    return compact_tables((projects, reports, manpower, equipment, materials, activities))
 
 
-def select_report_ui(projects: pd.DataFrame, reports: pd.DataFrame) -> Optional[int]:
-    """Render selectors for project and report date; return selected report_id or None."""
-    if projects.empty or reports.empty:
+@timed("dashboard.select_report_ui", rows=None)
+def select_report_ui(db_path: str) -> Optional[int]:
+    """Render selectors for project and report date; return selected report_id or None.
+
+    Only the project list and the selected project's report dates are queried.
+    """
+    projects = cached_query(db_path, fetch_projects_with_reports)
+    if projects.empty:
         st.warning("No projects or reports found in the database.")
         return None
 
-    # Join to get project names for reports
-    joined = reports.merge(projects, how="left", left_on="project_id", right_on="project_id")
-    joined["report_date"] = pd.to_datetime(joined["report_date"], errors="coerce")
-
-    project_names = joined["project_name"].dropna().unique().tolist()
+    project_names = projects["project_name"].tolist()
     project_name = st.selectbox("Project", options=project_names)
+    project_id = int(projects.loc[projects["project_name"] == project_name, "project_id"].iloc[0])
 
-    proj_reports = joined[joined["project_name"] == project_name].copy()
+    proj_reports = cached_query(db_path, fetch_report_dates, project_id)
     if proj_reports.empty:
         st.info("No reports for the selected project.")
         return None
 
-    proj_reports = proj_reports.sort_values("report_date", ascending=False)
-    date_labels = proj_reports["report_date"].dt.strftime("%Y-%m-%d").tolist()
+    # Cached frames are shared between reruns, so derive columns without mutating them.
+    report_dates = pd.to_datetime(proj_reports["report_date"], errors="coerce")
+    date_labels = report_dates.dt.strftime("%Y-%m-%d").tolist()
     label_to_id = dict(zip(date_labels, proj_reports["report_id"].tolist()))
 
     date_label = st.selectbox("Report Date", options=date_labels)
     return label_to_id.get(date_label)
 
 
-def show_report_details(
-    report_id: int,
-    projects: pd.DataFrame,
-    reports: pd.DataFrame,
-    manpower: pd.DataFrame,
-    equipment: pd.DataFrame,
-    materials: pd.DataFrame,
-    activities: pd.DataFrame,
-) -> None:
-    """Render details for a single report using tabs."""
-    r = reports[reports["report_id"] == report_id]
-    if r.empty:
+@timed("dashboard.show_report_details", rows=None)
+def show_report_details(db_path: str, report_id: int) -> None:
+    """Render details for a single report using tabs.
+
+    Only the selected report and its child rows are read from the database.
+    """
+    r = cached_query(db_path, fetch_report_header, report_id)
+    if r is None:
         st.error("Selected report not found.")
         return
 
-    r = r.iloc[0]
-    project = projects[projects["project_id"] == r["project_id"]]
-    project_name = project.iloc[0]["project_name"] if not project.empty else "Unknown Project"
+    children = cached_query(db_path, fetch_report_children, report_id)
+    project_name = r["project_name"] if pd.notna(r["project_name"]) else "Unknown Project"
 
     report_date = r["report_date"]
     try:
@@ -95,14 +174,14 @@ def show_report_details(
     )
 
     with tab_activities:
-        df = activities[activities["report_id"] == report_id].copy()
+        df = children["WorkActivities"]
         if df.empty:
             st.info("No work activities logged.")
         else:
             st.dataframe(df.drop(columns=["report_id", "activity_id"], errors="ignore"), use_container_width=True)
 
     with tab_manpower:
-        df = manpower[manpower["report_id"] == report_id].copy()
+        df = children["ManpowerLog"]
         if df.empty:
             st.info("No manpower logged.")
         else:
@@ -113,14 +192,14 @@ def show_report_details(
                 st.bar_chart(chart)
 
     with tab_equipment:
-        df = equipment[equipment["report_id"] == report_id].copy()
+        df = children["EquipmentLog"]
         if df.empty:
             st.info("No equipment logged.")
         else:
             st.dataframe(df.drop(columns=["report_id", "log_id"], errors="ignore"), use_container_width=True)
 
     with tab_materials:
-        df = materials[materials["report_id"] == report_id].copy()
+        df = children["MaterialDeliveries"]
         if df.empty:
             st.info("No materials delivered.")
         else:
@@ -131,6 +210,210 @@ def show_report_details(
         st.markdown(f"> {r.get('general_notes', 'No general notes provided.')} ")
 
 
+def show_search(db_path: str) -> None:
+    """Search notes, site conditions, weather, activities and deliveries; open a matching report."""
+    projects = cached_query(db_path, fetch_projects_with_reports)
+    c1, c2 = st.columns([3, 1])
+    text = c1.text_input("Search reports", placeholder='e.g. rebar delay "Tower 23"')
+    project_name = c2.selectbox("Project", options=["All projects"] + projects["project_name"].tolist())
+    if not text.strip():
+        st.info('Every word must match; use "quotes" for a phrase and a trailing * for a prefix.')
+        return
+
+    project_id = None
+    if project_name != "All projects":
+        project_id = int(projects.loc[projects["project_name"] == project_name, "project_id"].iloc[0])
+    results = cached_query(db_path, search_reports, text, project_id)
+    if results.empty:
+        st.warning("No reports match your search.")
+        return
+
+    st.caption(f"{len(results)} best matching reports")
+    labels = {
+        row.report_id: f"{row.report_date} · {row.project_name}"
+        for row in results.itertuples()
+    }
+    for row in results.itertuples():
+        st.markdown(f"**{labels[row.report_id]}** — {row.snippet}")
+
+    report_id = st.selectbox("Open report", options=list(labels), format_func=labels.get)
+    if report_id:
+        st.markdown("---")
+        show_report_details(db_path, int(report_id))
+
+
+def show_date_range(db_path: str) -> None:
+    """Chart one project's logs over a date range.
+
+    Rows are bucketed by day, week or month in SQL over the rollup tables,
+    picked from the range length unless chosen, so a multi-year range is
+    drawn from about 150 points.
+    """
+    projects = cached_query(db_path, fetch_projects_with_reports)
+    if projects.empty:
+        st.warning("No projects or reports found in the database.")
+        return
+
+    c1, c2, c3 = st.columns([2, 2, 1])
+    with c1:
+        project_name = st.selectbox("Project", options=projects["project_name"].tolist(), key="range_project")
+    project_id = int(projects.loc[projects["project_name"] == project_name, "project_id"].iloc[0])
+    first, last = cached_query(db_path, fetch_report_span, project_id)
+    first_date, last_date = date.fromisoformat(first[:10]), date.fromisoformat(last[:10])
+    with c2:
+        # Keyed by project so the range starts at the project's full span.
+        picked = st.date_input(
+            "Date range",
+            value=(first_date, last_date),
+            min_value=first_date,
+            max_value=last_date,
+            key=f"range_dates_{project_id}",
+        )
+    with c3:
+        grouping = st.selectbox("Group by", options=["auto", "day", "week", "month"], key="range_period")
+    if len(picked) != 2:
+        st.info("Pick the end of the range.")
+        return
+
+    start, end = picked
+    period = choose_period(start, end) if grouping == "auto" else grouping
+    timeline = cached_query(db_path, project_timeline, project_id, period, start.isoformat(), end.isoformat())
+    st.caption(f"{len(timeline)} points, one per {period}, for {(end - start).days + 1} days.")
+    if timeline.empty:
+        st.info("Nothing logged in this range.")
+        return
+
+    chart = timeline.set_index(pd.to_datetime(timeline["period"]))
+    st.subheader("Manpower and Equipment Hours")
+    st.line_chart(chart[["man_hours", "equipment_hours"]].rename(columns={"man_hours": "Man-hours", "equipment_hours": "Equipment hours"}))
+    st.subheader("Headcount (average workers per reported day)")
+    st.line_chart(chart["headcount"])
+    st.subheader("Material Deliveries")
+    st.bar_chart(chart["deliveries"])
+
+
+def show_portfolio(db_path: str) -> None:
+    """Show every project's latest report, labor and equipment for one week, and delayed activities.
+
+    One cached query covers all projects (see report_queries.PORTFOLIO_OVERVIEW_SQL).
+    """
+    picked = st.date_input("Week of", value=date.today(), key="portfolio_week")
+    week_start, week_end = week_bounds(picked)
+    overview = cached_query(db_path, fetch_portfolio_overview, week_start.isoformat(), week_end.isoformat())
+    if overview.empty:
+        st.warning("No projects found in the database.")
+        return
+
+    st.caption(f"{len(overview)} projects, week of {week_start:%b %d} to {week_end:%b %d, %Y}.")
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Projects with labor logged", int((overview["labor_hours"] > 0).sum()))
+    c2.metric("Labor hours", f"{overview['labor_hours'].sum():,.0f}")
+    c3.metric("Active equipment", int(overview["active_equipment"].sum()))
+    c4.metric("Delayed activities", int(overview["delayed_activities"].sum()))
+    st.dataframe(
+        overview.drop(columns=["project_id"]),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "project_name": "Project",
+            "last_report": st.column_config.TextColumn("Latest report"),
+            "labor_hours": st.column_config.NumberColumn("Labor hours (week)", format="%.1f"),
+            "active_equipment": st.column_config.NumberColumn("Active equipment (week)"),
+            "delayed_activities": st.column_config.NumberColumn("Delayed activities (latest report)"),
+        },
+    )
+
+
+def show_trends(db_path: str) -> None:
+    """Render cross-report trend charts from the pre-aggregated rollup tables."""
+    projects = cached_query(db_path, fetch_projects_with_reports)
+    if projects.empty:
+        st.warning("No projects or reports found in the database.")
+        return
+
+    c1, c2 = st.columns([3, 1])
+    with c1:
+        project_name = st.selectbox("Project", options=["All projects"] + projects["project_name"].tolist(), key="trend_project")
+    with c2:
+        period = st.selectbox("Group by", options=["week", "month", "day"], key="trend_period")
+    project_id = None
+    if project_name != "All projects":
+        project_id = int(projects.loc[projects["project_name"] == project_name, "project_id"].iloc[0])
+
+    st.subheader(f"Manpower Hours per Trade by {period.title()}")
+    manpower = cached_query(db_path, manpower_trend, project_id, period)
+    if manpower.empty:
+        st.info("No manpower logged.")
+    else:
+        st.area_chart(manpower.pivot(index="period", columns="trade", values="man_hours").fillna(0))
+
+    st.subheader("Equipment Hours per Project by Month")
+    equipment = cached_query(db_path, equipment_trend, project_id, "month")
+    if equipment.empty:
+        st.info("No equipment logged.")
+    else:
+        st.line_chart(equipment.pivot(index="period", columns="project_name", values="hours").fillna(0))
+
+    st.subheader("Material Quantities per Supplier")
+    materials = cached_query(db_path, material_totals, project_id)
+    if materials.empty:
+        st.info("No materials delivered.")
+    else:
+        st.dataframe(materials, use_container_width=True, hide_index=True)
+
+    st.subheader("Portfolio Totals")
+    engines = ["sqlite", "duckdb"] if duckdb_available() else ["sqlite"]
+    c1, c2, c3 = st.columns([1, 1, 1])
+    with c1:
+        start = st.date_input("From", value=None, key="portfolio_start")
+    with c2:
+        end = st.date_input("To", value=None, key="portfolio_end")
+    with c3:
+        engine = st.selectbox("Engine", options=engines, key="portfolio_engine", help="DuckDB scans the SQLite file in place with vectorized, multi-threaded aggregation.")
+    start_str = start.isoformat() if start else None
+    end_str = end.isoformat() if end else None
+    try:
+        totals = cached_analytics(db_path, engine, "portfolio_totals", start_str, end_str)
+    except Exception as e:
+        st.warning(f"{engine} analytics unavailable ({e}); using sqlite.")
+        totals = cached_analytics(db_path, "sqlite", "portfolio_totals", start_str, end_str)
+    st.dataframe(totals.drop(columns=["project_id"]), use_container_width=True, hide_index=True)
+
+
+def show_raw_tables(db_path: str) -> None:
+    """Browse whole tables, loaded from the Parquet snapshot plus rows added since it was taken.
+
+    Tables with rows edited or deleted since the snapshot are read from SQLite until it is rebuilt.
+    """
+    status = parquet_snapshot.snapshot_status(db_path)
+    if parquet_snapshot.ensure_fresh(db_path):
+        st.caption("Snapshot is missing or stale; rebuilding it in the background.")
+    elif status["exists"]:
+        st.caption(f"Snapshot from {status['created_at']} + {status['delta_rows']} newer rows from SQLite.")
+
+    c1, c2 = st.columns([1, 3])
+    with c1:
+        table = st.selectbox("Table", options=list(parquet_snapshot.SNAPSHOT_TABLES), key="raw_table")
+    with get_manager(db_path).reader() as conn:
+        all_columns = [row[1] for row in conn.execute(f"PRAGMA table_info({named(table)});")]
+    with c2:
+        columns = st.multiselect("Columns", options=all_columns, default=all_columns, key=f"raw_columns_{table}")
+    if not columns:
+        st.info("Select at least one column.")
+        return
+
+    df = cached_call(
+        db_path,
+        "snapshot.load_table",
+        lambda: parquet_snapshot.load_table(db_path, table, columns=columns, typed=True),
+        table,
+        tuple(columns),
+    )
+    st.caption(f"{len(df):,} rows · {memory_bytes(df) / 2**20:,.1f} MB in memory")
+    dates = {name: st.column_config.DateColumn(name) for name in DATE_COLUMNS if name in df.columns}
+    st.dataframe(df, use_container_width=True, hide_index=True, column_config=dates)
+
+
 def main() -> None:
     """Streamlit dashboard for local SQLite daily reports."""
     st.set_page_config(page_title="Construction Dashboard (SQLite)", page_icon="📊", layout="wide")
@@ -139,41 +422,60 @@ def main() -> None:
     st.caption("Reading from a local SQLite database file.")
 
     db_path = st.sidebar.text_input("SQLite DB Path", value=DB_FILE_DEFAULT)
+    view = st.sidebar.radio("View", options=["Single report", "Portfolio", "Date range", "Search", "Trends", "Raw tables"], horizontal=True)
     reload_btn = st.sidebar.button("Reload Database")
 
     if not os.path.exists(db_path):
         st.warning(f"Database not found at '{db_path}'. Use the entry app to create/save reports first.")
         return
 
+    if reload_btn:
+        get_query_cache().clear()
+
+    upgrade_database(db_path)
+
     try:
-        conn = get_connection(db_path)
         with st.spinner("Loading data..."):
-            projects, reports, manpower, equipment, materials, activities = load_tables(conn)
+            counts = cached_query(db_path, fetch_table_counts)
+
+        # Optional: show basic stats
+        with st.expander("Database Summary", expanded=False):
+            c1, c2, c3, c4, c5, c6 = st.columns(6)
+            c1.metric("Projects", counts["Projects"])
+            c2.metric("Reports", counts["DailyReports"])
+            c3.metric("Manpower Logs", counts["ManpowerLog"])
+            c4.metric("Equipment Logs", counts["EquipmentLog"])
+            c5.metric("Material Deliveries", counts["MaterialDeliveries"])
+            c6.metric("Activities", counts["WorkActivities"])
+
+        if view == "Portfolio":
+            show_portfolio(db_path)
+            return
+        if view == "Date range":
+            show_date_range(db_path)
+            return
+        if view == "Search":
+            show_search(db_path)
+            return
+        if view == "Trends":
+            show_trends(db_path)
+            return
+        if view == "Raw tables":
+            show_raw_tables(db_path)
+            return
+
+        report_id = select_report_ui(db_path)
+        if not report_id:
+            st.info("Select a project and report date to view details.")
+            return
+
+        show_report_details(db_path, report_id)
     except Exception as e:
         st.error(f"Failed to load database: {e}")
-        return
     finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
-
-    # Optional: show basic stats
-    with st.expander("Database Summary", expanded=False):
-        c1, c2, c3, c4, c5, c6 = st.columns(6)
-        c1.metric("Projects", len(projects))
-        c2.metric("Reports", len(reports))
-        c3.metric("Manpower Logs", len(manpower))
-        c4.metric("Equipment Logs", len(equipment))
-        c5.metric("Material Deliveries", len(materials))
-        c6.metric("Activities", len(activities))
-
-    report_id = select_report_ui(projects, reports)
-    if not report_id:
-        st.info("Select a project and report date to view details.")
-        return
-
-    show_report_details(report_id, projects, reports, manpower, equipment, materials, activities)
+        stats = get_query_cache().stats()
+        st.sidebar.caption(f"Query cache: {stats['hits']} hits / {stats['misses']} misses ({stats['entries']} entries)")
+        perf_metrics.render_panel()
 
 
 if __name__ == "__main__":
@@ -1,116 +1,79 @@
+from __future__ import annotations
+
 import os
 import json
+import re
 import sqlite3
 from datetime import date, datetime
-from typing import List, Dict, Any, Tuple, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, NamedTuple, Sequence, Tuple, Optional
 
-import pandas as pd
 import streamlit as st
 
+from db_pool import configure_connection, get_manager
+from db_schema import report_key_enforced
+from drafts import DraftWriter, list_drafts, load_draft
+from log_validation import LOG_TABLES, LogInput, LogTable, RowError, iter_rows, validate_logs, validate_reports
+from lookups import LOOKUPS, LookupIndex, NameResolver, clean_name, load_index, name_key, stored_columns
+from migrations import Progress, migrate
+from perf_metrics import measure, render_panel, timed
+from report_cache import VersionedCache, db_version_key
+from rollups import refresh_rollups
+from session_index import allocate_sequence, count_sessions, list_sessions, record_session
+from static_assets import load_css
+
+if TYPE_CHECKING:
+    # pandas is imported inside the functions that use it so that scripts
+    # importing the insert helpers (and the page registry in main.py) do not pay for it.
+    import pandas as pd
+
 DB_FILE = "construction_management.db"
 JSON_DIR = "json_data"
+SESSION_PAGE_SIZE = 20
+SAVE_CHUNK_SIZE = 200
+# build_payload keys of the child logs, in LOG_TABLES order
+PAYLOAD_LOG_KEYS = ("manpower", "equipment", "activities", "materials")
 
 
 def get_connection(db_path: str = DB_FILE) -> sqlite3.Connection:
-    """Return a SQLite connection to the given database path.
+    """Return a new SQLite connection to the given database path.
 
-    Ensures foreign keys are enabled.
+    Ensures foreign keys, WAL mode and a busy timeout. The app itself uses the
+    shared connections from `db_pool.get_manager`.
     """
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+    return configure_connection(sqlite3.connect(db_path))
 
 
-def init_db(conn: sqlite3.Connection) -> None:
-    """Create tables if they do not exist.
+def init_storage(db_path: str = DB_FILE, progress: Optional[Progress] = None) -> None:
+    """Bring db_path's schema up to date once per process (no-op on later calls).
 
-    This mirrors the schema in `construction_management.py` without deleting data.
+    `progress` is called while migrations run; see migrations.migrate.
     """
-    cursor = conn.cursor()
+    get_manager(db_path).run_once(migrate, progress)
 
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS Projects (
-            project_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            project_name TEXT NOT NULL UNIQUE,
-            location TEXT,
-            start_date DATE,
-            end_date DATE
-        );
-        """
-    )
 
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS DailyReports (
-            report_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            project_id INTEGER NOT NULL,
-            report_date DATE NOT NULL,
-            weather TEXT,
-            site_conditions TEXT,
-            general_notes TEXT,
-            prepared_by TEXT,
-            FOREIGN KEY (project_id) REFERENCES Projects (project_id)
-        );
-        """
-    )
+_lookup_cache = VersionedCache(max_entries=4)
 
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS ManpowerLog (
-            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            report_id INTEGER NOT NULL,
-            trade TEXT NOT NULL,
-            number_of_workers INTEGER NOT NULL,
-            hours_worked REAL NOT NULL,
-            FOREIGN KEY (report_id) REFERENCES DailyReports (report_id)
-        );
-        """
-    )
 
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS EquipmentLog (
-            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            report_id INTEGER NOT NULL,
-            equipment_name TEXT NOT NULL,
-            quantity INTEGER NOT NULL,
-            hours_used REAL NOT NULL,
-            FOREIGN KEY (report_id) REFERENCES DailyReports (report_id)
-        );
-        """
-    )
+def lookup_index(db_path: str = DB_FILE) -> LookupIndex:
+    """Return the trade/equipment/material/unit/supplier names, re-read only after the database changes."""
 
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS MaterialDeliveries (
-            delivery_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            report_id INTEGER NOT NULL,
-            material_name TEXT NOT NULL,
-            quantity REAL NOT NULL,
-            unit TEXT NOT NULL,
-            supplier TEXT,
-            ticket_number TEXT,
-            FOREIGN KEY (report_id) REFERENCES DailyReports (report_id)
-        );
-        """
-    )
+    def load() -> LookupIndex:
+        with get_manager(db_path).reader() as conn:
+            return load_index(conn)
+
+    return _lookup_cache.get_or_load(os.path.abspath(db_path), db_version_key(db_path), load)
 
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS WorkActivities (
-            activity_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            report_id INTEGER NOT NULL,
-            activity_description TEXT NOT NULL,
-            status TEXT CHECK(status IN ('Not Started', 'In Progress', 'Completed', 'Delayed')),
-            percent_complete INTEGER,
-            notes TEXT,
-            FOREIGN KEY (report_id) REFERENCES DailyReports (report_id)
-        );
-        """
-    )
 
-    conn.commit()
+def name_options(index: LookupIndex, column: str, extra: Sequence[Any] = ()) -> List[str]:
+    """Pick-list options for a log column: known names plus `extra` ones (blank and duplicate keys dropped)."""
+    options = list(index.names(column))
+    seen = {name_key(name) for name in options}
+    for name in extra:
+        if not isinstance(name, str) or not name_key(name) or name_key(name) in seen:
+            continue
+        seen.add(name_key(name))
+        options.append(clean_name(name))
+    return options
 
 
 def ensure_json_dir(path: str = JSON_DIR) -> None:
@@ -118,13 +81,11 @@ def ensure_json_dir(path: str = JSON_DIR) -> None:
     os.makedirs(path, exist_ok=True)
 
 
-def list_json_files(path: str = JSON_DIR) -> List[str]:
-    """List JSON files in the json_data directory sorted by newest first."""
+def list_json_files(path: str = JSON_DIR, search: Optional[str] = None, limit: int = SESSION_PAGE_SIZE, offset: int = 0) -> List[str]:
+    """List session JSON files newest first, one page at a time, from the session index."""
     if not os.path.isdir(path):
         return []
-    files = [f for f in os.listdir(path) if f.endswith(".json")]
-    files.sort(key=lambda f: os.path.getmtime(os.path.join(path, f)), reverse=True)
-    return files
+    return [row["filename"] for row in list_sessions(path, search, limit, offset)]
 
 
 def build_payload(
@@ -140,6 +101,8 @@ def build_payload(
     materials_df: pd.DataFrame,
 ) -> dict:
     """Build a JSON-serializable payload of the report and child rows."""
+    import pandas as pd
+
     return {
         "project_name": project_name,
         "report_date": report_date.isoformat() if report_date else None,
@@ -158,12 +121,10 @@ def build_payload(
 def _new_session_filename(report_date: date, path: str = JSON_DIR) -> str:
     """Compute a new session file name using date-time and a sequence number for the day."""
     ensure_json_dir(path)
-    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    # Count existing files for today to make a simple sequence suffix
-    today_prefix = datetime.now().strftime("%Y%m%d")
-    today_files = [f for f in list_json_files(path) if f.startswith(today_prefix)]
-    seq = len(today_files) + 1
-    return os.path.join(path, f"{stamp}-{seq:02d}.json")
+    now = datetime.now()
+    # Per-day sequence suffix, reserved atomically in the session index
+    seq = allocate_sequence(path, now.strftime("%Y%m%d"))
+    return os.path.join(path, f"{now.strftime('%Y%m%d-%H%M%S')}-{seq:02d}.json")
 
 
 def save_json_for_session(payload: dict) -> str:
@@ -187,6 +148,7 @@ def save_json_for_session(payload: dict) -> str:
 
     with open(current_file, "w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
+    record_session(current_file, payload)
     return current_file
 
 
@@ -199,6 +161,59 @@ def load_json_file(filepath: str) -> Optional[dict]:
         return None
 
 
+def load_into_form(data: dict) -> None:
+    """Copy a session payload (saved JSON or restored draft) into the form's store values."""
+    import pandas as pd
+
+    st.session_state["project_name_store"] = data.get("project_name", st.session_state["project_name_store"])
+    try:
+        st.session_state["report_date_store"] = datetime.fromisoformat(data.get("report_date")).date() if data.get("report_date") else st.session_state["report_date_store"]
+    except Exception:
+        pass
+    st.session_state["prepared_by_store"] = data.get("prepared_by", "")
+    st.session_state["weather_store"] = data.get("weather", "")
+    st.session_state["site_conditions_store"] = data.get("site_conditions", "")
+    st.session_state["general_notes_store"] = data.get("general_notes", "")
+    st.session_state["activities_store"] = pd.DataFrame(data.get("activities", []))
+    st.session_state["manpower_store"] = pd.DataFrame(data.get("manpower", []))
+    st.session_state["equipment_store"] = pd.DataFrame(data.get("equipment", []))
+    st.session_state["materials_store"] = pd.DataFrame(data.get("materials", []))
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Return editor rows as dicts with missing values as None."""
+    import pandas as pd
+
+    return df.replace({pd.NA: None}).to_dict(orient="records") if isinstance(df, pd.DataFrame) and not df.empty else []
+
+
+def draft_payload(sections: Dict[str, Any]) -> dict:
+    """Turn folded draft sections back into a session payload."""
+    return {**sections.get("header", {}), **{key: sections.get(key, []) for key in ["activities", "manpower", "equipment", "materials"]}}
+
+
+def start_new_draft(draft_id: Optional[str] = None) -> DraftWriter:
+    """Point this browser session at a draft and record its ID in the URL so a reload finds it."""
+    writer = DraftWriter(draft_id)
+    st.session_state["draft_writer"] = writer
+    st.query_params["draft"] = writer.draft_id
+    return writer
+
+
+def draft_writer() -> DraftWriter:
+    """Return this session's draft writer, resuming the draft named in the URL on first use."""
+    writer = st.session_state.get("draft_writer")
+    if writer is None:
+        draft_id = st.query_params.get("draft")
+        if not draft_id or not re.fullmatch(r"[0-9a-f]{12}", draft_id):
+            draft_id = None
+        restored = load_draft(draft_id) if draft_id else None
+        if restored:
+            st.session_state["draft_restore"] = restored
+        writer = start_new_draft(draft_id)
+    return writer
+
+
 def upsert_project(conn: sqlite3.Connection, project_name: str) -> int:
     """Insert project if not exists and return its project_id."""
     if not project_name:
@@ -238,93 +253,123 @@ def insert_report(
     return int(cur.fetchone()[0])
 
 
+def _insert_sql(spec: LogTable) -> str:
+    columns = ("report_id",) + stored_columns(spec)
+    return f"INSERT INTO {spec.table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))});"
+
+
 def bulk_insert(
     conn: sqlite3.Connection,
     report_id: int,
-    manpower: List[Dict[str, Any]],
-    equipment: List[Dict[str, Any]],
-    activities: List[Dict[str, Any]],
-    materials: List[Dict[str, Any]],
-) -> None:
-    """Insert child table records for a report."""
-    cur = conn.cursor()
-
-    if manpower:
-        cur.executemany(
-            """
-            INSERT INTO ManpowerLog (report_id, trade, number_of_workers, hours_worked)
-            VALUES (?, ?, ?, ?);
-            """,
-            [
-                (
-                    report_id,
-                    str(m.get("trade", "")).strip(),
-                    int(m.get("number_of_workers", 0) or 0),
-                    float(m.get("hours_worked", 0) or 0.0),
-                )
-                for m in manpower
-                if str(m.get("trade", "")).strip() != ""
-            ],
-        )
-
-    if equipment:
-        cur.executemany(
+    manpower: LogInput,
+    equipment: LogInput,
+    activities: LogInput,
+    materials: LogInput,
+) -> List[RowError]:
+    """Insert child table records for a report; return the rows rejected by validation."""
+    with measure("entry.bulk_insert") as m:
+        frames, errors = validate_logs(manpower, equipment, activities, materials)
+        m.rows = sum(len(frame) for frame in frames)
+        resolver = NameResolver(conn)
+        cur = conn.cursor()
+        for spec, frame in zip(LOG_TABLES, frames):
+            if not frame.empty:
+                rows = resolver.stored_rows(spec, iter_rows(frame))
+                cur.executemany(_insert_sql(spec), ((report_id, *row) for row in rows))
+    return errors
+
+
+def upsert_report(
+    conn: sqlite3.Connection,
+    project_id: int,
+    report_date: str,
+    weather: str,
+    site_conditions: str,
+    general_notes: str,
+    prepared_by: str,
+    replicated: bool = False,
+) -> Tuple[int, bool]:
+    """Insert or update the report for (project_id, report_date); return (report_id, created).
+
+    The header is only written when a field changed. Databases that still hold
+    duplicates (see compact_reports.py) update the newest of them. Reports
+    created with `replicated` are recorded in ReplicatedReports until another
+    writer saves to them, so Firestore replication only deletes its own.
+    """
+    header = (weather, site_conditions, general_notes, prepared_by)
+    row = conn.execute(
+        """
+        SELECT report_id, weather, site_conditions, general_notes, prepared_by FROM DailyReports
+        WHERE project_id = ? AND report_date = ? ORDER BY report_id DESC LIMIT 1;
+        """,
+        (project_id, report_date),
+    ).fetchone()
+    if row is None:
+        report_id = insert_report(conn, project_id, report_date, *header)
+        if replicated:
+            conn.execute("INSERT INTO ReplicatedReports (report_id) VALUES (?);", (report_id,))
+        return report_id, True
+    if not replicated:
+        conn.execute("DELETE FROM ReplicatedReports WHERE report_id = ?;", (row[0],))
+    if tuple(row[1:]) != header:
+        conn.execute(
             """
-            INSERT INTO EquipmentLog (report_id, equipment_name, quantity, hours_used)
-            VALUES (?, ?, ?, ?);
+            UPDATE DailyReports SET weather = ?, site_conditions = ?, general_notes = ?, prepared_by = ?
+            WHERE report_id = ?;
             """,
-            [
-                (
-                    report_id,
-                    str(e.get("equipment_name", "")).strip(),
-                    int(e.get("quantity", 0) or 0),
-                    float(e.get("hours_used", 0) or 0.0),
-                )
-                for e in equipment
-                if str(e.get("equipment_name", "")).strip() != ""
-            ],
+            (*header, row[0]),
         )
+    return int(row[0]), False
 
-    if activities:
-        cur.executemany(
-            """
-            INSERT INTO WorkActivities (report_id, activity_description, status, percent_complete, notes)
-            VALUES (?, ?, ?, ?, ?);
-            """,
-            [
-                (
-                    report_id,
-                    str(a.get("activity_description", "")).strip(),
-                    str(a.get("status", "In Progress")),
-                    int(a.get("percent_complete", 0) or 0),
-                    str(a.get("notes", "")),
-                )
-                for a in activities
-                if str(a.get("activity_description", "")).strip() != ""
-            ],
-        )
 
-    if materials:
-        cur.executemany(
-            """
-            INSERT INTO MaterialDeliveries (report_id, material_name, quantity, unit, supplier, ticket_number)
-            VALUES (?, ?, ?, ?, ?, ?);
-            """,
-            [
-                (
-                    report_id,
-                    str(m.get("material_name", "")).strip(),
-                    float(m.get("quantity", 0) or 0.0),
-                    str(m.get("unit", "")),
-                    str(m.get("supplier", "")),
-                    str(m.get("ticket_number", "")),
-                )
-                for m in materials
-                if str(m.get("material_name", "")).strip() != ""
-            ],
+@timed("entry.sync_children", rows=lambda written: written)
+def sync_children(
+    conn: sqlite3.Connection,
+    report_id: int,
+    logs: Sequence[Sequence[Tuple[Any, ...]]],
+    resolver: Optional[NameResolver] = None,
+) -> int:
+    """Make a report's child rows match validated log rows; return how many rows were written.
+
+    `logs` holds the row tuples of each table in LOG_TABLES order, as produced
+    by log_validation (validate_logs + iter_rows, or validate_reports). Names
+    are turned into lookup IDs by `resolver` (pass one primed for a whole
+    batch). Stored rows identical to a new row are kept untouched. The
+    remaining stored rows are updated in place with the remaining new rows,
+    and only the surplus on either side is inserted or deleted.
+    """
+    resolver = resolver or NameResolver(conn)
+    written = 0
+    for spec, rows in zip(LOG_TABLES, logs):
+        rows = resolver.stored_rows(spec, rows)
+        columns = stored_columns(spec)
+        stored: Dict[Tuple[Any, ...], List[int]] = {}
+        for row in conn.execute(
+            f"SELECT {spec.key}, {', '.join(columns)} FROM {spec.table} WHERE report_id = ? ORDER BY {spec.key};",
+            (report_id,),
+        ):
+            stored.setdefault(tuple(row[1:]), []).append(row[0])
+        added = []
+        for row in rows:
+            ids = stored.get(row)
+            if ids:
+                ids.pop(0)
+            else:
+                added.append(row)
+        stale = sorted(row_id for ids in stored.values() for row_id in ids)
+
+        changed = list(zip(stale, added))
+        conn.executemany(
+            f"UPDATE {spec.table} SET {', '.join(f'{c} = ?' for c in columns)} WHERE {spec.key} = ?;",
+            [(*row, row_id) for row_id, row in changed],
         )
+        conn.executemany(_insert_sql(spec), ((report_id, *row) for row in added[len(changed):]))
+        conn.executemany(f"DELETE FROM {spec.table} WHERE {spec.key} = ?;", [(row_id,) for row_id in stale[len(changed):]])
+        written += max(len(stale), len(added))
+    return written
 
 
+@timed("entry.save_report", rows=None)
 def save_report(
     project_name: str,
     report_date: date,
@@ -336,10 +381,13 @@ def save_report(
     equipment_df: pd.DataFrame,
     activities_df: pd.DataFrame,
     materials_df: pd.DataFrame,
+    db_path: str = DB_FILE,
 ) -> Tuple[bool, str]:
-    """Persist the report and related logs to SQLite.
+    """Persist the report and related logs to SQLite in one write transaction.
 
-    Returns (ok, message).
+    Saving a project and date that already has a report updates it in place:
+    the header is upserted and child rows are diffed against what is stored.
+    Nothing is written if any log row fails validation. Returns (ok, message).
     """
     # Early validations
     if not project_name:
@@ -347,42 +395,153 @@ def save_report(
     if report_date is None:
         return False, "Report date is required."
 
-    conn = get_connection()
+    # Validate the logs column by column before taking the write lock
+    logs, errors = validate_logs(manpower_df, equipment_df, activities_df, materials_df)
+    if errors:
+        return False, _rejected_message(errors)
+
     try:
-        init_db(conn)
-        conn.execute("BEGIN TRANSACTION;")
-
-        project_id = upsert_project(conn, project_name)
-        report_id = insert_report(
-            conn,
-            project_id,
-            report_date.isoformat(),
-            weather,
-            site_conditions,
-            general_notes,
-            prepared_by,
-        )
+        init_storage(db_path)
+        with get_manager(db_path).writer() as conn:
+            project_id = upsert_project(conn, project_name)
+            report_id, created = upsert_report(
+                conn,
+                project_id,
+                report_date.isoformat(),
+                weather,
+                site_conditions,
+                general_notes,
+                prepared_by,
+            )
+            written = sync_children(conn, report_id, [list(iter_rows(frame)) for frame in logs])
+            if created or written:
+                refresh_rollups(conn, [(project_id, report_date.isoformat())])
+        return True, _saved_message(report_id, created, written)
+    except Exception as e:
+        return False, f"Error saving report: {e}"
 
-        # Convert DataFrames to records
-        manpower = manpower_df.replace({pd.NA: None}).to_dict(orient="records") if not manpower_df.empty else []
-        equipment = equipment_df.replace({pd.NA: None}).to_dict(orient="records") if not equipment_df.empty else []
-        activities = activities_df.replace({pd.NA: None}).to_dict(orient="records") if not activities_df.empty else []
-        materials = materials_df.replace({pd.NA: None}).to_dict(orient="records") if not materials_df.empty else []
 
-        bulk_insert(conn, report_id, manpower, equipment, activities, materials)
+def _saved_message(report_id: int, created: bool, written: int) -> str:
+    if created:
+        return f"Report saved (ID: {report_id})."
+    return f"Report updated (ID: {report_id}, {written} log rows changed)."
 
-        conn.commit()
-        return True, f"Report saved (ID: {report_id})."
-    except Exception as e:
-        conn.rollback()
-        return False, f"Error saving report: {e}"
-    finally:
-        conn.close()
+
+def _rejected_message(errors: List[RowError]) -> str:
+    shown = "; ".join(str(e) for e in errors[:5])
+    more = f" (and {len(errors) - 5} more)" if len(errors) > 5 else ""
+    return f"Fix {len(errors)} invalid log rows before saving: {shown}{more}."
+
+
+class SaveResult(NamedTuple):
+    project_name: str
+    report_date: str
+    ok: bool
+    report_id: Optional[int]
+    message: str
+
+
+@timed("entry.save_reports")
+def save_reports(
+    payloads: Sequence[Dict[str, Any]],
+    db_path: str = DB_FILE,
+    chunk_size: int = SAVE_CHUNK_SIZE,
+) -> List[SaveResult]:
+    """Save many reports in build_payload format; return one SaveResult per payload, in order.
+
+    All logs are validated in one pass before any write. Valid reports are then
+    upserted like save_report, oldest saved_at first so the latest save of a
+    day wins, in write transactions of `chunk_size` reports. Each report runs
+    in its own savepoint, so a failing report does not undo the rest of its
+    chunk. Project IDs are looked up once per name.
+    """
+    results: List[Optional[SaveResult]] = [None] * len(payloads)
+    pending = []
+    for i, payload in enumerate(payloads):
+        if not isinstance(payload, dict):
+            results[i] = SaveResult("", "", False, None, "Not a report object.")
+            continue
+        project_name = str(payload.get("project_name") or "").strip()
+        report_date = str(payload.get("report_date") or "")
+        try:
+            report_date = date.fromisoformat(report_date[:10]).isoformat()
+        except ValueError:
+            results[i] = SaveResult(project_name, report_date, False, None, "Report date is required (YYYY-MM-DD).")
+            continue
+        if not project_name:
+            results[i] = SaveResult(project_name, report_date, False, None, "Project name is required.")
+            continue
+        pending.append((i, project_name, report_date, payload))
+
+    logs, errors = validate_reports([[payload.get(key) for key in PAYLOAD_LOG_KEYS] for *_, payload in pending])
+    ready = []
+    for (i, project_name, report_date, payload), report_logs, report_errors in zip(pending, logs, errors):
+        if report_errors:
+            results[i] = SaveResult(project_name, report_date, False, None, _rejected_message(report_errors))
+        else:
+            ready.append((i, project_name, report_date, payload, report_logs))
+    ready.sort(key=lambda item: str(item[3].get("saved_at") or ""))
+
+    if ready:
+        init_storage(db_path)
+    manager = get_manager(db_path)
+    project_ids: Dict[str, int] = {}
+    for start in range(0, len(ready), max(1, chunk_size)):
+        chunk = ready[start:start + max(1, chunk_size)]
+        chunk_results: Dict[int, SaveResult] = {}
+        chunk_projects: Dict[str, int] = {}
+        try:
+            with manager.writer() as conn:
+                rollup_keys = []
+                # Outside the savepoints, so a rolled-back report cannot leave stale IDs behind.
+                resolver = NameResolver(conn)
+                resolver.prime(report_logs for *_, report_logs in chunk)
+                for i, project_name, report_date, payload, report_logs in chunk:
+                    conn.execute("SAVEPOINT save_report;")
+                    try:
+                        project_id = project_ids.get(project_name) or chunk_projects.get(project_name)
+                        if project_id is None:
+                            project_id = upsert_project(conn, project_name)
+                        report_id, created = upsert_report(
+                            conn,
+                            project_id,
+                            report_date,
+                            payload.get("weather") or "",
+                            payload.get("site_conditions") or "",
+                            payload.get("general_notes") or "",
+                            payload.get("prepared_by") or "",
+                        )
+                        written = sync_children(conn, report_id, report_logs, resolver)
+                    except sqlite3.Error as e:
+                        conn.execute("ROLLBACK TO save_report;")
+                        conn.execute("RELEASE save_report;")
+                        chunk_results[i] = SaveResult(project_name, report_date, False, None, f"Error saving report: {e}")
+                        continue
+                    conn.execute("RELEASE save_report;")
+                    chunk_projects[project_name] = project_id
+                    if created or written:
+                        rollup_keys.append((project_id, report_date))
+                    chunk_results[i] = SaveResult(project_name, report_date, True, report_id, _saved_message(report_id, created, written))
+                refresh_rollups(conn, rollup_keys)
+        except Exception as e:
+            # The chunk's transaction was rolled back: nothing in it was saved.
+            for i, project_name, report_date, *_ in chunk:
+                results[i] = SaveResult(project_name, report_date, False, None, f"Error saving report: {e}")
+            continue
+        project_ids.update(chunk_projects)
+        for i, result in chunk_results.items():
+            results[i] = result
+    return results
 
 
 def main() -> None:
     """Streamlit app: Site Daily Report (SQLite)."""
+    import pandas as pd
+
     st.set_page_config(page_title="Site Daily Report (SQLite)", page_icon="🏗️", layout="wide")
+    upgrading = st.empty()
+    init_storage(progress=lambda step, fraction: upgrading.progress(fraction, text=f"Upgrading the database: {step}"))
+    upgrading.empty()
 
     # Sidebar toolbar
     with st.sidebar:
@@ -392,86 +551,56 @@ def main() -> None:
 
         st.divider()
         st.subheader("📁 JSON Sessions")
-        files = list_json_files()
-        selected_file = st.selectbox("Previous sessions", options=["(none)"] + files, index=0)
+        ensure_json_dir()
+        search = st.text_input("Search sessions", placeholder="Project, date, author or file")
+        total = count_sessions(JSON_DIR, search)
+        page_count = max(1, -(-total // SESSION_PAGE_SIZE))
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1) if page_count > 1 else 1
+        sessions = {
+            row["filename"]: row
+            for row in list_sessions(JSON_DIR, search, SESSION_PAGE_SIZE, (page - 1) * SESSION_PAGE_SIZE)
+        }
+        selected_file = st.selectbox(
+            f"Previous sessions ({total})",
+            options=["(none)"] + list(sessions),
+            index=0,
+            format_func=lambda f: f if f not in sessions else f"{f} · {sessions[f]['project_name'] or '?'} ({sessions[f]['report_date'] or '?'})",
+        )
         col_a, col_b = st.columns(2)
         with col_a:
             load_btn = st.button("Load to form", disabled=(selected_file == "(none)"))
         with col_b:
             clear_session_btn = st.button("New session", help="Start a new JSON session file on next save")
 
+        st.divider()
+        st.subheader("📝 Drafts")
+        writer = draft_writer()
+        other_drafts = {draft_id: mtime for draft_id, mtime in list_drafts() if draft_id != writer.draft_id}
+        selected_draft = st.selectbox(
+            "Unsaved drafts",
+            options=["(none)"] + list(other_drafts),
+            format_func=lambda d: d if d not in other_drafts else f"{d} · {datetime.fromtimestamp(other_drafts[d]):%Y-%m-%d %H:%M}",
+        )
+        restore_btn = st.button("Restore draft", disabled=(selected_draft == "(none)"))
+        st.caption(f"Edits autosave to draft {writer.draft_id}.")
+
+    if restore_btn and selected_draft != "(none)":
+        writer.flush()
+        start_new_draft(selected_draft)
+        st.session_state["draft_restore"] = load_draft(selected_draft)
+
     if clear_session_btn:
         st.session_state.pop("current_json_file", None)
         st.success("New session will be created on next save.")
 
     if light_mode:
-        st.markdown(
-            """
-            <style>
-            /* Force light color scheme for Streamlit containers */
-            :root, [data-testid="stAppViewContainer"], .stApp { color-scheme: light !important; }
-
-            /* App background + default text */
-            body, .stApp, .block-container { background-color: #ffffff !important; color: #000000 !important; }
-
-            /* Top header */
-            [data-testid="stHeader"], [data-testid="stToolbar"] { background: #ffffff !important; color: #000000 !important; }
-
-            /* Sidebar background + text */
-            [data-testid="stSidebar"] { background-color: #ffffff !important; }
-            [data-testid="stSidebar"] *, [data-testid="stSidebar"] .stMarkdown p { color: #000000 !important; }
-
-            /* Headings, labels, help text */
-            h1, h2, h3, h4, h5, h6, label, .stMarkdown, .stCaption, .st-emotion-cache { color: #000000 !important; }
-            .stMarkdown p, .stMarkdown span, .stMarkdown li { color: #000000 !important; }
-
-            /* Inputs and editors */
-            input, textarea, select { background-color: #ffffff !important; color: #000000 !important; }
-            /* TextInput */
-            .stTextInput > div > div > input { background-color: #ffffff !important; color: #000000 !important; border: 1px solid #ced4da !important; border-radius: 6px !important; box-shadow: none !important; }
-            /* TextArea */
-            .stTextArea textarea { background-color: #ffffff !important; color: #000000 !important; border: 1px solid #ced4da !important; border-radius: 6px !important; box-shadow: none !important; }
-            /* NumberInput */
-            .stNumberInput input { background-color: #ffffff !important; color: #000000 !important; border: 1px solid #ced4da !important; border-radius: 6px !important; box-shadow: none !important; }
-            /* DateInput */
-            .stDateInput input { background-color: #ffffff !important; color: #000000 !important; border: 1px solid #ced4da !important; border-radius: 6px !important; box-shadow: none !important; }
-            /* Generic input (fallback) */
-            input[type="text"], input[type="number"], input[type="search"], input[type="date"], textarea { border: 1px solid #ced4da !important; border-radius: 6px !important; box-shadow: none !important; }
-            /* Focus state */
-            input:focus, textarea:focus, [data-baseweb="select"] [role="combobox"]:focus { outline: 2px solid #86b7fe !important; outline-offset: 0 !important; border-color: #86b7fe !important; box-shadow: 0 0 0 0.2rem rgba(13,110,253,.15) !important; }
-            ::placeholder { color: #6c757d !important; opacity: 1 !important; }
-
-            /* Selectbox (BaseWeb) */
-            [data-baseweb="select"] { color: #000000 !important; }
-            [data-baseweb="select"] [role="combobox"] { background-color: #ffffff !important; color: #000000 !important; border: 1px solid #ced4da !important; border-radius: 6px !important; box-shadow: none !important; }
-            [data-baseweb="select"] [role="listbox"] { background-color: #ffffff !important; color: #000000 !important; }
-            [data-baseweb="select"] svg, [data-baseweb="select"] svg path { fill: #000000 !important; }
-            /* Selectbox popup (appears in a portal) */
-            [data-baseweb="popover"] { background-color: #ffffff !important; color: #000000 !important; }
-            [data-baseweb="popover"] [role="listbox"] { background-color: #ffffff !important; color: #000000 !important; }
-            [data-baseweb="popover"] [role="option"] { background-color: #ffffff !important; color: #000000 !important; }
-
-            /* Buttons */
-            .stButton > button { background-color: #f1f3f5 !important; color: #000000 !important; border: 1px solid #ced4da !important; }
-            .stButton > button:hover { background-color: #e9ecef !important; }
-            .stButton > button:disabled { background-color: #e9ecef !important; color: #6c757d !important; border-color: #dee2e6 !important; }
-
-            /* Tabs/expanders/alerts */
-            .stTabs, .stTabs * { color: #000000 !important; }
-            .stExpander, .stExpander * { color: #000000 !important; }
-            .stAlert, .stMetric { color: #000000 !important; }
-
-            /* Data editor grid */
-            [data-testid="stDataEditor"] * { color: #000000 !important; }
-            [data-testid="stDataEditorGrid"] { background-color: #ffffff !important; }
-            [data-testid="stDataEditorGrid"] .cell { background-color: #ffffff !important; }
-            </style>
-            """,
-            unsafe_allow_html=True,
-        )
+        st.markdown(load_css("light_mode.css"), unsafe_allow_html=True)
 
     st.title("🏗️ Site Daily Report (SQLite)")
     st.caption("Fill out the details and save to a local SQLite database file.")
+    with get_manager(DB_FILE).reader() as conn:
+        if not report_key_enforced(conn):
+            st.warning("This database has duplicate reports for the same project and date. Run `python compact_reports.py` to merge them.")
 
     # Initialize default store values (distinct from widget keys) so we can load JSON safely
     st.session_state.setdefault("project_name_store", "Transmission Line Upgrade - Section 5")
@@ -485,115 +614,201 @@ def main() -> None:
     st.session_state.setdefault("equipment_store", pd.DataFrame(columns=["equipment_name", "quantity", "hours_used"]))
     st.session_state.setdefault("materials_store", pd.DataFrame(columns=["material_name", "quantity", "unit", "supplier", "ticket_number"]))
 
+    restored = st.session_state.pop("draft_restore", None)
+    if restored:
+        load_into_form(draft_payload(restored))
+        st.info("Restored your unsaved draft.")
+
     # If user chose a previous JSON and clicked load, populate the form state
     if load_btn and selected_file != "(none)":
         data = load_json_file(os.path.join(JSON_DIR, selected_file))
         if data:
-            st.session_state["project_name_store"] = data.get("project_name", st.session_state["project_name_store"])
-            try:
-                st.session_state["report_date_store"] = datetime.fromisoformat(data.get("report_date")).date() if data.get("report_date") else st.session_state["report_date_store"]
-            except Exception:
-                pass
-            st.session_state["prepared_by_store"] = data.get("prepared_by", "")
-            st.session_state["weather_store"] = data.get("weather", "")
-            st.session_state["site_conditions_store"] = data.get("site_conditions", "")
-            st.session_state["general_notes_store"] = data.get("general_notes", "")
-            st.session_state["activities_store"] = pd.DataFrame(data.get("activities", []))
-            st.session_state["manpower_store"] = pd.DataFrame(data.get("manpower", []))
-            st.session_state["equipment_store"] = pd.DataFrame(data.get("equipment", []))
-            st.session_state["materials_store"] = pd.DataFrame(data.get("materials", []))
+            load_into_form(data)
             st.success(f"Loaded session from {selected_file}")
 
-    with st.form("report_form", clear_on_submit=False):
-        st.subheader("General Information")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            project_name = st.text_input(
-                "Project Name", value=st.session_state["project_name_store"], key="project_name"
-            )
-        with col2:
-            report_date = st.date_input("Report Date", value=st.session_state["report_date_store"], key="report_date")
-        with col3:
-            prepared_by = st.text_input("Prepared By", value=st.session_state["prepared_by_store"], key="prepared_by")
-
-        weather = st.text_input("Weather", value=st.session_state["weather_store"], placeholder="e.g., Sunny, 32°C, Light Wind", key="weather")
-        site_conditions = st.text_area(
-            "Site Conditions",
-            value=st.session_state["site_conditions_store"],
-            placeholder="e.g., Ground is dry, access roads are clear.",
-            key="site_conditions",
-        )
-        general_notes = st.text_area("General Notes", value=st.session_state["general_notes_store"], placeholder="Optional notes...", key="general_notes")
-
-        st.markdown("---")
-        st.subheader("Work Activities")
-        activities_df = st.data_editor(
-            st.session_state["activities_store"],
-            num_rows="dynamic",
-            use_container_width=True,
-            column_config={
-                "activity_description": st.column_config.TextColumn("Description", required=False),
-                "status": st.column_config.SelectboxColumn(
-                    "Status",
-                    options=["In Progress", "Completed", "Delayed", "Not Started"],
-                    default="In Progress",
-                ),
-                "percent_complete": st.column_config.NumberColumn(
-                    "% Complete", min_value=0, max_value=100
-                ),
-                "notes": st.column_config.TextColumn("Notes"),
-            },
-            key="activities_df",
+    upload_backlog()
+    report_form()
+    render_panel()
+
+
+def upload_backlog() -> None:
+    """Save a backlog of reports from uploaded JSON files (build_payload format) in one go."""
+    import pandas as pd
+
+    with st.expander("📤 Upload a backlog of reports"):
+        files = st.file_uploader(
+            "Report JSON files",
+            type="json",
+            accept_multiple_files=True,
+            help="Session files saved by this app, or files holding a JSON list of such reports.",
         )
+        chunk_size = st.number_input("Reports per transaction", min_value=1, max_value=5000, value=SAVE_CHUNK_SIZE)
+        if not st.button("Save uploaded reports", disabled=not files):
+            return
+
+        payloads: List[Any] = []
+        sources: List[str] = []
+        unreadable = []
+        for f in files:
+            try:
+                data = json.loads(f.getvalue())
+            except ValueError as e:
+                unreadable.append({"file": f.name, "project": "", "date": "", "saved": False, "message": f"Invalid JSON: {e}"})
+                continue
+            for payload in data if isinstance(data, list) else [data]:
+                payloads.append(payload)
+                sources.append(f.name)
+
+        with st.spinner(f"Saving {len(payloads)} reports..."):
+            results = save_reports(payloads, chunk_size=int(chunk_size))
+        saved = sum(r.ok for r in results)
+        if saved == len(results) and not unreadable:
+            st.success(f"Saved {saved} reports.")
+        else:
+            st.warning(f"Saved {saved} of {len(results)} reports; see the messages below.")
+        rows = unreadable + [
+            {"file": source, "project": r.project_name, "date": r.report_date, "saved": r.ok, "message": r.message}
+            for source, r in zip(sources, results)
+        ]
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
 
-        st.subheader("Manpower")
-        manpower_df = st.data_editor(
-            st.session_state["manpower_store"],
-            num_rows="dynamic",
-            use_container_width=True,
-            column_config={
-                "trade": st.column_config.TextColumn("Trade"),
-                "number_of_workers": st.column_config.NumberColumn(
-                    "Workers", min_value=0
-                ),
-                "hours_worked": st.column_config.NumberColumn(
-                    "Hours", min_value=0.0, step=0.5
-                ),
-            },
-            key="manpower_df",
+
+@st.fragment
+def report_form() -> None:
+    """Report form and save button.
+
+    Runs as a fragment: editing a field or table reruns only the form, which
+    also feeds the draft autosave.
+    """
+    st.subheader("General Information")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        project_name = st.text_input(
+            "Project Name", value=st.session_state["project_name_store"], key="project_name"
         )
+    with col2:
+        report_date = st.date_input("Report Date", value=st.session_state["report_date_store"], key="report_date")
+    with col3:
+        prepared_by = st.text_input("Prepared By", value=st.session_state["prepared_by_store"], key="prepared_by")
+
+    weather = st.text_input("Weather", value=st.session_state["weather_store"], placeholder="e.g., Sunny, 32°C, Light Wind", key="weather")
+    site_conditions = st.text_area(
+        "Site Conditions",
+        value=st.session_state["site_conditions_store"],
+        placeholder="e.g., Ground is dry, access roads are clear.",
+        key="site_conditions",
+    )
+    general_notes = st.text_area("General Notes", value=st.session_state["general_notes_store"], placeholder="Optional notes...", key="general_notes")
+
+    st.markdown("---")
+    st.subheader("Work Activities")
+    activities_df = st.data_editor(
+        st.session_state["activities_store"],
+        num_rows="dynamic",
+        use_container_width=True,
+        column_config={
+            "activity_description": st.column_config.TextColumn("Description", required=False),
+            "status": st.column_config.SelectboxColumn(
+                "Status",
+                options=["In Progress", "Completed", "Delayed", "Not Started"],
+                default="In Progress",
+            ),
+            "percent_complete": st.column_config.NumberColumn(
+                "% Complete", min_value=0, max_value=100
+            ),
+            "notes": st.column_config.TextColumn("Notes"),
+        },
+        key="activities_df",
+    )
 
-        st.subheader("Equipment")
-        equipment_df = st.data_editor(
-            st.session_state["equipment_store"],
-            num_rows="dynamic",
-            use_container_width=True,
-            column_config={
-                "equipment_name": st.column_config.TextColumn("Equipment"),
-                "quantity": st.column_config.NumberColumn("Qty", min_value=0),
-                "hours_used": st.column_config.NumberColumn(
-                    "Hours Used", min_value=0.0, step=0.5
-                ),
-            },
-            key="equipment_df",
+    # Name columns are pick lists of the lookup tables; names typed in "Add a name" join them until saved.
+    index = lookup_index()
+    added: Dict[str, List[str]] = st.session_state.setdefault("added_names", {})
+    with st.expander("Find or add a trade, equipment, material, unit or supplier"):
+        column = st.selectbox("List", options=list(LOOKUPS), format_func=lambda c: LOOKUPS[c].label, key="add_name_column")
+        name = st.selectbox(
+            f"{LOOKUPS[column].label} name",
+            options=name_options(index, column, added.get(column, [])),
+            index=None,
+            accept_new_options=True,
+            placeholder="Type to search, or enter a new name",
+            key=f"add_name_{column}",
         )
+        if name and name_key(name) not in {name_key(n) for n in index.names(column)}:
+            if name_key(name) not in {name_key(n) for n in added.get(column, [])}:
+                added.setdefault(column, []).append(clean_name(name))
+            st.caption(f"{clean_name(name)!r} is new: pick it in the tables below; it is stored when the report is saved.")
+
+    def name_column(column: str, store: str) -> Any:
+        extra = [*added.get(column, []), *st.session_state[store].get(column, [])]
+        return st.column_config.SelectboxColumn(LOOKUPS[column].label, options=name_options(index, column, extra))
+
+    st.subheader("Manpower")
+    manpower_df = st.data_editor(
+        st.session_state["manpower_store"],
+        num_rows="dynamic",
+        use_container_width=True,
+        column_config={
+            "trade": name_column("trade", "manpower_store"),
+            "number_of_workers": st.column_config.NumberColumn(
+                "Workers", min_value=0
+            ),
+            "hours_worked": st.column_config.NumberColumn(
+                "Hours", min_value=0.0, step=0.5
+            ),
+        },
+        key="manpower_df",
+    )
+
+    st.subheader("Equipment")
+    equipment_df = st.data_editor(
+        st.session_state["equipment_store"],
+        num_rows="dynamic",
+        use_container_width=True,
+        column_config={
+            "equipment_name": name_column("equipment_name", "equipment_store"),
+            "quantity": st.column_config.NumberColumn("Qty", min_value=0),
+            "hours_used": st.column_config.NumberColumn(
+                "Hours Used", min_value=0.0, step=0.5
+            ),
+        },
+        key="equipment_df",
+    )
 
-        st.subheader("Materials")
-        materials_df = st.data_editor(
-            st.session_state["materials_store"],
-            num_rows="dynamic",
-            use_container_width=True,
-            column_config={
-                "material_name": st.column_config.TextColumn("Material"),
-                "quantity": st.column_config.NumberColumn("Qty", min_value=0.0, step=0.5),
-                "unit": st.column_config.TextColumn("Unit"),
-                "supplier": st.column_config.TextColumn("Supplier"),
-                "ticket_number": st.column_config.TextColumn("Ticket #"),
+    st.subheader("Materials")
+    materials_df = st.data_editor(
+        st.session_state["materials_store"],
+        num_rows="dynamic",
+        use_container_width=True,
+        column_config={
+            "material_name": name_column("material_name", "materials_store"),
+            "quantity": st.column_config.NumberColumn("Qty", min_value=0.0, step=0.5),
+            "unit": name_column("unit", "materials_store"),
+            "supplier": name_column("supplier", "materials_store"),
+            "ticket_number": st.column_config.TextColumn("Ticket #"),
+        },
+        key="materials_df",
+    )
+
+    # Autosave: buffer the sections that changed; DraftWriter appends them once edits pause
+    draft_writer().update(
+        {
+            "header": {
+                "project_name": project_name,
+                "report_date": report_date,
+                "prepared_by": prepared_by,
+                "weather": weather,
+                "site_conditions": site_conditions,
+                "general_notes": general_notes,
             },
-            key="materials_df",
-        )
+            "activities": _records(activities_df),
+            "manpower": _records(manpower_df),
+            "equipment": _records(equipment_df),
+            "materials": _records(materials_df),
+        }
+    )
 
-        save_btn = st.form_submit_button("Save Daily Report", type="primary")
+    save_btn = st.button("Save Daily Report", type="primary")
 
     if save_btn:
         ok, msg = save_report(
@@ -628,6 +843,9 @@ def main() -> None:
             )
             json_path = save_json_for_session(payload)
             st.success(f"Session JSON saved: {json_path}")
+            # The report is in the database now; start a fresh draft
+            draft_writer().discard()
+            start_new_draft()
         else:
             st.error(msg)
 
@@ -0,0 +1,42 @@
+"""In-memory stand-in for the parts of the Firestore client the sync code uses."""
+from typing import Any, Dict, List, Optional
+
+
+class FakeDocument:
+    def __init__(self, doc_id: str, data: Dict[str, Any]) -> None:
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self._data)
+
+
+class FakeQuery:
+    def __init__(self, docs: List[FakeDocument]) -> None:
+        self._docs = docs
+
+    def where(self, field: Optional[str] = None, op: Optional[str] = None, value: Any = None, filter: Any = None) -> "FakeQuery":
+        if filter is not None:
+            field, op, value = filter.field_path, filter.op_string, filter.value
+        assert op == ">=", f"unsupported operator {op}"
+        return FakeQuery([d for d in self._docs if field in d._data and d._data[field] >= value])
+
+    def order_by(self, field: str) -> "FakeQuery":
+        return FakeQuery(sorted(self._docs, key=lambda d: d._data[field]))
+
+    def select(self, fields: List[str]) -> "FakeQuery":
+        return FakeQuery([FakeDocument(d.id, {f: d._data[f] for f in fields if f in d._data}) for d in self._docs])
+
+    def stream(self):
+        return iter(list(self._docs))
+
+
+class FakeFirestore:
+    """Collections are dicts of doc ID -> data that tests edit between syncs."""
+
+    def __init__(self) -> None:
+        self.collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def collection(self, path: str) -> FakeQuery:
+        docs = self.collections.setdefault(path, {})
+        return FakeQuery([FakeDocument(doc_id, data) for doc_id, data in sorted(docs.items())])
@@ -0,0 +1,70 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from db_pool import close_all
+from fake_firestore import FakeFirestore
+from firestore_mirror import sync_collection
+from firestore_replication import replicate_collection
+
+PATH = "artifacts/app/users/user/daily_reports"
+SAVED = datetime(2025, 8, 1, 17, 30, tzinfo=timezone.utc)
+
+
+def report(project: str, saved: datetime = SAVED) -> dict:
+    return {"projectName": project, "reportDate": "2025-08-01", "generalNotes": "", "createdAt": saved}
+
+
+class MirrorSyncTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "reports.db")
+        self.mirror_path = os.path.join(self.tmp.name, "mirror.db")
+        self.firestore = FakeFirestore()
+        self.docs = self.firestore.collections.setdefault(PATH, {})
+
+    def tearDown(self) -> None:
+        close_all()
+        self.tmp.cleanup()
+
+    def mirrored_ids(self) -> list:
+        conn = sqlite3.connect(self.mirror_path)
+        try:
+            return [r[0] for r in conn.execute("SELECT doc_id FROM MirrorReports ORDER BY doc_id;")]
+        finally:
+            conn.close()
+
+    def test_incremental_sync_keeps_document_saved_at_cursor(self) -> None:
+        self.docs["first"] = report("Harbour Tower")
+        sync_collection(self.firestore, PATH, self.mirror_path)
+        # Saved in the same instant as the cursor, after the previous sync read it.
+        self.docs["second"] = report("Riverside Depot")
+        sync_collection(self.firestore, PATH, self.mirror_path)
+        self.assertEqual(self.mirrored_ids(), ["first", "second"])
+
+    def test_incremental_sync_drops_deleted_document(self) -> None:
+        self.docs["first"] = report("Harbour Tower")
+        self.docs["second"] = report("Riverside Depot", datetime(2025, 8, 2, 8, 0, tzinfo=timezone.utc))
+        sync_collection(self.firestore, PATH, self.mirror_path)
+        replicate_collection(PATH, self.db_path, self.mirror_path)
+
+        del self.docs["first"]
+        sync_collection(self.firestore, PATH, self.mirror_path)
+        self.assertEqual(self.mirrored_ids(), ["second"])
+
+        stats = replicate_collection(PATH, self.db_path, self.mirror_path)
+        self.assertEqual(stats["deleted"], 1)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            projects = conn.execute(
+                "SELECT p.project_name FROM DailyReports r JOIN Projects p ON p.project_id = r.project_id;"
+            ).fetchall()
+        finally:
+            conn.close()
+        self.assertEqual(projects, [("Riverside Depot",)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from db_pool import close_all
+from fake_firestore import FakeFirestore
+from firestore_mirror import sync_collection
+from firestore_replication import replicate_collection
+
+PATH = "artifacts/app/users/user/daily_reports"
+
+
+def report(notes: str, saved: datetime) -> dict:
+    return {"projectName": "Harbour Tower", "reportDate": "2025-08-01", "generalNotes": notes, "createdAt": saved}
+
+
+class ReplicationOrderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "reports.db")
+        self.mirror_path = os.path.join(self.tmp.name, "mirror.db")
+        self.firestore = FakeFirestore()
+
+    def tearDown(self) -> None:
+        close_all()
+        self.tmp.cleanup()
+
+    def test_newest_save_wins_for_same_project_and_date(self) -> None:
+        # Document ID order ("a" < "b") is the opposite of save order.
+        self.firestore.collections[PATH] = {
+            "a-doc": report("second save", datetime(2025, 8, 1, 17, 30, tzinfo=timezone.utc)),
+            "b-doc": report("first save", datetime(2025, 8, 1, 9, 0, tzinfo=timezone.utc)),
+        }
+        sync_collection(self.firestore, PATH, self.mirror_path)
+        stats = replicate_collection(PATH, self.db_path, self.mirror_path)
+        self.assertEqual(stats["inserted"], 2)
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute("SELECT general_notes FROM DailyReports;").fetchall()
+        finally:
+            conn.close()
+        self.assertEqual(rows, [("second save",)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from db_pool import close_all
+from import_json_sessions import import_sessions
+
+
+def session(project: str, workers: object) -> dict:
+    return {
+        "project_name": project,
+        "report_date": "2025-08-08",
+        "manpower": [
+            {"trade": "Electricians", "number_of_workers": 2, "hours_worked": 8},
+            {"trade": "Linemen", "number_of_workers": workers, "hours_worked": 8},
+        ],
+        "saved_at": "2025-08-08T08:24:42Z",
+    }
+
+
+class ImportSessionsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.json_dir = os.path.join(self.tmp.name, "json_data")
+        os.mkdir(self.json_dir)
+        self.db_path = os.path.join(self.tmp.name, "reports.db")
+
+    def tearDown(self) -> None:
+        close_all()
+        self.tmp.cleanup()
+
+    def write(self, name: str, payload: dict) -> None:
+        with open(os.path.join(self.json_dir, name), "w") as f:
+            json.dump(payload, f)
+
+    def test_file_with_rejected_row_is_not_imported(self) -> None:
+        self.write("good.json", session("Harbour Tower", 3))
+        self.write("bad.json", session("Riverside Depot", "three"))
+
+        stats = import_sessions(self.json_dir, self.db_path, workers=1)
+        self.assertEqual((stats["imported"], stats["failed"]), (1, 1))
+        self.assertTrue(any(e.startswith(os.path.join(self.json_dir, "bad.json")) for e in stats["errors"]))
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            projects = conn.execute("SELECT project_name FROM Projects;").fetchall()
+            imported = conn.execute("SELECT filename FROM ImportedSessions;").fetchall()
+        finally:
+            conn.close()
+        self.assertEqual(projects, [("Harbour Tower",)])
+        self.assertEqual(imported, [("good.json",)])
+
+        # Not recorded, so a rerun tries the file again.
+        stats = import_sessions(self.json_dir, self.db_path, workers=1)
+        self.assertEqual((stats["skipped"], stats["failed"]), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
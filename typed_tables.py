@@ -0,0 +1,82 @@
+"""Compact dtypes for the report tables the dashboard keeps in memory.
+
+Loaded as-is, every log row carries its trade, equipment, status, unit,
+supplier and material name as a separate string, and every number as an
+8-byte int64/float64. These names repeat across thousands of reports, so
+`compact_frame` stores them as categoricals (one small integer code per row
+plus one copy of each distinct name), downcasts integer columns to the
+smallest type that holds them, and parses date columns to datetime64.
+Status always uses the same categories (the schema's CHECK list), so status
+columns from different loads concatenate without falling back to strings.
+"""
+from typing import Iterable, List, Sequence
+
+import pandas as pd
+
+from log_validation import STATUSES
+
+CATEGORY_COLUMNS = ("trade", "equipment_name", "status", "unit", "supplier", "material_name")
+INTEGER_COLUMNS = (
+    "number_of_workers", "quantity", "percent_complete",
+    "project_id", "report_id", "log_id", "delivery_id", "activity_id", "year",
+)
+DATE_COLUMNS = ("report_date", "start_date", "end_date")
+
+STATUS_DTYPE = pd.CategoricalDtype(STATUSES)
+
+
+def _category(values: pd.Series) -> pd.Series:
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values
+    if values.name == "status":
+        return values.astype(STATUS_DTYPE)
+    return values.astype("category")
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Return df with categorical names, downcast integers and parsed dates (df is not modified).
+
+    Columns that are already compact are left alone, so this is cheap to
+    apply twice. Integer columns that hold NULLs arrive as float64 and are
+    kept that way.
+    """
+    columns = {}
+    for name in df.columns:
+        values = df[name]
+        if name in CATEGORY_COLUMNS:
+            values = _category(values)
+        elif name in INTEGER_COLUMNS and pd.api.types.is_integer_dtype(values):
+            values = pd.to_numeric(values, downcast="integer")
+        elif name in DATE_COLUMNS and not pd.api.types.is_datetime64_any_dtype(values):
+            values = pd.to_datetime(values, format="ISO8601", errors="coerce")
+        columns[name] = values
+    return pd.DataFrame(columns, index=df.index)
+
+
+def compact_tables(tables: Iterable[pd.DataFrame]) -> tuple:
+    """compact_frame every frame of a load_tables-style tuple."""
+    return tuple(compact_frame(df) for df in tables)
+
+
+def concat_compact(frames: Sequence[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate compacted frames, keeping categorical columns categorical.
+
+    pd.concat turns categoricals with different categories into strings, so
+    the categories are unioned first.
+    """
+    frames = [compact_frame(df) for df in frames]
+    for name in frames[0].columns:
+        if not all(isinstance(df[name].dtype, pd.CategoricalDtype) for df in frames if name in df.columns):
+            continue
+        categories: List = []
+        for df in frames:
+            categories.extend(df[name].cat.categories)
+        union = pd.Index(categories).unique()
+        for df in frames:
+            df[name] = df[name].cat.set_categories(union)
+    return pd.concat(frames, ignore_index=True)
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    """Deep memory footprint of a frame, including string payloads."""
+    return int(df.memory_usage(deep=True, index=True).sum())